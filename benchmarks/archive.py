@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the time and the size of the export of a project with disk images.
+
+The sample project has qemu nodes with a qcow2 disk (already compressed
+data and empty clusters) and a few text configuration files. It is
+exported with all the files deflated (the behaviour before the
+compression policy), with the compression policy, with the fastest
+deflate level and, when the zstandard module is installed, as a zstd
+archive.
+
+python -m benchmarks.archive --nodes 4 --disk-size 64 --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import aiohttp
+import aiohttp.web
+import zipfile
+import argparse
+import platform
+import tempfile
+
+from gns3server.config import Config
+from gns3server.controller import Controller
+from gns3server.controller.export_project import export_project, write_zip, filter_files
+from gns3server.utils.asyncio import aiozipstream
+from gns3server.version import __version__
+
+
+CLUSTER_SIZE = 64 * 1024
+
+CONFIG = "\n".join(["interface GigabitEthernet0/{}\n ip address 10.0.{}.1 255.255.255.0\n no shutdown\n!".format(i, i) for i in range(64)])
+
+
+def create_disk(path, size):
+    """
+    Write a file looking like a qcow2 disk: a header, clusters
+    of random data and empty clusters.
+
+    :param size: Size of the disk in bytes
+    """
+
+    with open(path, "wb") as f:
+        f.write(b"QFI\xfb" + b"\0" * (CLUSTER_SIZE - 4))
+        written = CLUSTER_SIZE
+        cluster = 0
+        while written < size:
+            if cluster % 4 == 3:
+                f.write(b"\0" * CLUSTER_SIZE)
+            else:
+                f.write(os.urandom(CLUSTER_SIZE))
+            written += CLUSTER_SIZE
+            cluster += 1
+
+
+def create_project_files(path, nodes, disk_size):
+    for i in range(nodes):
+        node_dir = os.path.join(path, "project-files", "qemu", str(uuid.uuid4()))
+        os.makedirs(node_dir)
+        create_disk(os.path.join(node_dir, "hda_disk.qcow2"), disk_size)
+        for name in ("startup-config.cfg", "private-config.cfg", "vm.log"):
+            with open(os.path.join(node_dir, name), "w") as f:
+                f.write(CONFIG)
+
+
+@asyncio.coroutine
+def export_deflate_all(project):
+    """
+    Export of the files of the project, all deflated
+    """
+
+    z = aiozipstream.ZipFile(allowZip64=True)
+    for root, dirs, files in os.walk(project.path):
+        for file in files:
+            path = os.path.join(root, file)
+            if not filter_files(path):
+                z.write(path, os.path.relpath(path, project.path), compress_type=zipfile.ZIP_DEFLATED)
+    return z
+
+
+@asyncio.coroutine
+def measure(name, export, path):
+    begin = time.time()
+    z = yield from export()
+    with open(path, "wb") as f:
+        yield from write_zip(z, f)
+    results = {
+        "wall_time": time.time() - begin,
+        "size": os.path.getsize(path)
+    }
+    os.remove(path)
+    print("  {:<16} {:>8.3f}s {:>10.2f} MB".format(name, results["wall_time"], results["size"] / 1024 ** 2), file=sys.stderr)
+    return results
+
+
+@asyncio.coroutine
+def run(nodes, disk_size):
+    """
+    :param nodes: Number of qemu nodes
+    :param disk_size: Size of the disk of each node in bytes
+    :returns: Dictionary with the results
+    """
+
+    tmpdir = tempfile.mkdtemp()
+    config = Config.instance()
+    config.set("Server", "projects_path", os.path.join(tmpdir, "projects"))
+    config.set("Server", "images_path", os.path.join(tmpdir, "images"))
+    config.set("Server", "auth", False)
+
+    controller = Controller.instance()
+    controller._config_file = os.path.join(tmpdir, "gns3_controller.conf")
+    controller._settings = {}
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "nodes": nodes,
+        "disk_size": disk_size,
+        "exports": {}
+    }
+    try:
+        project = yield from controller.add_project(name="archive", project_id=str(uuid.uuid4()))
+        create_project_files(project.path, nodes, disk_size)
+        output = os.path.join(tmpdir, "project.gns3project")
+        exports = results["exports"]
+
+        exports["deflate_all"] = yield from measure("deflate_all", lambda: export_deflate_all(project), output)
+        exports["zip"] = yield from measure("zip", lambda: export_project(project), output)
+        config.set("Server", "archive_compression_level", "1")
+        exports["zip_level_1"] = yield from measure("zip_level_1", lambda: export_project(project), output)
+        config.set("Server", "archive_compression_level", "-1")
+        if aiozipstream.ZSTD_AVAILABLE:
+            exports["zstd"] = yield from measure("zstd", lambda: export_project(project, archive_format="zstd"), output)
+        yield from project.delete()
+    finally:
+        yield from controller.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export time and size of a project with disk images")
+    parser.add_argument("--nodes", type=int, default=4, help="number of qemu nodes")
+    parser.add_argument("--disk-size", type=int, default=64, help="size of the disk of each node in MB")
+    parser.add_argument("--output", help="write the JSON results to this file instead of the standard output")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(run(args.nodes, args.disk_size * 1024 * 1024))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=4, sort_keys=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
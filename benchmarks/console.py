@@ -0,0 +1,480 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the throughput of the consoles.
+
+Scenarios:
+
+* telnet_output: an in-memory stream replicated by AsyncioTelnetServer to all the clients
+* telnet_input: the clients send data to AsyncioTelnetServer (with or without telnet commands)
+* raw_command: AsyncioRawCommandServer streaming the output of a local subprocess
+* docker_console: the Docker attach websocket bridged to telnet like DockerVM._start_console
+
+The clients run in the same process, the CPU time includes them.
+
+python -m benchmarks.console --clients 1,10,50 --size 1048576 --slow-clients 1 --output results.json
+"""
+
+import sys
+import json
+import time
+import asyncio
+import aiohttp
+import aiohttp.web
+import argparse
+import platform
+import psutil
+
+from gns3server.utils.asyncio.telnet_server import AsyncioTelnetServer, IAC, NOP, SB, SE, NAWS, DO, SGA
+from gns3server.utils.asyncio.raw_command_server import AsyncioRawCommandServer
+from gns3server.compute.docker.docker_vm import DockerVM
+from gns3server.version import __version__
+
+
+SCENARIOS = ("telnet_output", "telnet_input", "raw_command", "docker_console")
+
+# Size of the chunks produced by the console
+CHUNK_SIZE = 4096
+
+# Maximum number of bytes produced but not received by all the clients
+WINDOW = 256 * 1024
+
+# Delay between two reads of a slow client
+SLOW_CLIENT_DELAY = 0.01
+
+# Printable output of a router console
+PLAIN_PAYLOAD = b"R1#show ip interface brief\r\nFastEthernet0/0  10.0.0.1  YES manual up  up\r\n"
+
+# Client input with telnet commands: NOP, escaped 0xff, window size and option negotiation
+IAC_PAYLOAD = (b"ls" + bytes([IAC, NOP]) + b"-l" + bytes([IAC, IAC]) +
+               bytes([IAC, SB, NAWS, 0, 80, 0, 24, IAC, SE]) + b"\r\n" + bytes([IAC, DO, SGA]))
+# Number of bytes of IAC_PAYLOAD remaining after the telnet commands are removed
+IAC_PAYLOAD_DATA = 7
+
+
+def payload(size, unit=PLAIN_PAYLOAD):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "p50": round(values[int(len(values) * 0.50)], 6),
+        "p90": round(values[min(len(values) - 1, int(len(values) * 0.90))], 6),
+        "p99": round(values[min(len(values) - 1, int(len(values) * 0.99))], 6),
+        "max": round(values[-1], 6)
+    }
+
+
+class Sink:
+    """
+    Writer counting the bytes written
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.received = asyncio.Event()
+        self.expected = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.expected is not None and self.size >= self.expected:
+            self.received.set()
+
+    @asyncio.coroutine
+    def drain(self):
+        pass
+
+
+class Producer:
+    """
+    Feed a console output by chunks, the production is paused when
+    the slowest client is late by more than WINDOW bytes. The time of
+    each chunk is kept to compute the latency of the clients.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.offsets = []
+        self.times = []
+        self.clients = []
+
+    @asyncio.coroutine
+    def run(self, feed):
+        data = payload(self.size)
+        produced = 0
+        while produced < self.size:
+            while self.clients and produced - min(c.received for c in self.clients) > WINDOW:
+                yield from asyncio.sleep(0.001)
+            chunk = data[produced:produced + CHUNK_SIZE]
+            produced += len(chunk)
+            self.offsets.append(produced)
+            self.times.append(time.perf_counter())
+            feed(chunk)
+
+
+class Client:
+    """
+    Telnet client reading the console
+
+    :param skip: Number of bytes to ignore (telnet negotiation)
+    :param delay: Delay between two reads
+    """
+
+    def __init__(self, skip=0, delay=0):
+        self._skip = skip
+        self._delay = delay
+        self.received = 0
+        self.latencies = []
+        self.reader = None
+        self.writer = None
+
+    @asyncio.coroutine
+    def connect(self, host, port):
+        self.reader, self.writer = yield from asyncio.open_connection(host, port)
+        if self._skip:
+            yield from self.reader.readexactly(self._skip)
+
+    @asyncio.coroutine
+    def read(self, producer):
+        """
+        Read the output of the producer and compute the latency
+        of each chunk
+        """
+
+        chunk = 0
+        while self.received < producer.size:
+            data = yield from self.reader.read(65536)
+            if not data:
+                break
+            self.received += len(data)
+            now = time.perf_counter()
+            while chunk < len(producer.offsets) and producer.offsets[chunk] <= self.received:
+                self.latencies.append(now - producer.times[chunk])
+                chunk += 1
+            if self._delay:
+                yield from asyncio.sleep(self._delay)
+
+    @asyncio.coroutine
+    def discard(self):
+        """
+        Read and ignore the answers of the server
+        """
+        while True:
+            data = yield from self.reader.read(65536)
+            if not data:
+                break
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+class Measure:
+    """
+    Wall and CPU time of a scenario
+    """
+
+    def __init__(self):
+        times = psutil.Process().cpu_times()
+        self._cpu = times.user + times.system
+        self._start = time.perf_counter()
+
+    def result(self, size, clients):
+        wall = time.perf_counter() - self._start
+        times = psutil.Process().cpu_times()
+        latencies = []
+        for client in clients:
+            latencies.extend(client.latencies)
+        return {
+            "bytes": size,
+            "wall_time": round(wall, 4),
+            "cpu_time": round(times.user + times.system - self._cpu, 4),
+            "bytes_per_second": round(size / wall) if wall else 0,
+            "latency": percentiles(latencies) if latencies else None
+        }
+
+
+@asyncio.coroutine
+def _intro_size(server):
+    sink = Sink()
+    yield from server._write_intro(sink, echo=server._echo, binary=server._binary, naws=server._naws)
+    return sink.size
+
+
+@asyncio.coroutine
+def _connect_clients(server, port, clients, slow_clients):
+    skip = yield from _intro_size(server)
+    result = []
+    for i in range(clients):
+        client = Client(skip=skip, delay=SLOW_CLIENT_DELAY if i < slow_clients else 0)
+        yield from client.connect("127.0.0.1", port)
+        result.append(client)
+    # Wait for the server to register all the connections
+    while len(server._connections) < clients:
+        yield from asyncio.sleep(0.001)
+    return result
+
+
+@asyncio.coroutine
+def _replicate(server, clients, slow_clients, size, feed):
+    """
+    Measure the replication of a console output to the telnet clients
+    """
+
+    srv = yield from asyncio.start_server(server.run, "127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    connected = yield from _connect_clients(server, port, clients, slow_clients)
+    producer = Producer(size)
+    producer.clients = connected
+    try:
+        measure = Measure()
+        yield from asyncio.gather(producer.run(feed), *[c.read(producer) for c in connected])
+        return measure.result(size * clients, connected)
+    finally:
+        for client in connected:
+            client.close()
+        srv.close()
+        yield from srv.wait_closed()
+
+
+@asyncio.coroutine
+def telnet_output(clients, size, slow_clients=0, **kwargs):
+    reader = asyncio.StreamReader()
+    server = AsyncioTelnetServer(reader=reader, writer=Sink(), binary=True, echo=True)
+    return (yield from _replicate(server, clients, slow_clients, size, reader.feed_data))
+
+
+@asyncio.coroutine
+def telnet_input(clients, size, iac=False, **kwargs):
+    sink = Sink()
+    server = AsyncioTelnetServer(reader=asyncio.StreamReader(), writer=sink, binary=True, echo=True)
+    srv = yield from asyncio.start_server(server.run, "127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    connected = yield from _connect_clients(server, port, clients, 0)
+
+    if iac:
+        units = size // len(IAC_PAYLOAD) + 1
+        data = IAC_PAYLOAD * units
+        expected = IAC_PAYLOAD_DATA * units
+    else:
+        data = payload(size)
+        expected = len(data)
+    sink.expected = expected * clients
+
+    @asyncio.coroutine
+    def send(client):
+        for i in range(0, len(data), CHUNK_SIZE):
+            client.writer.write(data[i:i + CHUNK_SIZE])
+            yield from client.writer.drain()
+
+    # The server answers to the telnet negotiations
+    readers = [asyncio.async(c.discard()) for c in connected]
+    try:
+        measure = Measure()
+        yield from asyncio.gather(*[send(c) for c in connected])
+        yield from sink.received.wait()
+        return measure.result(len(data) * clients, [])
+    finally:
+        for client in connected:
+            client.close()
+        for reader in readers:
+            reader.cancel()
+        srv.close()
+        yield from srv.wait_closed()
+
+
+@asyncio.coroutine
+def raw_command(clients, size, **kwargs):
+    """
+    Each client gets the output of its own process, the latency is
+    the time to the first byte
+    """
+
+    command = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'x' * {})".format(size)]
+    server = AsyncioRawCommandServer(command)
+    srv = yield from asyncio.start_server(server.run, "127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+
+    latencies = []
+
+    @asyncio.coroutine
+    def read():
+        start = time.perf_counter()
+        reader, writer = yield from asyncio.open_connection("127.0.0.1", port)
+        received = 0
+        while True:
+            data = yield from reader.read(65536)
+            if not data:
+                break
+            if received == 0:
+                latencies.append(time.perf_counter() - start)
+            received += len(data)
+        writer.close()
+        return received
+
+    try:
+        measure = Measure()
+        received = yield from asyncio.gather(*[read() for i in range(clients)])
+        result = measure.result(sum(received), [])
+        result["latency"] = percentiles(latencies)
+        return result
+    finally:
+        srv.close()
+        yield from srv.wait_closed()
+
+
+class DockerAttach:
+    """
+    Stand-in for the attach websocket of the Docker API, it sends
+    the data fed by the producer
+    """
+
+    def __init__(self):
+        self.ws = None
+        self._ready = asyncio.Event()
+
+    @asyncio.coroutine
+    def handler(self, request):
+        self.ws = aiohttp.web.WebSocketResponse()
+        yield from self.ws.prepare(request)
+        self._ready.set()
+        while True:
+            msg = yield from self.ws.receive()
+            if msg.type != aiohttp.WSMsgType.BINARY:
+                break
+        return self.ws
+
+    @asyncio.coroutine
+    def wait_ready(self):
+        yield from self._ready.wait()
+
+    def feed(self, data):
+        self.ws.send_bytes(data)
+
+
+class ConsoleOwner:
+    """
+    The node owning the console, DockerVM._read_console_output
+    stops it when the websocket is closed
+    """
+
+    @asyncio.coroutine
+    def stop(self):
+        pass
+
+
+@asyncio.coroutine
+def docker_console(clients, size, slow_clients=0, **kwargs):
+    attach = DockerAttach()
+    app = aiohttp.web.Application()
+    app.router.add_route("GET", "/attach/ws", attach.handler)
+    handler = app.make_handler()
+    docker_srv = yield from asyncio.get_event_loop().create_server(handler, "127.0.0.1", 0)
+    docker_port = docker_srv.sockets[0].getsockname()[1]
+
+    session = aiohttp.ClientSession()
+    ws = yield from session.ws_connect("http://127.0.0.1:{}/attach/ws".format(docker_port))
+    yield from attach.wait_ready()
+
+    # Same pipeline as DockerVM._start_console
+    output_stream = asyncio.StreamReader()
+    server = AsyncioTelnetServer(reader=output_stream, writer=Sink(), echo=True)
+    bridge = asyncio.async(DockerVM._read_console_output(ConsoleOwner(), ws, output_stream))
+    try:
+        return (yield from _replicate(server, clients, slow_clients, size, attach.feed))
+    finally:
+        yield from attach.ws.close()
+        yield from bridge
+        session.close()
+        docker_srv.close()
+        yield from docker_srv.wait_closed()
+        yield from handler.shutdown(1)
+
+
+@asyncio.coroutine
+def run(scenarios, clients, size, slow_clients=0):
+    """
+    :param scenarios: List of scenario names
+    :param clients: List of number of clients
+    :param size: Number of bytes sent by the console (or by each client for the input)
+    :param slow_clients: Number of clients reading slowly
+    :returns: Dictionary with the results
+    """
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "size": size,
+        "slow_clients": slow_clients,
+        "scenarios": {}
+    }
+
+    variants = []
+    for scenario in scenarios:
+        if scenario == "telnet_input":
+            variants.append(("telnet_input", telnet_input, {}))
+            variants.append(("telnet_input_iac", telnet_input, {"iac": True}))
+        elif scenario in ("telnet_output", "docker_console"):
+            variants.append((scenario, globals()[scenario], {}))
+            if slow_clients:
+                variants.append((scenario + "_slow", globals()[scenario], {"slow_clients": slow_clients}))
+        else:
+            variants.append((scenario, globals()[scenario], {}))
+
+    for name, func, kwargs in variants:
+        results["scenarios"][name] = {}
+        for count in clients:
+            result = yield from func(count, size, **kwargs)
+            results["scenarios"][name][str(count)] = result
+            latency = result["latency"]["p90"] if result["latency"] else 0
+            print("{:<20} {:>4} clients {:>12.0f} bytes/s latency p90 {:.4f}s cpu {:.3f}s".format(name, count, result["bytes_per_second"], latency, result["cpu_time"]), file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the consoles")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated list of scenarios")
+    parser.add_argument("--clients", default="1,10,50", help="comma separated list of number of clients")
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="number of bytes sent by the console")
+    parser.add_argument("--slow-clients", type=int, default=1, help="number of clients reading slowly")
+    parser.add_argument("--output", help="write the JSON results to this file instead of the standard output")
+    args = parser.parse_args()
+
+    scenarios = args.scenarios.split(",")
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            parser.error("Unknown scenario {}".format(scenario))
+    clients = [int(c) for c in args.clients.split(",")]
+
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(run(scenarios, clients, args.size, slow_clients=args.slow_clients))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=4, sort_keys=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
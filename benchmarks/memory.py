@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the memory used by the controller model of a large topology.
+
+Qemu nodes created from the same appliance are added to a project on
+a stand-in compute started in a separate process, connected two by two
+and decorated with a drawing by node. The memory allocated by Python
+(tracemalloc) and the growth of the RSS of the controller process are
+reported per 1000 nodes.
+
+python -m benchmarks.memory --nodes 1000,10000 --output results.json
+"""
+
+import gc
+import os
+import sys
+import json
+import uuid
+import shutil
+import asyncio
+import aiohttp
+import aiohttp.web
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import psutil
+
+from gns3server.config import Config
+from gns3server.controller import Controller
+from gns3server.version import __version__
+from .topology import ExternalCompute, InternalCompute, create_links
+
+
+# Properties of a node created from an appliance, identical for all the nodes
+APPLIANCE_PROPERTIES = {
+    "adapter_type": "e1000",
+    "adapters": 4,
+    "cpus": 1,
+    "hda_disk_image": "vyos-1.1.7-amd64.qcow2",
+    "hda_disk_interface": "ide",
+    "kvm": "require",
+    "options": "-nographic",
+    "platform": "x86_64",
+    "qemu_path": "/usr/bin/qemu-system-x86_64",
+    "ram": 512
+}
+
+SVG = "<svg height=\"50\" width=\"100\"><ellipse cx=\"50\" cy=\"25\" rx=\"50\" ry=\"25\" fill=\"#ffffff\" /></svg>"
+
+
+def rss():
+    return psutil.Process().memory_info().rss
+
+
+@asyncio.coroutine
+def create_topology(project, compute, nodes):
+    created = []
+    for i in range(nodes):
+        node = yield from project.add_node(compute, "VyOS{}".format(i + 1), str(uuid.uuid4()), node_type="qemu",
+                                           properties=dict(APPLIANCE_PROPERTIES), x=i, y=i, dump=False)
+        yield from project.add_drawing(svg=SVG, x=i, y=i, dump=False)
+        created.append(node)
+    yield from create_links(project, created)
+
+
+@asyncio.coroutine
+def run_size(controller, compute, nodes):
+    project = yield from controller.add_project(name="memory{}".format(nodes), project_id=str(uuid.uuid4()))
+
+    gc.collect()
+    tracemalloc.start()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    rss_before = rss()
+    yield from create_topology(project, compute, nodes)
+    gc.collect()
+    traced = tracemalloc.get_traced_memory()[0] - traced_before
+    rss_growth = rss() - rss_before
+    tracemalloc.stop()
+
+    results = {
+        "traced_bytes": traced,
+        "traced_bytes_per_1k_nodes": round(traced * 1000 / nodes),
+        "rss_growth": rss_growth,
+        "rss_growth_per_1k_nodes": round(rss_growth * 1000 / nodes),
+    }
+    print("  {:>9.2f} MB traced {:>9.2f} MB RSS per 1000 nodes".format(results["traced_bytes_per_1k_nodes"] / 1024 ** 2, results["rss_growth_per_1k_nodes"] / 1024 ** 2), file=sys.stderr)
+    yield from project.delete()
+    return results
+
+
+@asyncio.coroutine
+def run(sizes, in_process=False):
+    """
+    :param sizes: List of number of nodes
+    :param in_process: Run the mock compute in the same process (its memory is counted)
+    :returns: Dictionary with the results
+    """
+
+    tmpdir = tempfile.mkdtemp()
+    config = Config.instance()
+    config.set("Server", "projects_path", os.path.join(tmpdir, "projects"))
+    config.set("Server", "images_path", os.path.join(tmpdir, "images"))
+    config.set("Server", "symbols_path", os.path.join(tmpdir, "symbols"))
+    config.set("Server", "appliances_path", os.path.join(tmpdir, "appliances"))
+    config.set("Server", "auth", False)
+
+    controller = Controller.instance()
+    controller._config_file = os.path.join(tmpdir, "gns3_controller.conf")
+    controller._settings = {}
+
+    if in_process:
+        mock_compute = InternalCompute(0, 0)
+    else:
+        mock_compute = ExternalCompute(0, 0)
+    yield from mock_compute.start()
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "sizes": {}
+    }
+    try:
+        compute = yield from controller.add_compute(compute_id="mock", name="mock", protocol="http", host=mock_compute.host, port=mock_compute.port)
+        for nodes in sizes:
+            print("{} nodes".format(nodes), file=sys.stderr)
+            results["sizes"][str(nodes)] = yield from run_size(controller, compute, nodes)
+    finally:
+        yield from controller.stop()
+        yield from mock_compute.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory used by the controller for large topologies")
+    parser.add_argument("--nodes", default="1000,10000", help="comma separated list of topology sizes")
+    parser.add_argument("--in-process", action="store_true", help="run the mock compute in the same process")
+    parser.add_argument("--output", help="write the JSON results to this file instead of the standard output")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.nodes.split(",")]
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(run(sizes, in_process=args.in_process))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=4, sort_keys=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Stand-in for a compute. It implements the endpoints used by the
+controller to manage nodes, NIOs and UDP ports without running any
+emulator, with a configurable latency for each request.
+
+python -m benchmarks.mock_compute --port 3081 --latency 0.005
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+import aiohttp
+import aiohttp.web
+
+from gns3server.version import __version__
+
+
+class MockCompute:
+    """
+    :param latency: Delay in seconds added to each request
+    :param file_size: Size in bytes of the file created for each node (0 for no file)
+    """
+
+    def __init__(self, latency=0.0, file_size=0):
+        self._latency = latency
+        self._file_size = file_size
+        self._requests = 0
+        self._received_bytes = 0
+        self._websockets = set()
+        self._updates = 0
+        # project_id => {node_id: node}
+        self._projects = {}
+        self._udp_port = 10000
+        self._console_port = 5000
+        self._server = None
+        self._handler = None
+
+    @property
+    def requests(self):
+        return self._requests
+
+    def app(self):
+        app = aiohttp.web.Application(middlewares=[self._middleware])
+        router = app.router
+        router.add_route("GET", "/v2/compute/capabilities", self.capabilities)
+        router.add_route("GET", "/v2/compute/network/interfaces", self.interfaces)
+        router.add_route("GET", "/v2/compute/notifications/ws", self.notifications)
+        router.add_route("POST", "/v2/compute/projects", self.create_project)
+        router.add_route("POST", "/v2/compute/projects/{project_id}/close", self.close_project)
+        router.add_route("DELETE", "/v2/compute/projects/{project_id}", self.close_project)
+        router.add_route("POST", "/v2/compute/projects/{project_id}/ports/udp", self.allocate_udp_port)
+        router.add_route("GET", "/v2/compute/projects/{project_id}/files", self.list_files)
+        router.add_route("GET", "/v2/compute/projects/{project_id}/files/{path:.+}", self.read_file)
+        router.add_route("POST", "/v2/compute/projects/{project_id}/files/{path:.+}", self.write_file)
+        router.add_route("POST", "/v2/compute/projects/{project_id}/{node_type}/nodes", self.create_node)
+        router.add_route("PUT", "/v2/compute/projects/{project_id}/{node_type}/nodes/{node_id}", self.update_node)
+        router.add_route("DELETE", "/v2/compute/projects/{project_id}/{node_type}/nodes/{node_id}", self.delete_node)
+        router.add_route("*", "/v2/compute/projects/{project_id}/{node_type}/nodes/{node_id}/adapters/{adapter_number}/ports/{port_number}/nio", self.nio)
+        router.add_route("POST", "/v2/compute/projects/{project_id}/{node_type}/nodes/{node_id}/{action}", self.node_action)
+        router.add_route("GET", "/_bench/stats", self.stats)
+        router.add_route("POST", "/_bench/notify", self.notify)
+        return app
+
+    @asyncio.coroutine
+    def _middleware(self, app, handler):
+        @asyncio.coroutine
+        def middleware(request):
+            if not request.path.startswith("/_bench"):
+                self._requests += 1
+                if self._latency:
+                    yield from asyncio.sleep(self._latency)
+            return (yield from handler(request))
+        return middleware
+
+    @staticmethod
+    def _json(data, status=200):
+        return aiohttp.web.Response(status=status, body=json.dumps(data).encode(), content_type="application/json")
+
+    @asyncio.coroutine
+    def capabilities(self, request):
+        return self._json({
+            "version": __version__,
+            "node_types": ["vpcs", "ethernet_switch", "ethernet_hub", "qemu", "docker", "iou"],
+            "platform": sys.platform,
+            "cpus": 8,
+            "memory": 16 * 1024 * 1024 * 1024
+        })
+
+    @asyncio.coroutine
+    def interfaces(self, request):
+        return self._json([{"id": "lo", "name": "lo", "ip_address": "127.0.0.1", "netmask": "255.0.0.0", "mac_address": "", "type": "ethernet"}])
+
+    @asyncio.coroutine
+    def notifications(self, request):
+        ws = aiohttp.web.WebSocketResponse()
+        yield from ws.prepare(request)
+        self._websockets.add(ws)
+        try:
+            # The subscription filters sent by the controller are ignored
+            while True:
+                msg = yield from ws.receive()
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+        finally:
+            self._websockets.discard(ws)
+        return ws
+
+    @asyncio.coroutine
+    def create_project(self, request):
+        data = yield from request.json()
+        self._projects.setdefault(data["project_id"], {})
+        return self._json({"project_id": data["project_id"], "name": data.get("name")}, status=201)
+
+    @asyncio.coroutine
+    def close_project(self, request):
+        self._projects.pop(request.match_info["project_id"], None)
+        return aiohttp.web.Response(status=204)
+
+    @asyncio.coroutine
+    def allocate_udp_port(self, request):
+        self._udp_port += 1
+        return self._json({"udp_port": self._udp_port}, status=201)
+
+    def _node_file(self, node):
+        return "project-files/{}/{}/startup.vpc".format(node["node_type"], node["node_id"])
+
+    @asyncio.coroutine
+    def list_files(self, request):
+        files = []
+        if self._file_size:
+            for node in self._projects.get(request.match_info["project_id"], {}).values():
+                files.append({"path": self._node_file(node), "md5sum": "0" * 32})
+        return self._json(files)
+
+    @asyncio.coroutine
+    def read_file(self, request):
+        response = aiohttp.web.StreamResponse()
+        response.content_length = self._file_size
+        yield from response.prepare(request)
+        block = b"x" * 4096
+        remaining = self._file_size
+        while remaining > 0:
+            response.write(block[:remaining])
+            remaining -= len(block)
+            yield from response.drain()
+        return response
+
+    @asyncio.coroutine
+    def write_file(self, request):
+        while True:
+            data = yield from request.content.read(65536)
+            if not data:
+                break
+            self._received_bytes += len(data)
+        return aiohttp.web.Response(status=201)
+
+    @asyncio.coroutine
+    def create_node(self, request):
+        data = yield from request.json()
+        self._console_port += 1
+        node = dict(data)
+        node.update({
+            "node_type": request.match_info["node_type"],
+            "project_id": request.match_info["project_id"],
+            "status": "stopped",
+            "console": self._console_port,
+            "console_type": "telnet",
+            "node_directory": "/tmp/{}".format(data["node_id"])
+        })
+        self._projects.setdefault(request.match_info["project_id"], {})[data["node_id"]] = node
+        return self._json(node, status=201)
+
+    @asyncio.coroutine
+    def update_node(self, request):
+        data = yield from request.json()
+        node = self._projects.get(request.match_info["project_id"], {}).get(request.match_info["node_id"], {})
+        node.update(data)
+        return self._json(node)
+
+    @asyncio.coroutine
+    def delete_node(self, request):
+        self._projects.get(request.match_info["project_id"], {}).pop(request.match_info["node_id"], None)
+        return aiohttp.web.Response(status=204)
+
+    @asyncio.coroutine
+    def nio(self, request):
+        if request.method == "DELETE":
+            return aiohttp.web.Response(status=204)
+        data = yield from request.json()
+        return self._json(data, status=201)
+
+    @asyncio.coroutine
+    def node_action(self, request):
+        return aiohttp.web.Response(status=204)
+
+    @asyncio.coroutine
+    def stats(self, request):
+        return self._json({"requests": self._requests, "received_bytes": self._received_bytes})
+
+    @asyncio.coroutine
+    def notify(self, request):
+        """
+        Send a node.updated notification for all the nodes of a project
+        """
+        data = yield from request.json()
+        count = yield from self.send_node_updates(data["project_id"], status=data.get("status", "stopped"))
+        return self._json({"sent": count})
+
+    @asyncio.coroutine
+    def send_node_updates(self, project_id, status="stopped"):
+        """
+        :param status: Status of the nodes sent in the notification
+        :returns: Number of notifications sent
+        """
+
+        # The command line change at each call, the controller
+        # doesn't forward the notifications without change
+        self._updates += 1
+        command_line = "vpcs -p {}".format(self._updates)
+        count = 0
+        for node_id in list(self._projects.get(project_id, {})):
+            msg = json.dumps({"action": "node.updated", "event": {"project_id": project_id, "node_id": node_id, "status": status, "command_line": command_line}})
+            for ws in list(self._websockets):
+                ws.send_str(msg)
+            count += 1
+            if count % 100 == 0:
+                for ws in list(self._websockets):
+                    yield from ws.drain()
+        return count
+
+    @asyncio.coroutine
+    def start(self, host, port):
+        self._handler = self.app().make_handler()
+        self._server = yield from asyncio.get_event_loop().create_server(self._handler, host, port)
+
+    @asyncio.coroutine
+    def stop(self):
+        for ws in list(self._websockets):
+            yield from ws.close()
+        if self._server:
+            self._server.close()
+            yield from self._server.wait_closed()
+            yield from self._handler.shutdown(1)
+            self._server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in compute for the benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3081)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay in seconds added to each request")
+    parser.add_argument("--file-size", type=int, default=0, help="size in bytes of the file of each node")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    compute = MockCompute(latency=args.latency, file_size=args.file_size)
+    loop.run_until_complete(compute.start(args.host, args.port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    loop.run_until_complete(compute.stop())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the scaling of the controller with large topologies.
+
+The controller manages VPCS nodes on a stand-in compute started in
+a separate process (benchmarks/mock_compute.py). Each phase reports the
+wall time, the number of requests sent to the compute, the CPU time
+of the controller process and its peak RSS.
+
+python -m benchmarks.topology --nodes 100,1000,5000 --latency 0.001 --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import shutil
+import asyncio
+import aiohttp
+import aiohttp.web
+import argparse
+import platform
+import tempfile
+import subprocess
+import psutil
+
+from gns3server.config import Config
+from gns3server.controller import Controller
+from gns3server.controller.export_project import export_project, write_zip
+from gns3server.controller.import_project import import_project
+from gns3server.version import __version__
+from .mock_compute import MockCompute
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss():
+    """
+    :returns: Peak resident memory of the process in bytes
+    """
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux returns kilobytes and OSX bytes
+        if sys.platform.startswith("darwin"):
+            return rss
+        return rss * 1024
+    return psutil.Process().memory_info().peak_wset
+
+
+def get_unused_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class ExternalCompute:
+    """
+    Mock compute running in another process, the CPU it uses
+    is not counted for the controller
+    """
+
+    def __init__(self, latency, file_size):
+        self._latency = latency
+        self._file_size = file_size
+        self._process = None
+        self.host = "127.0.0.1"
+        self.port = get_unused_port()
+
+    @asyncio.coroutine
+    def start(self):
+        self._process = subprocess.Popen([sys.executable, "-m", "benchmarks.mock_compute",
+                                          "--host", self.host,
+                                          "--port", str(self.port),
+                                          "--latency", str(self._latency),
+                                          "--file-size", str(self._file_size)])
+        for i in range(100):
+            try:
+                yield from self.requests()
+                return
+            except (aiohttp.ClientError, OSError):
+                yield from asyncio.sleep(0.1)
+        raise RuntimeError("The mock compute has not started")
+
+    @asyncio.coroutine
+    def requests(self):
+        with aiohttp.ClientSession() as session:
+            response = yield from session.get("http://{}:{}/_bench/stats".format(self.host, self.port))
+            data = yield from response.json()
+        return data["requests"]
+
+    @asyncio.coroutine
+    def send_node_updates(self, project_id):
+        with aiohttp.ClientSession() as session:
+            response = yield from session.post("http://{}:{}/_bench/notify".format(self.host, self.port), data=json.dumps({"project_id": project_id}))
+            data = yield from response.json()
+        return data["sent"]
+
+    @asyncio.coroutine
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.wait()
+
+
+class InternalCompute(MockCompute):
+    """
+    Mock compute running in the same event loop, used for the quick runs
+    """
+
+    def __init__(self, latency, file_size):
+        super().__init__(latency=latency, file_size=file_size)
+        self.host = "127.0.0.1"
+        self.port = get_unused_port()
+
+    @asyncio.coroutine
+    def start(self):
+        yield from super().start(self.host, self.port)
+
+    @asyncio.coroutine
+    def requests(self):
+        return self._requests
+
+
+class Phase:
+    """
+    Measure one step of the benchmark
+    """
+
+    def __init__(self, name, compute, results):
+        self._name = name
+        self._compute = compute
+        self._results = results
+
+    @asyncio.coroutine
+    def start(self):
+        self._requests = yield from self._compute.requests()
+        times = psutil.Process().cpu_times()
+        self._cpu = times.user + times.system
+        self._start = time.perf_counter()
+
+    @asyncio.coroutine
+    def stop(self):
+        wall = time.perf_counter() - self._start
+        times = psutil.Process().cpu_times()
+        requests = yield from self._compute.requests()
+        self._results[self._name] = {
+            "wall_time": round(wall, 4),
+            "cpu_time": round(times.user + times.system - self._cpu, 4),
+            "requests": requests - self._requests,
+            "peak_rss": peak_rss()
+        }
+        print("  {:<14} {:>9.3f}s wall {:>9.3f}s cpu {:>7} requests".format(self._name, wall, self._results[self._name]["cpu_time"], self._results[self._name]["requests"]), file=sys.stderr)
+
+
+@asyncio.coroutine
+def measure(name, compute, results, coro):
+    phase = Phase(name, compute, results)
+    yield from phase.start()
+    try:
+        result = yield from coro
+    finally:
+        yield from phase.stop()
+    return result
+
+
+@asyncio.coroutine
+def create_topology(project, compute, nodes):
+    """
+    Create the nodes, two by two connected by a link
+    """
+
+    created = []
+    for i in range(nodes):
+        node = yield from project.add_node(compute, "PC{}".format(i + 1), str(uuid.uuid4()), node_type="vpcs", dump=False)
+        created.append(node)
+    return created
+
+
+@asyncio.coroutine
+def create_links(project, nodes):
+    for i in range(0, len(nodes) - 1, 2):
+        link = yield from project.add_link(dump=False)
+        yield from link.add_node(nodes[i], 0, 0, dump=False)
+        yield from link.add_node(nodes[i + 1], 0, 0, dump=False)
+
+
+@asyncio.coroutine
+def notification_fan_out(controller, project, compute, listeners):
+    """
+    The compute send a node.updated for each node, the controller
+    update its nodes and forward the events to the listeners
+    """
+
+    expected = len(project.nodes)
+    queues = []
+    contexts = []
+    for i in range(listeners):
+        context = controller.notification.queue(project)
+        queues.append(context.__enter__())
+        contexts.append(context)
+
+    @asyncio.coroutine
+    def consume(queue):
+        received = 0
+        while received < expected:
+            action, event, kwargs = yield from queue.get(30)
+            if action == "node.updated":
+                received += 1
+            elif action == "ping" and queue.empty() and received:
+                raise RuntimeError("Timeout waiting for the notifications")
+
+    try:
+        consumers = asyncio.gather(*[consume(q) for q in queues])
+        yield from compute.send_node_updates(project.id)
+        yield from consumers
+    finally:
+        for context in contexts:
+            try:
+                context.__exit__(None, None, None)
+            except StopIteration:
+                pass
+
+
+@asyncio.coroutine
+def export_to_file(project, path):
+    zipstream = yield from export_project(project, keep_compute_id=True)
+    with open(path, "wb") as f:
+        yield from write_zip(zipstream, f)
+
+
+@asyncio.coroutine
+def import_from_file(controller, path):
+    with open(path, "rb") as f:
+        project = yield from import_project(controller, str(uuid.uuid4()), f, keep_compute_id=True)
+    return project
+
+
+@asyncio.coroutine
+def run_size(controller, compute, mock_compute, nodes, listeners, tmpdir):
+    results = {}
+    project = yield from controller.add_project(name="bench{}".format(nodes), project_id=str(uuid.uuid4()))
+
+    created = yield from measure("add_nodes", mock_compute, results, create_topology(project, compute, nodes))
+    yield from measure("create_links", mock_compute, results, create_links(project, created))
+    yield from measure("dump", mock_compute, results, asyncio.coroutine(project.dump)())
+    yield from measure("close", mock_compute, results, project.close())
+    yield from measure("open", mock_compute, results, project.open())
+    yield from measure("notifications", mock_compute, results, notification_fan_out(controller, project, mock_compute, listeners))
+
+    archive = os.path.join(tmpdir, "bench{}.gns3project".format(nodes))
+    yield from measure("export", mock_compute, results, export_to_file(project, archive))
+    imported = yield from measure("import", mock_compute, results, import_from_file(controller, archive))
+
+    for p in (project, imported):
+        yield from p.delete()
+    return results
+
+
+@asyncio.coroutine
+def run(sizes, latency=0.0, file_size=0, listeners=1, in_process=False):
+    """
+    :param sizes: List of number of nodes
+    :param latency: Delay in seconds of each request to the compute
+    :param file_size: Size of the file of each node on the compute
+    :param listeners: Number of clients listening the notifications of the project
+    :param in_process: Run the mock compute in the same process
+    :returns: Dictionary with the results
+    """
+
+    tmpdir = tempfile.mkdtemp()
+    config = Config.instance()
+    config.set("Server", "projects_path", os.path.join(tmpdir, "projects"))
+    config.set("Server", "images_path", os.path.join(tmpdir, "images"))
+    config.set("Server", "symbols_path", os.path.join(tmpdir, "symbols"))
+    config.set("Server", "appliances_path", os.path.join(tmpdir, "appliances"))
+    config.set("Server", "auth", False)
+
+    controller = Controller.instance()
+    controller._config_file = os.path.join(tmpdir, "gns3_controller.conf")
+    controller._settings = {}
+
+    if in_process:
+        mock_compute = InternalCompute(latency, file_size)
+    else:
+        mock_compute = ExternalCompute(latency, file_size)
+    yield from mock_compute.start()
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "latency": latency,
+        "file_size": file_size,
+        "listeners": listeners,
+        "sizes": {}
+    }
+    try:
+        compute = yield from controller.add_compute(compute_id="mock", name="mock", protocol="http", host=mock_compute.host, port=mock_compute.port)
+        for nodes in sizes:
+            print("{} nodes".format(nodes), file=sys.stderr)
+            results["sizes"][str(nodes)] = yield from run_size(controller, compute, mock_compute, nodes, listeners, tmpdir)
+    finally:
+        yield from controller.stop()
+        yield from mock_compute.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the controller with large topologies")
+    parser.add_argument("--nodes", default="100,1000,5000", help="comma separated list of topology sizes")
+    parser.add_argument("--latency", type=float, default=0.0, help="delay in seconds added to each request to the compute")
+    parser.add_argument("--file-size", type=int, default=1024, help="size in bytes of the file of each node on the compute")
+    parser.add_argument("--listeners", type=int, default=1, help="number of clients listening the notifications")
+    parser.add_argument("--in-process", action="store_true", help="run the mock compute in the same process")
+    parser.add_argument("--output", help="write the JSON results to this file instead of the standard output")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.nodes.split(",")]
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(run(sizes, latency=args.latency, file_size=args.file_size, listeners=args.listeners, in_process=args.in_process))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=4, sort_keys=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
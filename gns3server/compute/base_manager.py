@@ -32,6 +32,7 @@ from uuid import UUID, uuid4
 from gns3server.utils.interfaces import is_interface_up
 from ..config import Config
 from ..utils.asyncio import wait_run_in_executor
+from ..utils.asyncio.pool import Pool
 from ..utils import force_unix_path
 from .project_manager import ProjectManager
 from .port_manager import PortManager
@@ -52,6 +53,9 @@ class BaseManager:
 
     _convert_lock = None
 
+    # Number of nodes processed in parallel by a batch request
+    BATCH_CONCURRENCY = 10
+
     def __init__(self):
 
         BaseManager._convert_lock = asyncio.Lock()
@@ -171,6 +175,35 @@ class BaseManager:
 
         return node
 
+    @asyncio.coroutine
+    def batch(self, action, node_ids, project_id):
+        """
+        Run the same action on many nodes in a single request.
+
+        :param action: Name of the node method (start, stop...)
+        :param node_ids: List of node identifiers
+        :param project_id: Project identifier
+
+        :returns: List of results with the node_id, the status and the error message if the action failed
+        """
+
+        nodes = [self.get_node(node_id, project_id=project_id) for node_id in node_ids]
+        pool = Pool(concurrency=self.BATCH_CONCURRENCY)
+        for node in nodes:
+            pool.append(getattr(node, action))
+        result = yield from pool.join(raise_exception=False)
+
+        results = []
+        for node, task in zip(nodes, result.tasks):
+            error = None
+            if isinstance(task.exception, aiohttp.web.HTTPException):
+                error = task.exception.text
+            elif task.exception is not None:
+                error = str(task.exception)
+                log.error("Could not {} node {}: {}".format(action, node.name, error))
+            results.append({"node_id": node.id, "status": node.status, "error": error})
+        return results
+
     @asyncio.coroutine
     def convert_old_project(self, project, legacy_id, name):
         """
@@ -30,13 +30,15 @@ class NotificationManager:
         self._listeners = set()
 
     @contextmanager
-    def queue(self):
+    def queue(self, notification_filter=None):
         """
         Get a queue of notifications
 
         Use it with Python with
+
+        :param notification_filter: NotificationFilter of the listener
         """
-        queue = NotificationQueue()
+        queue = NotificationQueue(notification_filter)
         self._listeners.add(queue)
         yield queue
         self._listeners.remove(queue)
@@ -50,7 +52,7 @@ class NotificationManager:
         :param kwargs: Add this meta to the notification (project_id for example)
         """
         for listener in self._listeners:
-            listener.put_nowait((action, event, kwargs))
+            listener.put_filtered(action, event, **kwargs)
 
     @staticmethod
     def reset():
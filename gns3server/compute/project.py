@@ -29,12 +29,20 @@ from .port_manager import PortManager
 from .notification_manager import NotificationManager
 from ..config import Config
 from ..utils.asyncio import wait_run_in_executor
+from ..utils.file_copy import copy_tree
 from ..utils.path import check_path_allowed, get_default_project_directory
 
 
 import logging
 log = logging.getLogger(__name__)
 
+# Cache of the md5sum of the project files, in the project directory
+FILES_CACHE = ".gns3_files_cache.json"
+# Number of files hashed at the same time
+HASH_PARALLELISM = 4
+# Size of the reads when a file is hashed
+HASH_BUFFER_SIZE = 1024 * 1024
+
 
 class Project:
 
@@ -388,27 +396,117 @@ class Project:
         NotificationManager.instance().emit(action, event, project_id=self.id)
 
     @asyncio.coroutine
-    def list_files(self):
+    def duplicate_files(self, project, node_ids):
+        """
+        Copy the files of this project to another project, the files
+        are cloned by the filesystem when it's possible.
+
+        :param project: Destination project
+        :param node_ids: New node UUID by node UUID, the directories of the nodes are renamed
         """
+
+        tmp_directory = self.tmp_working_directory()
+
+        def ignore(path):
+            return path == tmp_directory or path.endswith(".ghost")
+
+        try:
+            yield from copy_tree(self.path, project.path, ignore=ignore)
+            root = os.path.abspath(os.path.join(project.path, "project-files"))
+            if os.path.exists(root):
+                for module in os.listdir(root):
+                    module_dir = os.path.join(root, module)
+                    for old_id, new_id in node_ids.items():
+                        node_dir = os.path.abspath(os.path.join(module_dir, old_id))
+                        new_node_dir = os.path.abspath(os.path.join(module_dir, new_id))
+                        # Raise error if the ids try to escape from the directory of the module
+                        if os.path.dirname(node_dir) != module_dir or os.path.dirname(new_node_dir) != module_dir:
+                            raise aiohttp.web.HTTPForbidden(text="Invalid node id {} => {}".format(old_id, new_id))
+                        if os.path.isdir(node_dir):
+                            os.rename(node_dir, new_node_dir)
+        except OSError as e:
+            raise aiohttp.web.HTTPConflict(text="Could not duplicate the project files: {}".format(e))
+        log.info("Files of project {id} copied to project {new_id}".format(id=self._id, new_id=project.id))
+
+    @asyncio.coroutine
+    def list_files(self, md5sum=True):
+        """
+        :param md5sum: Compute the md5sum of the files, only the files modified since the last call are hashed
         :returns: Array of files in project without temporary files. The files are dictionary {"path": "test.bin", "md5sum": "aaaaa"}
         """
 
         files = []
         for dirpath, dirnames, filenames in os.walk(self.path):
             for filename in filenames:
-                if not filename.endswith(".ghost"):
+                if not filename.endswith(".ghost") and not filename.startswith(FILES_CACHE):
                     path = os.path.relpath(dirpath, self.path)
                     path = os.path.join(path, filename)
                     path = os.path.normpath(path)
-                    file_info = {"path": path}
-
                     try:
-                        file_info["md5sum"] = yield from wait_run_in_executor(self._hash_file, os.path.join(dirpath, filename))
+                        st = os.stat(os.path.join(dirpath, filename))
                     except OSError:
                         continue
-                    files.append(file_info)
+                    files.append(({"path": path}, st))
+
+        if md5sum:
+            files = yield from self._hash_files(files)
+        return [file_info for file_info, st in files]
+
+    @asyncio.coroutine
+    def _hash_files(self, files):
+        """
+        Set the md5sum of the files. The hashes are cached in the project
+        directory with the size and modification time of the files.
+
+        :param files: List of (file dictionary, os.stat_result)
+        :returns: The files which can be read
+        """
+
+        cache = self._load_files_cache()
+        new_cache = {}
+        misses = []
+        for file_info, st in files:
+            cached = cache.get(file_info["path"])
+            if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+                file_info["md5sum"] = cached["md5sum"]
+                new_cache[file_info["path"]] = cached
+            else:
+                misses.append((file_info, st))
 
-        return files
+        def hash_files(files):
+            for file_info, st in files:
+                try:
+                    file_info["md5sum"] = self._hash_file(os.path.join(self.path, file_info["path"]))
+                except OSError:
+                    continue
+                new_cache[file_info["path"]] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "md5sum": file_info["md5sum"]}
+
+        if misses:
+            yield from asyncio.gather(*[wait_run_in_executor(hash_files, misses[i::HASH_PARALLELISM]) for i in range(HASH_PARALLELISM)])
+        if new_cache != cache:
+            self._save_files_cache(new_cache)
+        return [(file_info, st) for file_info, st in files if "md5sum" in file_info]
+
+    def _load_files_cache(self):
+        """
+        :returns: Dictionary path => {"size", "mtime_ns", "md5sum"}
+        """
+
+        try:
+            with open(os.path.join(self.path, FILES_CACHE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_files_cache(self, cache):
+
+        path = os.path.join(self.path, FILES_CACHE)
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump(cache, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            log.warning("Could not write the cache of the project files {}: {}".format(path, e))
 
     def _hash_file(self, path):
         """
@@ -420,7 +518,7 @@ class Project:
         m = hashlib.md5()
         with open(path, "rb") as f:
             while True:
-                buf = f.read(128)
+                buf = f.read(HASH_BUFFER_SIZE)
                 if not buf:
                     break
                 m.update(buf)
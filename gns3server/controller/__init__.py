@@ -512,6 +512,8 @@ class Controller:
                     raise aiohttp.web.HTTPConflict(text='Project name "{}" already exists'.format(name))
             project = Project(project_id=project_id, controller=self, name=name, **kwargs)
             self._projects[project.id] = project
+            if project.status != "closed":
+                self.update_computes_notification_filter()
             return self._projects[project.id]
         return self._projects[project_id]
 
@@ -538,6 +540,15 @@ class Controller:
     def remove_project(self, project):
         if project.id in self._projects:
             del self._projects[project.id]
+            self.update_computes_notification_filter()
+
+    def update_computes_notification_filter(self):
+        """
+        Computes send us only the notifications of the opened
+        projects. Call it when a project is opened or closed.
+        """
+        for compute in self._computes.values():
+            compute.update_notification_filter()
 
     @asyncio.coroutine
     def load_project(self, path, load=True):
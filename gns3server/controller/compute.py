@@ -28,6 +28,7 @@ from operator import itemgetter
 from ..utils import parse_version
 from ..utils.images import list_images
 from ..utils.asyncio import locked_coroutine
+from ..utils import tracing
 from ..controller.controller_error import ControllerError
 from ..version import __version__
 
@@ -279,6 +280,10 @@ class Compute:
     def memory_usage_percent(self):
         return self._memory_usage_percent
 
+    @property
+    def capabilities(self):
+        return self._capabilities
+
     def __json__(self, topology_dump=False):
         """
         :param topology_dump: Filter to keep only properties require for saving on disk
@@ -444,10 +449,13 @@ class Compute:
         """
         Connect to the notification stream
         """
+        # The stream lives longer than the request connecting the compute
+        tracing.set_current_span(None)
         try:
             self._ws = yield from self._session().ws_connect(self._getUrl("/notifications/ws"), auth=self._auth)
         except (aiohttp.WSServerHandshakeError, aiohttp.ClientResponseError):
             self._ws = None
+        self.update_notification_filter()
         while self._ws is not None:
             try:
                 response = yield from self._ws.receive()
@@ -478,6 +486,16 @@ class Compute:
         self._memory_usage_percent = None
         self._controller.notification.emit("compute.updated", self.__json__())
 
+    def update_notification_filter(self):
+        """
+        Subscribe only to the notifications of the projects
+        opened on the controller
+        """
+        if self._ws is None or self._ws.closed:
+            return
+        project_ids = [project.id for project in self._controller.projects.values() if project.status != "closed"]
+        self._ws.send_str(json.dumps({"project_ids": project_ids}))
+
     def _getUrl(self, path):
         host = self._host
         # IPV6
@@ -519,8 +537,18 @@ class Compute:
                 elif isinstance(data, io.BufferedIOBase):
                     chunked = True
                     headers['content-type'] = 'application/octet-stream'
+                # Data sent by a coroutine (aiohttp.streamer)
+                elif isinstance(data, aiohttp.payload.Payload):
+                    chunked = True
+                    headers['content-type'] = 'application/octet-stream'
                 else:
                     data = json.dumps(data).encode("utf-8")
+
+        # Only the queries made for a request of a client are traced
+        span = tracing.current_span()
+        if span is not None:
+            span = span.child("{} {}".format(method, path))
+            headers.update(span.headers())
         try:
             log.debug("Attempting request to compute: {method} {url} {headers}".format(
                 method=method,
@@ -529,11 +557,22 @@ class Compute:
             ))
             response = yield from self._session().request(method, url, headers=headers, data=data, auth=self._auth, chunked=chunked, timeout=timeout)
         except asyncio.TimeoutError as e:
+            if span is not None:
+                span.finish(compute_id=self._id, error="timeout")
             raise ComputeError("Timeout error when connecting to {}".format(url))
         except (aiohttp.ClientError, aiohttp.ServerDisconnectedError, ValueError, KeyError, socket.gaierror) as e:
+            if span is not None:
+                span.finish(compute_id=self._id, error=str(e))
             #  aiohttp 2.3.1 raises socket.gaierror when cannot find host
             raise ComputeError(str(e))
-        body = yield from response.read()
+        try:
+            body = yield from response.read()
+        except Exception as e:
+            if span is not None:
+                span.finish(compute_id=self._id, error=str(e) or e.__class__.__name__)
+            raise
+        if span is not None:
+            span.finish(compute_id=self._id, status=response.status)
         if body and not raw:
             body = body.decode()
 
@@ -637,11 +676,15 @@ class Compute:
         return images
 
     @asyncio.coroutine
-    def list_files(self, project):
+    def list_files(self, project, md5sum=True):
         """
         List files in the project on computes
+
+        :param md5sum: False if only the paths of the files are needed
         """
         path = "/projects/{}/files".format(project.id)
+        if not md5sum:
+            path += "?md5sum=0"
         res = yield from self.http_query("GET", path, timeout=120)
         return res.json
 
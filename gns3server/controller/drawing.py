@@ -37,6 +37,8 @@ class Drawing:
     text, images, rectangle... They are pure SVG elements.
     """
 
+    __slots__ = ("_project", "_id", "_svg", "_x", "_y", "_z", "_rotation")
+
     def __init__(self, project, drawing_id=None, svg="<svg></svg>", x=0, y=0, z=0, rotation=0):
         self._project = project
         if drawing_id is None:
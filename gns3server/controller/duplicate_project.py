@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import uuid
+import asyncio
+import aiohttp
+
+from .export_project import patch_project_file, filter_files
+from .import_project import _move_node_file
+from ..utils.file_copy import copy_tree
+
+
+"""
+Handle the duplication of a project without creating an archive
+"""
+
+
+@asyncio.coroutine
+def duplicate_project(project, project_id, location=None, name=None):
+    """
+    Duplicate a project by copying its directory. The files are cloned
+    by the filesystem when it's possible and each remote compute copies
+    its own files.
+
+    You need to handle OSerror exceptions
+
+    :param project: Project to duplicate, it should be opened and dumped
+    :param project_id: ID of the new project
+    :param location: Directory for the project if None put in the default directory
+    :param name: Wanted project name, generate one from the project name if None
+    :returns: Project
+    """
+
+    if location and ".gns3" in location:
+        raise aiohttp.web.HTTPConflict(text="The destination path should not contain .gns3")
+
+    # The disks of the running nodes are being written, the copy would be corrupted
+    if project.is_running():
+        raise aiohttp.web.HTTPConflict(text="Running topology could not be duplicated")
+
+    controller = project.controller
+    project_name = controller.get_free_project_name(name or project.name)
+    topology, _ = patch_project_file(project._topology_file(), include_images=False, keep_compute_id=True, allow_all_nodes=True)
+
+    if location:
+        path = location
+    else:
+        path = os.path.join(controller.projects_directory(), project_id)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except UnicodeEncodeError as e:
+        raise aiohttp.web.HTTPConflict(text="The project name contain non supported or invalid characters")
+
+    yield from copy_tree(project.path, path, ignore=lambda f: filter_files(f) or f.endswith(".gns3"))
+
+    topology["name"] = project_name
+    topology["project_id"] = project_id
+    # To avoid unexpected behavior (project start without manual operations just after duplication)
+    topology["auto_start"] = False
+    topology["auto_open"] = False
+    topology["auto_close"] = True
+
+    # Generate a new node id
+    node_old_to_new = {}
+    for node in topology["topology"]["nodes"]:
+        node_old_to_new[node["node_id"]] = str(uuid.uuid4())
+        _move_node_file(path, node["node_id"], node_old_to_new[node["node_id"]])
+        node["node_id"] = node_old_to_new[node["node_id"]]
+
+    # Update link to use new id
+    for link in topology["topology"]["links"]:
+        link["link_id"] = str(uuid.uuid4())
+        for node in link["nodes"]:
+            node["node_id"] = node_old_to_new[node["node_id"]]
+
+    # Generate new drawings id
+    for drawing in topology["topology"]["drawings"]:
+        drawing["drawing_id"] = str(uuid.uuid4())
+
+    # The remote computes copy the files of their nodes
+    compute_ids = set(node["compute_id"] for node in topology["topology"]["nodes"] if node["compute_id"] != "local")
+    for compute_id in sorted(compute_ids):
+        compute = controller.get_compute(compute_id)
+        yield from compute.post("/projects/{}/duplicate".format(project.id), data={
+            "name": project_name,
+            "project_id": project_id,
+            "node_ids": node_old_to_new
+        }, timeout=None)
+
+    dot_gns3_path = os.path.join(path, project_name + ".gns3")
+    with open(dot_gns3_path, "w+") as f:
+        json.dump(topology, f, indent=4)
+
+    project = yield from controller.load_project(dot_gns3_path, load=False)
+    return project
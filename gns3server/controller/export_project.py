@@ -19,27 +19,43 @@ import os
 import json
 import asyncio
 import aiohttp
+import zlib
 import zipfile
-import tempfile
-import zipstream
+import functools
+
+from ..config import Config
+from ..compute.project import FILES_CACHE
+from ..utils.asyncio import aiozipstream
 
 
 import logging
 log = logging.getLogger(__name__)
 
 
+# Disk images, captures and files already compressed, the deflate
+# would use a lot of CPU for a few bytes
+STORED_EXTENSIONS = (".qcow2", ".vmdk", ".vdi", ".vhd", ".vhdx", ".img", ".iso", ".bin", ".image",
+                     ".gz", ".tgz", ".bz2", ".xz", ".zip", ".zst", ".7z", ".gns3project", ".gns3p",
+                     ".pcap", ".pcapng", ".png", ".jpg", ".jpeg", ".gif")
+
+# Files of an unknown type bigger than this size are stored
+STORED_SIZE = 64 * 1024 * 1024
+
+ARCHIVE_FORMATS = ("zip", "zstd")
+
+
 @asyncio.coroutine
-def export_project(project, temporary_dir, include_images=False, keep_compute_id=False, allow_all_nodes=False):
+def export_project(project, include_images=False, keep_compute_id=False, allow_all_nodes=False, archive_format="zip"):
     """
     Export the project as zip. It's a ZipStream object.
-    The file will be read chunk by chunk when you iterate on
-    the zip.
+    The file will be read chunk by chunk with readchunk(), the files
+    of the remote computes are downloaded while the zip is read.
 
     It will ignore some files like snapshots and
 
-    :param temporary_dir: A temporary dir where to store intermediate data
     :param keep_compute_id: If false replace all compute id by local it's the standard behavior for .gns3project to make them portable
     :param allow_all_nodes: Allow all nodes type to be include in the zip even if not portable default False
+    :param archive_format: zip or zstd (zip compressed as a whole with zstd)
     :returns: ZipStream object
     """
 
@@ -50,7 +66,7 @@ def export_project(project, temporary_dir, include_images=False, keep_compute_id
     # Make sure we save the project
     project.dump()
 
-    z = zipstream.ZipFile(allowZip64=True)
+    z = _create_zip(archive_format)
 
     if not os.path.exists(project._path):
         raise aiohttp.web.HTTPNotFound(text="The project doesn't exist at location {}".format(project._path))
@@ -59,12 +75,89 @@ def export_project(project, temporary_dir, include_images=False, keep_compute_id
     for file in os.listdir(project._path):
         if file.endswith(".gns3"):
             images = yield from _export_project_file(project, os.path.join(project._path, file),
-                                          z, include_images, keep_compute_id, allow_all_nodes, temporary_dir)
+                                          z, include_images, keep_compute_id, allow_all_nodes)
+
+    for path, arcname in project_files(project):
+        z.write(path, arcname, compress_type=compress_type(path, os.path.getsize(path)))
+
+    # The files are listed in parallel but added in the same order for each export,
+    # the zip downloads the files of the different computes in parallel
+    for compute, compute_file in (yield from compute_files(project, md5sum=False)):
+        z.write_stream(compute_file["path"],
+                       functools.partial(compute.download_file, project, compute_file["path"]),
+                       compress_type=compress_type(compute_file["path"]),
+                       key=compute.id)
+
+    return z
+
+
+@asyncio.coroutine
+def write_zip(zipstream, f):
+    """
+    Write the zip returned by export_project to a file
+
+    :param zipstream: ZipStream object
+    :param f: File object open for writing
+    """
+
+    try:
+        while True:
+            data = yield from zipstream.readchunk()
+            if not data:
+                break
+            f.write(data)
+    finally:
+        zipstream.cancel()
+
+
+def _create_zip(archive_format):
+    """
+    :param archive_format: zip or zstd
+    :returns: ZipStream object with the compression of the server settings
+    """
+
+    server_config = Config.instance().get_section_config("Server")
+    if archive_format == "zip":
+        return aiozipstream.ZipFile(allowZip64=True, compresslevel=server_config.getint("archive_compression_level", zlib.Z_DEFAULT_COMPRESSION))
+    elif archive_format == "zstd":
+        if not aiozipstream.ZSTD_AVAILABLE:
+            raise aiohttp.web.HTTPConflict(text="The zstd archives require the zstandard Python module")
+        return aiozipstream.ZstdZipFile(allowZip64=True, level=server_config.getint("archive_zstd_level", aiozipstream.ZSTD_LEVEL))
+    raise aiohttp.web.HTTPConflict(text="Unknown archive format {}, supported formats: {}".format(archive_format, ", ".join(ARCHIVE_FORMATS)))
+
+
+def compress_type(path, size=None):
+    """
+    :param path: Path of the file
+    :param size: Size of the file if known
+    :returns: Compression of the file in the archive, the text files are deflated
+    and the disk images, the compressed files and the large files are stored
+    """
+
+    if path.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    if size is not None and size > STORED_SIZE:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def project_files(project):
+    """
+    Files of the project on the controller to include in an archive,
+    without the .gns3 and the snapshots
+
+    :param project: Project
+    :returns: Iterator of (path of the file, path in the archive)
+    """
 
     for root, dirs, files in os.walk(project._path, topdown=True):
-        files = [f for f in files if not _filter_files(os.path.join(root, f))]
+        if root == project._path:
+            dirs[:] = [d for d in dirs if not filter_files(os.path.join(root, d))]
+        files = [f for f in files if not filter_files(os.path.join(root, f))]
 
         for file in files:
+            if file.endswith(".gns3"):
+                continue
             path = os.path.join(root, file)
             # Try open the file
             try:
@@ -74,35 +167,31 @@ def export_project(project, temporary_dir, include_images=False, keep_compute_id
                 log.warn(msg)
                 project.controller.notification.emit("log.warning", {"message": msg})
                 continue
-            if file.endswith(".gns3"):
-                pass
-            else:
-                z.write(path, os.path.relpath(path, project._path), compress_type=zipfile.ZIP_DEFLATED)
-
-    downloaded_files = set()
-
-    for compute in project.computes:
-        if compute.id != "local":
-            compute_files = yield from compute.list_files(project)
-            for compute_file in compute_files:
-                if not _filter_files(compute_file["path"]):
-                    (fd, temp_path) = tempfile.mkstemp(dir=temporary_dir)
-                    f = open(fd, "wb", closefd=True)
-                    response = yield from compute.download_file(project, compute_file["path"])
-                    while True:
-                        data = yield from response.content.read(512)
-                        if not data:
-                            break
-                        f.write(data)
-                    response.close()
-                    f.close()
-                    z.write(temp_path, arcname=compute_file["path"], compress_type=zipfile.ZIP_DEFLATED)
-                    downloaded_files.add(compute_file['path'])
+            yield path, os.path.relpath(path, project._path)
 
-    return z
 
+@asyncio.coroutine
+def compute_files(project, md5sum=True):
+    """
+    Files of the project on the remote computes to include in an archive,
+    sorted by compute and path
+
+    :param project: Project
+    :param md5sum: False if the md5sum of the files is not needed
+    :returns: List of (compute, file dictionary with the path and the md5sum)
+    """
+
+    computes = sorted([c for c in project.computes if c.id != "local"], key=lambda c: c.id)
+    computes_files = yield from asyncio.gather(*[compute.list_files(project, md5sum=md5sum) for compute in computes])
+    files = []
+    for compute, compute_files in zip(computes, computes_files):
+        for compute_file in sorted(compute_files, key=lambda f: f["path"]):
+            if not filter_files(compute_file["path"]):
+                files.append((compute, compute_file))
+    return files
 
-def _filter_files(path):
+
+def filter_files(path):
     """
     :returns: True if file should not be included in the final archive
     """
@@ -120,14 +209,14 @@ def _filter_files(path):
 
     file_name = os.path.basename(path)
     # Ignore log files and OS noises
-    if file_name.endswith('_log.txt') or file_name.endswith('.log') or file_name == '.DS_Store':
+    if file_name.endswith('_log.txt') or file_name.endswith('.log') or file_name == '.DS_Store' or file_name.startswith(FILES_CACHE):
         return True
 
     return False
 
 
 @asyncio.coroutine
-def _export_project_file(project, path, z, include_images, keep_compute_id, allow_all_nodes, temporary_dir):
+def _export_project_file(project, path, z, include_images, keep_compute_id, allow_all_nodes):
     """
     Take a project file (.gns3) and patch it for the export
 
@@ -136,6 +225,33 @@ def _export_project_file(project, path, z, include_images, keep_compute_id, allo
     :param path: Path of the .gns3
     """
 
+    topology, images = patch_project_file(path, include_images, keep_compute_id, allow_all_nodes)
+
+    local_images = set([i['image'] for i in images if i['compute_id'] == 'local'])
+
+    for image in local_images:
+        _export_local_images(project, image, z)
+
+    remote_images = sorted(set([
+        (i['compute_id'], i['image_type'], i['image'])
+        for i in images if i['compute_id'] != 'local']))
+
+    for compute_id, image_type, image in remote_images:
+        _export_remote_images(project, compute_id, image_type, image, z)
+
+    z.writestr("project.gns3", json.dumps(topology).encode(), compress_type=zipfile.ZIP_DEFLATED)
+
+    return images
+
+
+def patch_project_file(path, include_images, keep_compute_id, allow_all_nodes):
+    """
+    Read a project file (.gns3) and patch it for an archive
+
+    :param path: Path of the .gns3
+    :returns: Tuple (topology, images to include in the archive)
+    """
+
     # Image file that we need to include in the exported archive
     images = []
 
@@ -176,21 +292,7 @@ def _export_project_file(project, path, z, include_images, keep_compute_id, allo
         if not keep_compute_id:
             topology["topology"]["computes"] = []  # Strip compute information because could contain secret info like password
 
-    local_images = set([i['image'] for i in images if i['compute_id'] == 'local'])
-
-    for image in local_images:
-        _export_local_images(project, image, z)
-
-    remote_images = set([
-        (i['compute_id'], i['image_type'], i['image'])
-        for i in images if i['compute_id'] != 'local'])
-
-    for compute_id, image_type, image in remote_images:
-        yield from _export_remote_images(project, compute_id, image_type, image, z, temporary_dir)
-
-    z.writestr("project.gns3", json.dumps(topology).encode())
-
-    return images
+    return topology, images
 
 def _export_local_images(project, image, z):
     """
@@ -217,20 +319,20 @@ def _export_local_images(project, image, z):
 
         if os.path.exists(path):
             arcname = os.path.join("images", directory, os.path.basename(image))
-            z.write(path, arcname)
+            z.write(path, arcname, compress_type=compress_type(path, os.path.getsize(path)))
             return
 
 
-@asyncio.coroutine
-def _export_remote_images(project, compute_id, image_type, image, project_zipfile, temporary_dir):
+def _export_remote_images(project, compute_id, image_type, image, project_zipfile):
     """
-    Export specific image from remote compute
+    Export specific image from remote compute, the image is
+    downloaded when the zip reaches it
+
     :param project:
     :param compute_id:
     :param image_type:
     :param image:
     :param project_zipfile:
-    :return:
     """
 
     log.info("Obtaining image `{}` from `{}`".format(image, compute_id))
@@ -241,23 +343,16 @@ def _export_remote_images(project, compute_id, image_type, image, project_zipfil
         raise aiohttp.web.HTTPConflict(
             text="Cannot export image from `{}` compute. Compute doesn't exist.".format(compute_id))
 
-    (fd, temp_path) = tempfile.mkstemp(dir=temporary_dir)
-    f = open(fd, "wb", closefd=True)
-    response = yield from compute.download_image(image_type, image)
+    @asyncio.coroutine
+    def download_image():
+        response = yield from compute.download_image(image_type, image)
+        if response.status != 200:
+            response.close()
+            raise aiohttp.web.HTTPConflict(
+                text="Cannot export image from `{}` compute. Compute sent `{}` status.".format(
+                    compute_id, response.status))
+        return response
 
-    if response.status != 200:
-        raise aiohttp.web.HTTPConflict(
-            text="Cannot export image from `{}` compute. Compute sent `{}` status.".format(
-                compute_id, response.status))
-
-    while True:
-        data = yield from response.content.read(512)
-        if not data:
-            break
-        f.write(data)
-    response.close()
-    f.close()
     arcname = os.path.join("images", image_type, image)
-    log.info("Saved {}".format(arcname))
-    project_zipfile.write(temp_path, arcname=arcname, compress_type=zipfile.ZIP_DEFLATED)
-
+    # The size of a remote image is unknown, the images are large binary files
+    project_zipfile.write_stream(arcname, download_image, compress_type=zipfile.ZIP_STORED, key=compute_id)
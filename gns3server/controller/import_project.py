@@ -23,15 +23,25 @@ import shutil
 import asyncio
 import zipfile
 import aiohttp
+import tempfile
+import functools
 import itertools
 
-from .topology import load_topology
+from .topology import load_topology, GNS3_FILE_FORMAT_REVISION
+from ..utils.asyncio import wait_run_in_executor, aiozipstream
+from ..utils.asyncio.pool import Pool
 
 
 """
 Handle the import of project from a .gns3project
 """
 
+# Number of files sent at the same time to a remote compute
+# or extracted at the same time on the controller
+UPLOAD_PARALLELISM = 4
+# Size of the reads in the files of the archive
+CHUNK_SIZE = 1024 * 1024
+
 
 @asyncio.coroutine
 def import_project(controller, project_id, stream, location=None, name=None, keep_compute_id=False):
@@ -42,7 +52,7 @@ def import_project(controller, project_id, stream, location=None, name=None, kee
 
     :param controller: GNS3 Controller
     :param project_id: ID of the project to import
-    :param stream: A io.BytesIO of the zipfile
+    :param stream: A io.BytesIO of the zipfile (can be compressed with zstd)
     :param location: Directory for the project if None put in the default directory
     :param name: Wanted project name, generate one from the .gns3 if None
     :param keep_compute_id: If true do not touch the compute id
@@ -52,6 +62,15 @@ def import_project(controller, project_id, stream, location=None, name=None, kee
     if location and ".gns3" in location:
         raise aiohttp.web.HTTPConflict(text="The destination path should not contain .gns3")
 
+    if aiozipstream.is_zstd(stream):
+        if not aiozipstream.ZSTD_AVAILABLE:
+            raise aiohttp.web.HTTPConflict(text="Can't import topology the file is compressed with zstd and the zstandard Python module is not installed")
+        with tempfile.TemporaryFile() as archive:
+            yield from wait_run_in_executor(aiozipstream.decompress_zstd, stream, archive)
+            archive.seek(0)
+            project = yield from import_project(controller, project_id, archive, location=location, name=name, keep_compute_id=keep_compute_id)
+        return project
+
     try:
         with zipfile.ZipFile(stream) as myzip:
 
@@ -79,7 +98,16 @@ def import_project(controller, project_id, stream, location=None, name=None, kee
                 os.makedirs(path, exist_ok=True)
             except UnicodeEncodeError as e:
                 raise aiohttp.web.HTTPConflict(text="The project name contain non supported or invalid characters")
-            myzip.extractall(path)
+
+            # The conversion of a topology from an old version moves the files
+            # of the project, they are extracted before loading the topology.
+            # Otherwise the files are extracted to their compute once the
+            # topology is loaded
+            stream_files = topology.get("revision", 0) >= GNS3_FILE_FORMAT_REVISION
+            if stream_files:
+                yield from wait_run_in_executor(myzip.extract, "project.gns3", path)
+            else:
+                yield from wait_run_in_executor(myzip.extractall, path)
 
             topology = load_topology(os.path.join(path, "project.gns3"))
             topology["name"] = project_name
@@ -90,10 +118,13 @@ def import_project(controller, project_id, stream, location=None, name=None, kee
 
             # Generate a new node id
             node_old_to_new = {}
+            nodes_by_old_id = {}
             for node in topology["topology"]["nodes"]:
                 if "node_id" in node:
                     node_old_to_new[node["node_id"]] = str(uuid.uuid4())
-                    _move_node_file(path, node["node_id"], node_old_to_new[node["node_id"]])
+                    nodes_by_old_id[node["node_id"]] = node
+                    if not stream_files:
+                        _move_node_file(path, node["node_id"], node_old_to_new[node["node_id"]])
                     node["node_id"] = node_old_to_new[node["node_id"]]
                 else:
                     node["node_id"] = str(uuid.uuid4())
@@ -122,20 +153,21 @@ def import_project(controller, project_id, stream, location=None, name=None, kee
                     for node in topology["topology"]["nodes"]:
                         node["compute_id"] = next(compute_nodes)
 
-            compute_created = set()
+            # Project created on the remote computes
+            computes = {}
             for node in topology["topology"]["nodes"]:
-
-                if node["compute_id"] != "local":
-                    # Project created on the remote GNS3 VM?
-                    if node["compute_id"] not in compute_created:
-                        compute = controller.get_compute(node["compute_id"])
-                        yield from compute.post("/projects", data={
-                            "name": project_name,
-                            "project_id": project_id,
-                        })
-                        compute_created.add(node["compute_id"])
-
-                    yield from _move_files_to_compute(compute, project_id, path, os.path.join("project-files", node["node_type"], node["node_id"]))
+                if node["compute_id"] != "local" and node["compute_id"] not in computes:
+                    compute = controller.get_compute(node["compute_id"])
+                    yield from compute.post("/projects", data={
+                        "name": project_name,
+                        "project_id": project_id,
+                    })
+                    computes[node["compute_id"]] = compute
+
+            if stream_files:
+                yield from _extract_files(myzip, path, project_id, computes, nodes_by_old_id)
+            else:
+                yield from _move_nodes_files_to_computes(computes, project_id, path, topology["topology"]["nodes"])
 
             # And we dump the updated.gns3
             dot_gns3_path = os.path.join(path, project_name + ".gns3")
@@ -154,6 +186,121 @@ def import_project(controller, project_id, stream, location=None, name=None, kee
         raise aiohttp.web.HTTPConflict(text="Can't import topology the file is corrupted or not a GNS3 project (invalid zip)")
 
 
+def _member_destination(filename, nodes_by_old_id):
+    """
+    :param filename: Path of the file in the archive
+    :param nodes_by_old_id: Nodes of the topology by their id in the archive
+    :returns: Path of the file in the project and node owning the file or None
+    """
+
+    parts = filename.split("/")
+    if len(parts) > 3 and parts[0] == "project-files" and parts[2] in nodes_by_old_id:
+        node = nodes_by_old_id[parts[2]]
+        parts[2] = node["node_id"]
+        return "/".join(parts), node
+    return filename, None
+
+
+@asyncio.coroutine
+def _extract_files(myzip, path, project_id, computes, nodes_by_old_id):
+    """
+    Extract the files of the archive to their destination: the files of
+    the nodes of a remote compute are sent to the compute, the
+    other files are extracted on the controller.
+
+    :param myzip: Archive of the project
+    :param path: Path of the project on the controller
+    :param project_id: ID of the project
+    :param computes: Remote computes by id
+    :param nodes_by_old_id: Nodes of the topology by their id in the archive
+    """
+
+    # The first error cancels the other transfers, they are all
+    # finished before the archive is closed
+    pool = Pool(concurrency=UPLOAD_PARALLELISM * (len(computes) + 1), key_concurrency=UPLOAD_PARALLELISM, fail_fast=True)
+    for member in myzip.infolist():
+        if member.filename == "project.gns3":
+            continue
+        destination, node = _member_destination(member.filename, nodes_by_old_id)
+        if node is not None and node["compute_id"] in computes:
+            if not member.filename.endswith("/"):
+                pool.append(_upload_member, computes[node["compute_id"]], project_id, myzip, member, destination, key=node["compute_id"])
+        else:
+            pool.append(_read_archive, _extract_member, myzip, member, path, destination, key="local")
+    yield from pool.join()
+
+
+@asyncio.coroutine
+def _read_archive(func, *args):
+    """
+    Run in a thread a function reading the archive. When the
+    coroutine is cancelled it waits for the end of the thread,
+    the archive can't be closed while it's read.
+
+    :param func: Function run in a thread
+    :param args: Parameters of the function
+    :returns: Return the result of the function
+    """
+
+    future = asyncio.get_event_loop().run_in_executor(None, functools.partial(func, *args))
+    try:
+        return (yield from asyncio.shield(future))
+    except asyncio.CancelledError:
+        yield from asyncio.wait([future])
+        raise
+
+
+def _extract_member(myzip, member, path, destination):
+    """
+    Extract a file of the archive, it's run in a thread
+
+    :param myzip: Archive of the project
+    :param member: ZipInfo of the file
+    :param path: Path of the project
+    :param destination: Path of the file in the project
+    """
+
+    member.filename = destination
+    # The directories are created before because the zipfile
+    # module doesn't support concurrent creation
+    directory = os.path.dirname(destination)
+    if directory:
+        os.makedirs(os.path.join(path, directory), exist_ok=True)
+    myzip.extract(member, path)
+
+
+@aiohttp.streamer
+def _member_sender(writer, myzip, member):
+    """
+    Send the content of a file of the archive, the file is
+    decompressed in a thread
+
+    :param myzip: Archive of the project
+    :param member: ZipInfo of the file
+    """
+
+    with myzip.open(member) as f:
+        while True:
+            chunk = yield from _read_archive(f.read, CHUNK_SIZE)
+            if not chunk:
+                break
+            yield from writer.write(chunk)
+
+
+@asyncio.coroutine
+def _upload_member(compute, project_id, myzip, member, path):
+    """
+    Upload a file of the archive to a remote project
+
+    :param myzip: Archive of the project
+    :param member: ZipInfo of the file
+    :param path: File path on the remote system relative to project directory
+    """
+
+    path = "/projects/{}/files/{}".format(project_id, path)
+    yield from compute.http_query("POST", path, aiohttp.payload.get_payload(_member_sender(myzip, member)), timeout=None)
+
+
 def _move_node_file(path, old_id, new_id):
     """
     Move the files from a node when changing his id
@@ -172,6 +319,27 @@ def _move_node_file(path, old_id, new_id):
                     shutil.move(node_dir, os.path.join(module_dir, new_id))
 
 
+@asyncio.coroutine
+def _move_nodes_files_to_computes(computes, project_id, directory, nodes):
+    """
+    Move the files of the nodes to their remote compute, the computes
+    receive their files in parallel
+
+    :param computes: Remote computes by id
+    :param project_id: ID of the project
+    :param directory: Path of the project on the controller
+    :param nodes: Nodes of the topology
+    """
+
+    # The nodes of a compute are sent one by one, the first error cancels the other computes
+    pool = Pool(concurrency=len(computes), key_concurrency=1, fail_fast=True)
+    for node in nodes:
+        if node["compute_id"] in computes:
+            pool.append(_move_files_to_compute, computes[node["compute_id"]], project_id, directory,
+                        os.path.join("project-files", node["node_type"], node["node_id"]), key=node["compute_id"])
+    yield from pool.join()
+
+
 @asyncio.coroutine
 def _move_files_to_compute(compute, project_id, directory, files_path):
     """
@@ -179,11 +347,13 @@ def _move_files_to_compute(compute, project_id, directory, files_path):
     """
     location = os.path.join(directory, files_path)
     if os.path.exists(location):
+        pool = Pool(concurrency=UPLOAD_PARALLELISM, fail_fast=True)
         for (dirpath, dirnames, filenames) in os.walk(location):
             for filename in filenames:
                 path = os.path.join(dirpath, filename)
                 dst = os.path.relpath(path, directory)
-                yield from _upload_file(compute, project_id, path, dst)
+                pool.append(_upload_file, compute, project_id, path, dst)
+        yield from pool.join()
         shutil.rmtree(os.path.join(directory, files_path))
 
 
@@ -109,6 +109,9 @@ class Link:
     Base class for links.
     """
 
+    __slots__ = ("_id", "_nodes", "_project", "_capturing", "_capture_file_name", "_streaming_pcap",
+                 "_created", "_link_type", "_suspend", "_filters")
+
     def __init__(self, project, link_id=None):
 
         if link_id:
@@ -228,6 +231,7 @@ class Link:
             "port": port,
             "label": label
         })
+        self._project.add_link_endpoint(self, node, adapter_number, port_number)
 
         if len(self._nodes) == 2:
             yield from self.create()
@@ -363,6 +367,13 @@ class Link:
     def nodes(self):
         return [node['node'] for node in self._nodes]
 
+    @property
+    def endpoints(self):
+        """
+        :returns: List of (node, adapter_number, port_number) attached to the link
+        """
+        return [(n["node"], n["adapter_number"], n["port_number"]) for n in self._nodes]
+
     @property
     def capturing(self):
         return self._capturing
@@ -18,12 +18,15 @@
 import aiohttp
 import asyncio
 import html
+import re
 import copy
 import uuid
 import os
+import sys
 
 
 from .compute import ComputeConflict, ComputeError
+from .readiness import create_probe
 from .ports.port_factory import PortFactory, StandardPortFactory, DynamipsPortFactory
 from ..utils.images import images_directories
 from ..utils.qt import qt_font_to_style
@@ -33,11 +36,41 @@ import logging
 log = logging.getLogger(__name__)
 
 
+def _intern(value):
+    """
+    Nodes created from the same appliance have the same images, paths
+    and options, the strings are shared instead of stored by each node.
+    """
+
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
 class Node:
     # This properties are used only on controller and are not forwarded to the compute
     CONTROLLER_ONLY_PROPERTIES = ["x", "y", "z", "width", "height", "symbol", "label", "console_host",
                                   "port_name_format", "first_port_name", "port_segment_size", "ports",
-                                  "category"]
+                                  "category", "start_priority", "readiness_probe"]
+
+    # This properties are computed by the controller, the values sent by the clients are ignored
+    READ_ONLY_PROPERTIES = ("readiness",)
+
+    # Properties used to generate the list of ports
+    PORTS_PROPERTIES = ("adapters", "ethernet_adapters", "serial_adapters", "ports_mapping", "mappings")
+
+    # The computes can start or stop many nodes of these types with a single request
+    BATCH_NODE_TYPES = ("vpcs", "docker")
+    BATCH_ACTIONS = ("start", "stop")
+
+    # A large project has thousands of nodes, the attributes are stored
+    # in slots instead of a dictionary by node
+    __slots__ = ("_id", "_project", "_compute", "_node_type", "_label", "_links", "_name",
+                 "_console", "_console_type", "_properties", "_command_line", "_node_directory",
+                 "_status", "_x", "_y", "_z", "_width", "_height", "_ports", "_ports_key",
+                 "_port_index", "_symbol", "_port_name_format", "_port_by_adapter",
+                 "_port_segment_size", "_first_port_name", "_start_priority",
+                 "_readiness_probe", "_readiness", "_readiness_task")
 
     def __init__(self, project, compute, name, node_id=None, node_type=None, **kwargs):
         """
@@ -74,6 +107,9 @@ class Node:
         self._y = 0
         self._z = 0
         self._ports = None
+        self._ports_key = None
+        # Ports by (adapter_number, port_number) for the current list of ports
+        self._port_index = (None, {})
         self._symbol = None
         if node_type == "iou":
             self._port_name_format = "Ethernet{segment0}/{port0}"
@@ -84,9 +120,13 @@ class Node:
             self._port_by_adapter = 1
             self._port_segment_size = 0
         self._first_port_name = None
+        self._start_priority = 0
+        self._readiness_probe = None
+        self._readiness = None
+        self._readiness_task = None
 
         # This properties will be recompute
-        ignore_properties = ("width", "height", "hover_symbol")
+        ignore_properties = ("width", "height", "hover_symbol") + self.READ_ONLY_PROPERTIES
         self.properties = kwargs.pop('properties', {})
 
         # Update node properties with additional elements
@@ -169,7 +209,7 @@ class Node:
 
     @properties.setter
     def properties(self, val):
-        self._properties = val
+        self._properties = {sys.intern(key): _intern(value) for key, value in val.items()}
 
     def _base_config_file_content(self, path):
         if not os.path.isabs(path):
@@ -306,6 +346,34 @@ class Node:
     def first_port_name(self, val):
         self._first_port_name = val
 
+    @property
+    def start_priority(self):
+        return self._start_priority
+
+    @start_priority.setter
+    def start_priority(self, val):
+        self._start_priority = val
+
+    @property
+    def readiness_probe(self):
+        return self._readiness_probe
+
+    @readiness_probe.setter
+    def readiness_probe(self, val):
+        if val and "pattern" in val:
+            try:
+                re.compile(val["pattern"])
+            except re.error as e:
+                raise aiohttp.web.HTTPConflict(text="Invalid readiness probe pattern: {}".format(e))
+        self._readiness_probe = val
+
+    @property
+    def readiness(self):
+        """
+        :returns: None if not probed, pending during the boot, ready or failed
+        """
+        return self._readiness
+
     def add_link(self, link):
         """
         A link is connected to the node
@@ -360,12 +428,14 @@ class Node:
         # When updating properties used only on controller we don't need to call the compute
         update_compute = False
 
-        old_json = self.__json__()
-
         compute_properties = None
+        changed = set()
         # Update node properties with additional elements
         for prop in kwargs:
+            if prop in self.READ_ONLY_PROPERTIES:
+                continue
             if getattr(self, prop) != kwargs[prop]:
+                changed.add(prop)
                 if prop not in self.CONTROLLER_ONLY_PROPERTIES:
                     update_compute = True
 
@@ -375,45 +445,55 @@ class Node:
                 else:
                     setattr(self, prop, kwargs[prop])
 
+        # Nothing to notify or to save
+        if not changed:
+            return
+
         self._list_ports()
-        # We send notif only if object has changed
-        if old_json != self.__json__():
-            self.project.controller.notification.emit("node.updated", self.__json__())
         if update_compute:
             data = self._node_data(properties=compute_properties)
             response = yield from self.put(None, data=data)
             yield from self.parse_node_response(response.json)
+        # The node is notified once with the answer of the compute, the node
+        # sent back on the notification stream of the compute changes nothing
+        self.project.controller.notification.emit("node.updated", self.__json__())
         self.project.dump()
 
     @asyncio.coroutine
     def parse_node_response(self, response):
         """
         Update the object with the remote node object
+
+        :returns: Set of the fields changed by the response
         """
+
+        changed = set()
         for key, value in response.items():
-            if key == "console":
-                self._console = value
-            elif key == "node_directory":
-                self._node_directory = value
-            elif key == "command_line":
-                self._command_line = value
-            elif key == "status":
-                self._status = value
-            elif key == "console_type":
-                self._console_type = value
+            if key in ("console", "node_directory", "command_line", "status", "console_type"):
+                if key == "status" and value == "stopped":
+                    self._cancel_readiness_probe()
+                if getattr(self, "_" + key) != value:
+                    setattr(self, "_" + key, _intern(value))
+                    changed.add(key)
             elif key == "name":
-                self.name = value
+                if self._name != value:
+                    self.name = value
+                    changed.add(key)
             elif key in ["node_id", "project_id", "console_host",
                          "startup_config_content",
                          "private_config_content",
                          "startup_script"]:
                 if key in self._properties:
                     del self._properties[key]
-            else:
-                self._properties[key] = value
+                    changed.add("properties")
+            elif key not in self._properties or self._properties[key] != value:
+                self._properties[sys.intern(key)] = _intern(value)
+                changed.add("properties")
         self._list_ports()
-        for link in self._links:
-            yield from link.node_updated(self)
+        if changed:
+            for link in self._links:
+                yield from link.node_updated(self)
+        return changed
 
     def _node_data(self, properties=None):
         """
@@ -451,6 +531,7 @@ class Node:
 
     @asyncio.coroutine
     def destroy(self):
+        self._cancel_readiness_probe()
         yield from self.delete()
 
     @asyncio.coroutine
@@ -470,12 +551,53 @@ class Node:
                 yield from self.post("/start", timeout=240)
         except asyncio.TimeoutError:
             raise aiohttp.web.HTTPRequestTimeout(text="Timeout when starting {}".format(self._name))
+        self._start_readiness_probe()
+
+    def _start_readiness_probe(self):
+        """
+        Check in background if the node has finished to boot
+        """
+
+        self._cancel_readiness_probe()
+        if self._readiness_probe is None:
+            return
+        self._readiness = "pending"
+        self._readiness_task = asyncio.async(self._run_readiness_probe())
+        self.project.controller.notification.emit("node.updated", self.__json__())
+
+    @asyncio.coroutine
+    def _run_readiness_probe(self):
+        if (yield from create_probe(self, self._readiness_probe).wait()):
+            self._readiness = "ready"
+        else:
+            self._readiness = "failed"
+        self._readiness_task = None
+        self.project.controller.notification.emit("node.updated", self.__json__())
+
+    def _cancel_readiness_probe(self):
+        if self._readiness_task is not None:
+            self._readiness_task.cancel()
+            self._readiness_task = None
+        self._readiness = None
+
+    @asyncio.coroutine
+    def wait_ready(self):
+        """
+        Wait for the end of the readiness probe started with the node
+
+        :returns: True if the node is ready or has no probe
+        """
+
+        if self._readiness_task is not None:
+            yield from asyncio.wait([self._readiness_task])
+        return self._readiness in (None, "ready")
 
     @asyncio.coroutine
     def stop(self):
         """
         Stop a node
         """
+        self._cancel_readiness_probe()
         try:
             yield from self.post("/stop", timeout=240, dont_connect=True)
         # We don't care if a node is down at this step
@@ -484,6 +606,44 @@ class Node:
         except asyncio.TimeoutError:
             raise aiohttp.web.HTTPRequestTimeout(text="Timeout when stopping {}".format(self._name))
 
+    @staticmethod
+    @asyncio.coroutine
+    def batch(action, nodes):
+        """
+        Start or stop many nodes of the same type and compute with a single request
+
+        :param action: start or stop
+        :param nodes: List of nodes
+        :returns: Dictionary with the error message of each node identifier (None on success)
+        """
+
+        first = nodes[0]
+        try:
+            response = yield from first.compute.post("/projects/{}/{}/nodes/{}".format(first.project.id, first.node_type, action),
+                                                     data={"node_ids": [node.id for node in nodes]},
+                                                     timeout=240)
+        except asyncio.TimeoutError:
+            raise aiohttp.web.HTTPRequestTimeout(text="Timeout when trying to {} {} nodes".format(action, len(nodes)))
+
+        if not isinstance(response.json, list) or not all(isinstance(result, dict) for result in response.json):
+            raise aiohttp.web.HTTPConflict(text="Invalid answer from compute {} to {} {} nodes".format(first.compute.id, action, len(nodes)))
+
+        nodes_by_id = {node.id: node for node in nodes}
+        errors = {}
+        for result in response.json:
+            node = nodes_by_id.get(result.get("node_id"))
+            # The compute answered for a node not in the batch
+            if node is None:
+                log.warning("Unexpected node {} in the answer from compute {}".format(result.get("node_id"), first.compute.id))
+                continue
+            if result.get("error") is None:
+                if action == "start":
+                    node._start_readiness_probe()
+                else:
+                    node._cancel_readiness_probe()
+            errors[node.id] = result.get("error")
+        return errors
+
     @asyncio.coroutine
     def suspend(self):
         """
@@ -576,12 +736,44 @@ class Node:
         Return the port for this adapter_number and port_number
         or raise an HTTPNotFound
         """
-        for port in self.ports:
-            if port.adapter_number == adapter_number and port.port_number == port_number:
-                return port
+        ports = self.ports
+        if self._port_index[0] is not ports:
+            self._port_index = (ports, {(port.adapter_number, port.port_number): port for port in ports})
+        try:
+            return self._port_index[1][(adapter_number, port_number)]
+        except KeyError:
+            pass
         raise aiohttp.web.HTTPNotFound(text="Port {}/{} for {} not found".format(adapter_number, port_number, self.name))
 
+    def _get_ports_key(self):
+        """
+        :returns: Everything used to generate the list of ports
+        """
+
+        properties = [(name, self._properties.get(name)) for name in self.PORTS_PROPERTIES]
+        if self._node_type == "dynamips":
+            properties.extend((name, value) for name, value in sorted(self._properties.items()) if name.startswith("slot") or name.startswith("wic"))
+        return (self._node_type, properties, self._port_by_adapter, self._first_port_name, self._port_name_format, self._port_segment_size)
+
     def _list_ports(self):
+        """
+        Generate the list of port display in the client, the ports
+        are generated again only if a property used by the ports changed.
+        """
+
+        key = self._get_ports_key()
+        if self._ports is not None and key == self._ports_key:
+            return
+        old_ports = self._ports or []
+        self._generate_ports()
+        self._ports_key = copy.deepcopy(key)
+
+        # The ports still present stay connected to their link
+        links = {(port.adapter_number, port.port_number): port.link for port in old_ports if port.link is not None}
+        for port in self._ports:
+            port.link = links.get((port.adapter_number, port.port_number))
+
+    def _generate_ports(self):
         """
         Generate the list of port display in the client
         if the compute has sent a list we return it (use by
@@ -662,7 +854,9 @@ class Node:
                 "symbol": self._symbol,
                 "port_name_format": self._port_name_format,
                 "port_segment_size": self._port_segment_size,
-                "first_port_name": self._first_port_name
+                "first_port_name": self._first_port_name,
+                "start_priority": self._start_priority,
+                "readiness_probe": self._readiness_probe
             }
         return {
             "compute_id": str(self._compute.id),
@@ -687,5 +881,8 @@ class Node:
             "port_name_format": self._port_name_format,
             "port_segment_size": self._port_segment_size,
             "first_port_name": self._first_port_name,
+            "start_priority": self._start_priority,
+            "readiness_probe": self._readiness_probe,
+            "readiness": self._readiness,
             "ports": [port.__json__() for port in self.ports]
         }
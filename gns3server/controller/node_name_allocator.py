@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import heapq
+import aiohttp
+
+
+MAX_NUMBER = 1000000
+
+
+class _Sequence:
+    """
+    Numbers used by one name template.
+
+    All the numbers lower than next_number were used when the sequence
+    reached them, the numbers released since are in the free heap.
+    """
+
+    def __init__(self, format_name):
+        self.format_name = format_name
+        self.next_number = 1
+        self.free = []
+
+
+class NodeNameAllocator:
+    """
+    Allocate unique node names in a project. The first free number is
+    used for a template like R{0} or for a name already used like PC1.
+
+    Each template keeps a counter and a heap of the numbers released,
+    so allocating a name doesn't test all the numbers already used.
+    """
+
+    def __init__(self):
+        self._names = set()
+        self._sequences = {}
+        # Numbers of the sequences producing a name, to give back
+        # the number to the sequences when the name is released
+        self._numbers_by_name = {}
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def remove(self, name):
+        """
+        Release a name
+
+        :param name: Node name
+        """
+
+        if name not in self._names:
+            return
+        self._names.remove(name)
+        for sequence, number in self._numbers_by_name.pop(name, []):
+            heapq.heappush(sequence.free, number)
+
+    def allocate(self, base_name):
+        """
+        Allocate a name, if the name is used or is a template
+        a number is added to the name.
+
+        :param base_name: Node name or template ({0} or {id} is replaced by a number)
+        :returns: Allocated name
+        """
+
+        if base_name is None:
+            return None
+        base_name = re.sub(r"[ ]", "", base_name)
+        if base_name in self._names:
+            base_name = re.sub(r"[0-9]+$", "{0}", base_name)
+
+        if '{0}' in base_name or '{id}' in base_name:
+            # base name is a template, replace {0} or {id} by an unique identifier
+            sequence = self._sequence(("template", base_name), self._template_format(base_name))
+        else:
+            if base_name not in self._names:
+                self._names.add(base_name)
+                return base_name
+            # base name is not unique, let's find a unique name by appending a number
+            sequence = self._sequence(("suffix", base_name), lambda number: base_name + str(number))
+
+        name = self._next_name(sequence)
+        if name is None:
+            raise aiohttp.web.HTTPConflict(text="A node name could not be allocated (node limit reached?)")
+        self._names.add(name)
+        return name
+
+    def _sequence(self, key, format_name):
+        sequence = self._sequences.get(key)
+        if sequence is None:
+            sequence = _Sequence(format_name)
+            self._sequences[key] = sequence
+        return sequence
+
+    @staticmethod
+    def _template_format(base_name):
+
+        def format_name(number):
+            try:
+                return base_name.format(number, id=number, name="Node")
+            except KeyError as e:
+                raise aiohttp.web.HTTPConflict(text="{" + e.args[0] + "} is not a valid replacement string in the node name")
+            except (ValueError, IndexError) as e:
+                raise aiohttp.web.HTTPConflict(text="{} is not a valid replacement string in the node name".format(base_name))
+        return format_name
+
+    def _next_name(self, sequence):
+        """
+        :returns: Name with the lowest free number of the sequence or None
+        """
+
+        # A released number can have been used again by another template
+        while sequence.free:
+            number = heapq.heappop(sequence.free)
+            name = sequence.format_name(number)
+            if name not in self._names:
+                self._numbers_by_name.setdefault(name, []).append((sequence, number))
+                return name
+            self._numbers_by_name.setdefault(name, []).append((sequence, number))
+
+        while sequence.next_number < MAX_NUMBER:
+            number = sequence.next_number
+            name = sequence.format_name(number)
+            sequence.next_number += 1
+            self._numbers_by_name.setdefault(name, []).append((sequence, number))
+            if name not in self._names:
+                return name
+        return None
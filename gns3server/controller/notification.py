@@ -33,13 +33,16 @@ class Notification:
         self._listeners = {}
 
     @contextmanager
-    def queue(self, project):
+    def queue(self, project, notification_filter=None):
         """
         Get a queue of notifications
 
         Use it with Python with
+
+        :param project: Project object
+        :param notification_filter: NotificationFilter of the listener
         """
-        queue = NotificationQueue()
+        queue = NotificationQueue(notification_filter)
         self._listeners.setdefault(project.id, set())
         self._listeners[project.id].add(queue)
         yield queue
@@ -67,9 +70,11 @@ class Notification:
                 # Update controller node data and send the event node.updated
                 project = self._controller.get_project(event["project_id"])
                 node = project.get_node(event["node_id"])
-                yield from node.parse_node_response(event)
+                changed = yield from node.parse_node_response(event)
 
-                self.emit("node.updated", node.__json__())
+                # Avoid serializing the node if nothing changed or nobody listen for it
+                if changed and self._has_matching_listeners("node.updated", {"node_id": node.id, "project_id": project.id}):
+                    self.emit("node.updated", node.__json__())
             except (aiohttp.web.HTTPNotFound, aiohttp.web.HTTPForbidden):  # Project closing
                 return
         elif action == "ping":
@@ -78,6 +83,17 @@ class Notification:
         else:
             self.emit(action, event)
 
+    def _has_matching_listeners(self, action, event):
+        """
+        :param action: Action name
+        :param event: Minimal event with the project_id and node_id
+        :returns: True if at least one listener accept this event
+        """
+        for listener in self._listeners.get(event["project_id"], []):
+            if listener.filter.match(action, event):
+                return True
+        return False
+
     def emit(self, action, event):
         """
         Send a notification to clients scoped by projects
@@ -117,7 +133,8 @@ class Notification:
         except KeyError:
             return
         for listener in project_listeners:
-            listener.put_nowait((action, event, {}))
+            if listener.filter.match(action, event, project_id=project_id):
+                listener.put_nowait((action, event, {}))
 
     def _send_event_to_all(self, action, event):
         """
@@ -129,4 +146,5 @@ class Notification:
         """
         for project_listeners in self._listeners.values():
             for listener in project_listeners:
-                listener.put_nowait((action, event, {}))
+                if listener.filter.match(action, event):
+                    listener.put_nowait((action, event, {}))
@@ -29,6 +29,8 @@ class EthernetPort(Port):
     Ethernet port.
     """
 
+    __slots__ = ()
+
     @staticmethod
     def long_name_type():
         """
@@ -24,6 +24,8 @@ from .port import Port
 
 class GigabitEthernetPort(Port):
 
+    __slots__ = ()
+
     @staticmethod
     def long_name_type():
         """
@@ -15,17 +15,24 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import sys
+
 
 class Port:
     """
     Base class for port objects.
+
+    The subclasses must define an empty __slots__, a node has many ports.
     """
 
+    __slots__ = ("_interface_number", "_adapter_number", "_port_number", "_name", "_short_name", "_link")
+
     def __init__(self, name, interface_number, adapter_number, port_number, short_name=None):
         self._interface_number = interface_number
         self._adapter_number = adapter_number
         self._port_number = port_number
-        self._name = name
+        # The same names (Ethernet0...) are used by all the nodes
+        self._name = sys.intern(name)
         self._short_name = short_name
         self._link = None
 
@@ -24,6 +24,8 @@ from .serial_port import SerialPort
 
 class POSPort(SerialPort):
 
+    __slots__ = ()
+
     @staticmethod
     def long_name_type():
         """
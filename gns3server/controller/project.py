@@ -15,30 +15,31 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import re
 import os
 import json
 import uuid
 import copy
 import shutil
+import fnmatch
 import asyncio
 import aiohttp
-import tempfile
 
 from uuid import UUID, uuid4
 
 from .node import Node
 from .compute import ComputeError
 from .snapshot import Snapshot
+from .snapshot_store import SnapshotStore, MANIFEST_EXTENSION
 from .drawing import Drawing
 from .topology import project_to_topology, load_topology
 from .udp_link import UDPLink
+from .scheduler import NodeScheduler
+from .node_name_allocator import NodeNameAllocator
 from ..config import Config
 from ..utils.path import check_path_allowed, get_default_project_directory
-from ..utils.asyncio.pool import Pool
 from ..utils.asyncio import locked_coroutine
-from .export_project import export_project
-from .import_project import import_project
+from ..utils.asyncio.pool import Pool
+from .duplicate_project import duplicate_project
 from ..compute.iou.utils.application_id import get_next_application_id
 
 import logging
@@ -138,17 +139,22 @@ class Project:
         """
         Called when open/close a project. Cleanup internal stuff
         """
-        self._allocated_node_names = set()
+        self._allocated_node_names = NodeNameAllocator()
         self._nodes = {}
         self._links = {}
+        # Indexes of the link endpoints, to find the links
+        # of a node without scanning all the links
+        self._links_by_node = {}
+        self._links_by_port = {}
         self._drawings = {}
         self._snapshots = {}
 
         # List the available snapshots
         snapshot_dir = os.path.join(self.path, "snapshots")
+        self._snapshot_store = SnapshotStore(snapshot_dir)
         if os.path.exists(snapshot_dir):
             for snap in os.listdir(snapshot_dir):
-                if snap.endswith(".gns3project"):
+                if snap.endswith(".gns3project") or snap.endswith(MANIFEST_EXTENSION):
                     snapshot = Snapshot(self, filename=snap)
                     self._snapshots[snapshot.id] = snapshot
 
@@ -355,8 +361,7 @@ class Project:
         :param name: allocated node name
         """
 
-        if name in self._allocated_node_names:
-            self._allocated_node_names.remove(name)
+        self._allocated_node_names.remove(name)
 
     def update_allocated_node_name(self, base_name):
         """
@@ -366,35 +371,7 @@ class Project:
         :param base_name: new node base name
         """
 
-        if base_name is None:
-            return None
-        base_name = re.sub(r"[ ]", "", base_name)
-        if base_name in self._allocated_node_names:
-            base_name = re.sub(r"[0-9]+$", "{0}", base_name)
-
-        if '{0}' in base_name or '{id}' in base_name:
-            # base name is a template, replace {0} or {id} by an unique identifier
-            for number in range(1, 1000000):
-                try:
-                    name = base_name.format(number, id=number, name="Node")
-                except KeyError as e:
-                    raise aiohttp.web.HTTPConflict(text="{" + e.args[0] + "} is not a valid replacement string in the node name")
-                except (ValueError, IndexError) as e:
-                    raise aiohttp.web.HTTPConflict(text="{} is not a valid replacement string in the node name".format(base_name))
-                if name not in self._allocated_node_names:
-                    self._allocated_node_names.add(name)
-                    return name
-        else:
-            if base_name not in self._allocated_node_names:
-                self._allocated_node_names.add(base_name)
-                return base_name
-            # base name is not unique, let's find a unique name by appending a number
-            for number in range(1, 1000000):
-                name = base_name + str(number)
-                if name not in self._allocated_node_names:
-                    self._allocated_node_names.add(name)
-                    return name
-        raise aiohttp.web.HTTPConflict(text="A node name could not be allocated (node limit reached?)")
+        return self._allocated_node_names.allocate(base_name)
 
     def update_node_name(self, node, new_name):
 
@@ -477,9 +454,8 @@ class Project:
         The operation use a lock to avoid cleaning links from
         multiple nodes at the same time.
         """
-        for link in list(self._links.values()):
-            if node in link.nodes:
-                yield from self.delete_link(link.id, force_delete=True)
+        for link in self.get_node_links(node.id):
+            yield from self.delete_link(link.id, force_delete=True)
 
     @open_required
     @asyncio.coroutine
@@ -509,6 +485,30 @@ class Project:
         """
         return self._nodes
 
+    def select_nodes(self, node_ids=None, node_type=None, compute_id=None, name=None):
+        """
+        Return the nodes matching all the criteria, a criterion
+        set to None match all the nodes
+
+        :param node_ids: List of node identifiers
+        :param node_type: Type of node
+        :param compute_id: Compute identifier
+        :param name: Shell style pattern matched against the node name
+        :returns: List of nodes
+        """
+
+        if node_ids is not None:
+            nodes = [self.get_node(node_id) for node_id in node_ids]
+        else:
+            nodes = list(self._nodes.values())
+        if node_type is not None:
+            nodes = [node for node in nodes if node.node_type == node_type]
+        if compute_id is not None:
+            nodes = [node for node in nodes if node.compute.id == compute_id]
+        if name is not None:
+            nodes = [node for node in nodes if fnmatch.fnmatchcase(node.name, name)]
+        return nodes
+
     @property
     def drawings(self):
         """
@@ -568,11 +568,42 @@ class Project:
             self.dump()
         return link
 
+    def add_link_endpoint(self, link, node, adapter_number, port_number):
+        """
+        Index a node port attached to a link, called by the link
+        """
+
+        self._links_by_node.setdefault(node.id, set()).add(link)
+        self._links_by_port[(node.id, adapter_number, port_number)] = link
+
+    def _remove_link_endpoints(self, link):
+        for node, adapter_number, port_number in link.endpoints:
+            links = self._links_by_node.get(node.id)
+            if links is not None:
+                links.discard(link)
+                if not links:
+                    del self._links_by_node[node.id]
+            if self._links_by_port.get((node.id, adapter_number, port_number)) == link:
+                del self._links_by_port[(node.id, adapter_number, port_number)]
+
+    def get_node_links(self, node_id):
+        """
+        :returns: List of the links attached to the node
+        """
+        return list(self._links_by_node.get(node_id, []))
+
+    def get_port_link(self, node_id, adapter_number, port_number):
+        """
+        :returns: The link attached to this port of the node or None
+        """
+        return self._links_by_port.get((node_id, adapter_number, port_number))
+
     @open_required
     @asyncio.coroutine
     def delete_link(self, link_id, force_delete=False):
         link = self.get_link(link_id)
         del self._links[link.id]
+        self._remove_link_endpoints(link)
         try:
             yield from link.delete()
         except Exception:
@@ -605,6 +636,13 @@ class Project:
         """
         return self._snapshots
 
+    @property
+    def snapshot_store(self):
+        """
+        :returns: SnapshotStore with the content of the snapshots
+        """
+        return self._snapshot_store
+
     @open_required
     def get_snapshot(self, snapshot_id):
         """
@@ -632,13 +670,13 @@ class Project:
             if os.path.exists(snapshot.path):
                 raise aiohttp.web_exceptions.HTTPConflict(text="The snapshot {} already exist".format(name))
 
-            os.makedirs(os.path.join(self.path, "snapshots"), exist_ok=True)
+            # To avoid issue with data not saved we disallow the snapshot of a running topology
+            if self.is_running():
+                raise aiohttp.web.HTTPConflict(text="Running topology could not be exported")
+            self.dump()
 
-            with tempfile.TemporaryDirectory() as tmpdir:
-                zipstream = yield from export_project(self, tmpdir, keep_compute_id=True, allow_all_nodes=True)
-                with open(snapshot.path, "wb+") as f:
-                    for data in zipstream:
-                        f.write(data)
+            os.makedirs(os.path.join(self.path, "snapshots"), exist_ok=True)
+            yield from snapshot.create()
         except OSError as e:
             raise aiohttp.web.HTTPInternalServerError(text="Could not create project directory: {}".format(e))
 
@@ -650,7 +688,7 @@ class Project:
     def delete_snapshot(self, snapshot_id):
         snapshot = self.get_snapshot(snapshot_id)
         del self._snapshots[snapshot.id]
-        os.remove(snapshot.path)
+        yield from snapshot.delete()
 
     @asyncio.coroutine
     def close(self, ignore_notification=False):
@@ -663,6 +701,7 @@ class Project:
                 pass
         self._cleanPictures()
         self._status = "closed"
+        self.controller.update_computes_notification_filter()
         if not ignore_notification:
             self.controller.notification.emit("project.closed", self.__json__())
 
@@ -743,6 +782,7 @@ class Project:
         self.reset()
         self._loading = True
         self._status = "opened"
+        self.controller.update_computes_notification_filter()
 
         path = self._topology_file()
         if not os.path.exists(path):
@@ -791,8 +831,7 @@ class Project:
                     yield from link.update_filters(link_data["filters"])
                 for node_link in link_data["nodes"]:
                     node = self.get_node(node_link["node_id"])
-                    port = node.get_port(node_link["adapter_number"], node_link["port_number"])
-                    if port.link is not None:
+                    if self.get_port_link(node.id, node_link["adapter_number"], node_link["port_number"]) is not None:
                         # the node port is already attached to another link
                         continue
                     yield from link.add_node(node, node_link["adapter_number"], node_link["port_number"], label=node_link.get("label"), dump=False)
@@ -818,6 +857,7 @@ class Project:
                 pass
             self._status = "closed"
             self._loading = False
+            self.controller.update_computes_notification_filter()
             if isinstance(e, ComputeError):
                 raise aiohttp.web.HTTPConflict(text=str(e))
             else:
@@ -848,9 +888,9 @@ class Project:
         """
         Duplicate a project
 
-        It's the save as feature of the 1.X. It's implemented on top of the
-        export / import features. It will generate a gns3p and reimport it.
-        It's a little slower but we have only one implementation to maintain.
+        It's the save as feature of the 1.X. The directory of the project is
+        copied, the files are cloned by the filesystem when it's possible,
+        and the remote computes copy the files of their nodes.
 
         :param name: Name of the new project. A new one will be generated in case of conflicts
         :param location: Parent directory of the new project
@@ -862,13 +902,7 @@ class Project:
 
         self.dump()
         try:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                zipstream = yield from export_project(self, tmpdir, keep_compute_id=True, allow_all_nodes=True)
-                with open(os.path.join(tmpdir, "project.gns3p"), "wb+") as f:
-                    for data in zipstream:
-                        f.write(data)
-                with open(os.path.join(tmpdir, "project.gns3p"), "rb") as f:
-                    project = yield from import_project(self._controller, str(uuid.uuid4()), f, location=location, name=name, keep_compute_id=True)
+            project = yield from duplicate_project(self, str(uuid.uuid4()), location=location, name=name)
         except (OSError, UnicodeEncodeError) as e:
             raise aiohttp.web.HTTPConflict(text="Can not duplicate project: {}".format(str(e)))
 
@@ -904,32 +938,80 @@ class Project:
     @asyncio.coroutine
     def start_all(self):
         """
-        Start all nodes
+        Start all nodes, by decreasing start priority. Nodes with a readiness
+        probe must have booted before the next priority level is started.
         """
-        pool = Pool(concurrency=3)
-        for node in self.nodes.values():
-            pool.append(node.start)
-        yield from pool.join()
+        yield from NodeScheduler("start", wait_ready=True).run(self.nodes.values())
 
     @asyncio.coroutine
     def stop_all(self):
         """
-        Stop all nodes
+        Stop all nodes, the nodes with the lowest start priority first
         """
-        pool = Pool(concurrency=3)
-        for node in self.nodes.values():
-            pool.append(node.stop)
-        yield from pool.join()
+        yield from NodeScheduler("stop", reverse=True).run(self.nodes.values())
 
     @asyncio.coroutine
     def suspend_all(self):
         """
-        Suspend all nodes
+        Suspend all nodes, the nodes with the lowest start priority first
+        """
+        yield from NodeScheduler("suspend", reverse=True).run(self.nodes.values())
+
+    # Maximum number of nodes sent in one batch request to a compute
+    BATCH_SIZE = 50
+
+    @asyncio.coroutine
+    def bulk_action(self, action, nodes, callback=None):
         """
-        pool = Pool(concurrency=3)
-        for node in self.nodes.values():
-            pool.append(node.suspend)
-        yield from pool.join()
+        Run an action on many nodes. When the compute supports it the nodes are
+        started or stopped in batches, the other nodes are processed by the scheduler.
+
+        :param action: start, stop, suspend or reload
+        :param nodes: List of nodes
+        :param callback: Called with the node and the error message (None on success) when a node is processed
+        :returns: Number of nodes in error
+        """
+
+        errors = []
+
+        def node_done(node, error):
+            if error is not None:
+                errors.append(node)
+            if callback:
+                callback(node, error)
+
+        batches = {}
+        scheduled = []
+        for node in nodes:
+            if action in Node.BATCH_ACTIONS and node.node_type in Node.BATCH_NODE_TYPES:
+                batches.setdefault((node.compute.id, node.node_type), []).append(node)
+            else:
+                scheduled.append(node)
+
+        @asyncio.coroutine
+        def run_batch(batch):
+            try:
+                results = yield from Node.batch(action, batch)
+            except (ComputeError, aiohttp.ClientError, aiohttp.web.HTTPError) as e:
+                results = {node.id: getattr(e, "text", None) or str(e) for node in batch}
+            for node in batch:
+                node_done(node, results.get(node.id, "No result from the compute"))
+
+        # One batch at a time by compute, the computes are processed in parallel
+        pool = Pool(concurrency=len(self._controller.computes) or 1, key_concurrency=1)
+        for (compute_id, node_type), batch_nodes in batches.items():
+            for i in range(0, len(batch_nodes), self.BATCH_SIZE):
+                pool.append(run_batch, batch_nodes[i:i + self.BATCH_SIZE], key=compute_id)
+
+        def scheduler_done(node, exception):
+            if exception is None:
+                node_done(node, None)
+            else:
+                node_done(node, getattr(exception, "text", None) or str(exception))
+
+        scheduler = NodeScheduler(action, reverse=action != "start", callback=scheduler_done)
+        yield from asyncio.gather(pool.join(), scheduler.run(scheduled, raise_exception=False))
+        return len(errors)
 
     @asyncio.coroutine
     def duplicate_node(self, node, x, y, z):
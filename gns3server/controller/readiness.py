@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Readiness probes detect when a started node has finished to boot.
+"""
+
+import re
+import abc
+import asyncio
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ReadinessProbe(metaclass=abc.ABCMeta):
+    """
+    Base class of the probes
+
+    :param node: Node instance
+    :param settings: Probe settings (from the readiness_probe property of the node)
+    """
+
+    DEFAULT_TIMEOUT = 300
+    DEFAULT_INTERVAL = 1
+
+    def __init__(self, node, settings):
+        self._node = node
+        self._timeout = settings.get("timeout", self.DEFAULT_TIMEOUT)
+        self._interval = settings.get("interval", self.DEFAULT_INTERVAL)
+
+    @asyncio.coroutine
+    def wait(self):
+        """
+        Wait for the node to be ready
+
+        :returns: True if the node is ready, False if the timeout is reached
+        """
+
+        try:
+            yield from asyncio.wait_for(self._check(), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            log.warning("Node {} is not ready after {} seconds".format(self._node.name, self._timeout))
+            return False
+        return True
+
+    @abc.abstractmethod
+    @asyncio.coroutine
+    def _check(self):
+        """
+        Return when the node is ready, the timeout is managed by the caller
+        """
+
+
+class ConsoleProbe(ReadinessProbe):
+    """
+    The node is ready when its console output match a regular expression
+    (for example the login prompt)
+    """
+
+    # Only the end of the output is kept to match a pattern split between two reads
+    BUFFER_SIZE = 4096
+
+    def __init__(self, node, settings):
+        super().__init__(node, settings)
+        self._pattern = re.compile(settings["pattern"])
+
+    @asyncio.coroutine
+    def _check(self):
+        while True:
+            if self._node.console is not None and self._node.console_type == "telnet":
+                try:
+                    reader, writer = yield from asyncio.open_connection(self._node.host, self._node.console)
+                except OSError:
+                    pass
+                else:
+                    try:
+                        if (yield from self._read(reader)):
+                            return
+                    finally:
+                        writer.close()
+            yield from asyncio.sleep(self._interval)
+
+    @asyncio.coroutine
+    def _read(self, reader):
+        """
+        :returns: True if the pattern is found before the end of the connection
+        """
+
+        output = ""
+        while True:
+            try:
+                data = yield from reader.read(1024)
+            except OSError:
+                return False
+            if not data:
+                return False
+            output = (output + data.decode("utf-8", errors="ignore"))[-self.BUFFER_SIZE:]
+            if self._pattern.search(output):
+                return True
+
+
+class TCPProbe(ReadinessProbe):
+    """
+    The node is ready when a TCP port accept connections
+    """
+
+    def __init__(self, node, settings):
+        super().__init__(node, settings)
+        self._host = settings.get("host")
+        self._port = settings["port"]
+
+    @asyncio.coroutine
+    def _check(self):
+        host = self._host or self._node.host
+        while True:
+            try:
+                reader, writer = yield from asyncio.open_connection(host, self._port)
+            except OSError:
+                yield from asyncio.sleep(self._interval)
+            else:
+                writer.close()
+                return
+
+
+PROBES = {
+    "console": ConsoleProbe,
+    "tcp": TCPProbe
+}
+
+
+def create_probe(node, settings):
+    """
+    :param node: Node instance
+    :param settings: Probe settings
+    :returns: ReadinessProbe instance
+    """
+
+    return PROBES[settings["type"]](node, settings)
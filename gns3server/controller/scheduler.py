@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import collections
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Relative cost of an operation on a node, a VM boot is a lot
+# more expensive than starting a VPCS
+NODE_TYPE_COSTS = {
+    "qemu": 4,
+    "vmware": 4,
+    "virtualbox": 4,
+    "dynamips": 3,
+    "docker": 2,
+    "iou": 2,
+    "vpcs": 1
+}
+DEFAULT_NODE_COST = 1
+
+# Number of cost units allowed in parallel for each CPU of a compute
+COST_BY_CPU = 2
+
+# Used when the compute doesn't report its number of CPUs
+DEFAULT_CPUS = 2
+
+# Even a compute under heavy load keep a part of its capacity
+MIN_CAPACITY_RATIO = 0.25
+
+
+def node_cost(node):
+    return NODE_TYPE_COSTS.get(node.node_type, DEFAULT_NODE_COST)
+
+
+def compute_capacity(compute):
+    """
+    Number of cost units a compute can process in parallel. It depends
+    of the CPUs of the compute and is reduced when the last ping report
+    a high CPU or memory usage.
+    """
+
+    cpus = compute.capabilities.get("cpus")
+    if not isinstance(cpus, int) or cpus < 1:
+        cpus = DEFAULT_CPUS
+
+    usage = 0
+    for value in (compute.cpu_usage_percent, compute.memory_usage_percent):
+        if isinstance(value, (int, float)):
+            usage = max(usage, value)
+    ratio = max(MIN_CAPACITY_RATIO, (100 - usage) / 100)
+    return max(1, int(cpus * COST_BY_CPU * ratio))
+
+
+class NodeScheduler:
+    """
+    Run an action (start, stop...) on many nodes.
+
+    The nodes are processed by decreasing start_priority, a priority
+    level is finished before the next one begins. Inside a level each compute
+    has its own limit so a busy compute doesn't slow down the others.
+
+    When wait_ready is set a node keeps its part of the compute capacity
+    until the end of its readiness probe, the next priority level is
+    started only when the nodes of the previous level have booted.
+
+    :param action: Name of the node method to call
+    :param reverse: Process the lowest priority first (used to stop)
+    :param wait_ready: Wait for the readiness probe of the nodes
+    :param callback: Called with the node and the exception (None on success) when a node is processed
+    """
+
+    def __init__(self, action, reverse=False, wait_ready=False, callback=None):
+        self._action = action
+        self._reverse = reverse
+        self._wait_ready = wait_ready
+        self._callback = callback
+
+    @asyncio.coroutine
+    def run(self, nodes, raise_exception=True):
+        """
+        Run the action on the nodes, if some actions fail the
+        others are still executed and the first error is raised at the end
+
+        :param raise_exception: Raise the first error, otherwise they are only reported to the callback
+        """
+
+        levels = collections.OrderedDict()
+        for node in sorted(nodes, key=lambda n: n.start_priority, reverse=not self._reverse):
+            levels.setdefault(node.start_priority, []).append(node)
+
+        exceptions = []
+        for priority, level_nodes in levels.items():
+            exceptions.extend((yield from self._run_level(level_nodes)))
+        if exceptions and raise_exception:
+            raise exceptions[0]
+
+    @asyncio.coroutine
+    def _run_level(self, nodes):
+        queues = collections.OrderedDict()
+        computes = {}
+        for node in nodes:
+            queues.setdefault(node.compute.id, collections.deque()).append(node)
+            computes[node.compute.id] = node.compute
+
+        capacities = {compute_id: compute_capacity(compute) for compute_id, compute in computes.items()}
+        used = {compute_id: 0 for compute_id in computes}
+        pending = {}
+        exceptions = []
+
+        while queues or pending:
+            for compute_id in list(queues):
+                queue = queues[compute_id]
+                # A node more expensive than the capacity still run alone
+                while queue and (used[compute_id] == 0 or used[compute_id] + node_cost(queue[0]) <= capacities[compute_id]):
+                    node = queue.popleft()
+                    used[compute_id] += node_cost(node)
+                    task = asyncio.async(self._run_node(node))
+                    pending[task] = node
+                if not queue:
+                    del queues[compute_id]
+
+            done, _ = yield from asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                node = pending.pop(task)
+                used[node.compute.id] -= node_cost(node)
+                if task.exception():
+                    log.error("Could not {} node {}: {}".format(self._action, node.name, task.exception()))
+                    exceptions.append(task.exception())
+                if self._callback:
+                    self._callback(node, task.exception())
+        return exceptions
+
+    @asyncio.coroutine
+    def _run_node(self, node):
+        yield from getattr(node, self._action)()
+        if self._wait_ready and not (yield from node.wait_ready()):
+            log.warning("Node {} is not ready, continue with the next nodes".format(node.name))
@@ -20,11 +20,16 @@ import os
 import uuid
 import shutil
 import asyncio
+import zipfile
+import tempfile
 import aiohttp.web
 from datetime import datetime, timezone
 
 
 from .import_project import import_project
+from .export_project import write_zip
+from .snapshot_store import MANIFEST_EXTENSION
+from ..utils.asyncio import aiozipstream
 
 
 # The string use to extract the date from the filename
@@ -45,7 +50,7 @@ class Snapshot:
         if name:
             self._name = name
             self._created_at = datetime.now().timestamp()
-            filename = self._name + "_" + datetime.utcfromtimestamp(self._created_at).replace(tzinfo=None).strftime(FILENAME_TIME_FORMAT) + ".gns3project"
+            filename = self._name + "_" + datetime.utcfromtimestamp(self._created_at).replace(tzinfo=None).strftime(FILENAME_TIME_FORMAT) + MANIFEST_EXTENSION
         else:
             self._name = filename.split("_")[0]
             datestring = filename.replace(self._name + "_", "").split(".")[0]
@@ -71,26 +76,111 @@ class Snapshot:
     def created_at(self):
         return int(self._created_at)
 
+    @property
+    def in_store(self):
+        """
+        True if the snapshot is a manifest of the snapshot store, False
+        for a snapshot saved as a .gns3project by an older version
+        """
+        return self._path.endswith(MANIFEST_EXTENSION)
+
+    @asyncio.coroutine
+    def create(self):
+        """
+        Save the snapshot in the snapshot store of the project
+        """
+
+        yield from self._project.snapshot_store.create(self._project, self._path)
+
+    @asyncio.coroutine
+    def delete(self):
+        """
+        Delete the snapshot and the chunks only used by this snapshot
+        """
+
+        if self.in_store:
+            yield from self._project.snapshot_store.delete(self._path)
+        else:
+            os.remove(self._path)
+
+    def export(self):
+        """
+        Export the snapshot as a standalone project archive
+
+        :returns: ZipStream object
+        """
+
+        if self.in_store:
+            return self._project.snapshot_store.export(self._path)
+
+        # The files are read from the .gns3project while the archive is read
+        def read_file(name):
+            with zipfile.ZipFile(self._path) as myzip:
+                with myzip.open(name) as f:
+                    while True:
+                        data = f.read(aiozipstream.CHUNK_SIZE)
+                        if not data:
+                            break
+                        yield data
+
+        z = aiozipstream.ZipFile(allowZip64=True)
+        with zipfile.ZipFile(self._path) as myzip:
+            for info in myzip.infolist():
+                z.write_iter(info.filename, read_file(info.filename), compress_type=info.compress_type)
+        return z
+
     @asyncio.coroutine
     def restore(self):
         """
         Restore the snapshot
         """
 
+        controller = self._project.controller
+        if self.in_store and self._project.snapshot_store.can_restore(self._path, controller):
+            return (yield from self._restore_in_place())
+
         yield from self._project.delete_on_computes()
         # We don't send close notif to clients because the close / open dance is purely internal
         yield from self._project.close(ignore_notification=True)
-        self._project.controller.notification.emit("snapshot.restored", self.__json__())
+        controller.notification.emit("snapshot.restored", self.__json__())
         try:
             if os.path.exists(os.path.join(self._project.path, "project-files")):
                 shutil.rmtree(os.path.join(self._project.path, "project-files"))
-            with open(self._path, "rb") as f:
-                project = yield from import_project(self._project.controller, self._project.id, f, location=self._project.path)
+            if self.in_store:
+                with tempfile.TemporaryFile() as f:
+                    yield from write_zip(self.export(), f)
+                    f.seek(0)
+                    project = yield from import_project(controller, self._project.id, f, location=self._project.path)
+            else:
+                with open(self._path, "rb") as f:
+                    project = yield from import_project(controller, self._project.id, f, location=self._project.path)
         except (OSError, PermissionError) as e:
             raise aiohttp.web.HTTPConflict(text=str(e))
         yield from project.open()
         return project
 
+    @asyncio.coroutine
+    def _restore_in_place(self):
+        """
+        Restore the snapshot by writing only the files that changed since
+        the snapshot, the project is kept on the computes with its files
+        """
+
+        # The project is closed before writing the files, otherwise closing it
+        # deletes the pictures of the snapshot unused by the current drawings.
+        # We don't send close notif to clients because the close / open dance is purely internal
+        yield from self._project.close(ignore_notification=True)
+        # The computes forget the project when it's closed, it's created again on them
+        self._project.computes.clear()
+        try:
+            yield from self._project.snapshot_store.restore(self._project, self._path)
+        except (OSError, PermissionError) as e:
+            yield from self._project.open()
+            raise aiohttp.web.HTTPConflict(text=str(e))
+        self._project.controller.notification.emit("snapshot.restored", self.__json__())
+        yield from self._project.open()
+        return self._project
+
     def __json__(self):
         return {
             "snapshot_id": self._id,
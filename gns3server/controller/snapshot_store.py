@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Storage of the snapshots of a project by content.
+
+The files of the project are split in chunks saved once in the
+snapshots/chunks directory under the SHA-256 of their content. A
+snapshot is a manifest (.gns3snapshot) with the list of the chunks of
+each file, the snapshots share the chunks of the files that didn't
+change, for example most of the content of a large qcow2 disk.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import aiohttp
+
+from .export_project import patch_project_file, project_files, compute_files, compress_type, filter_files
+from .import_project import UPLOAD_PARALLELISM
+from ..utils.asyncio import wait_run_in_executor, aiozipstream
+from ..utils.asyncio.pool import Pool
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Size of the chunks, a chunk of a disk is saved again when a byte changes
+CHUNK_SIZE = 4 * 1024 * 1024
+
+MANIFEST_EXTENSION = ".gns3snapshot"
+MANIFEST_VERSION = 1
+
+
+class SnapshotStore:
+    """
+    Chunks and manifests of the snapshots of a project
+
+    :param path: Directory of the snapshots
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._chunks_path = os.path.join(path, "chunks")
+        # The garbage collection must not remove the chunks
+        # of a snapshot before its manifest is written
+        self._lock = asyncio.Lock()
+
+    @property
+    def path(self):
+        return self._path
+
+    def _chunk_path(self, digest):
+        return os.path.join(self._chunks_path, digest[:2], digest)
+
+    def _write_chunk(self, data):
+        """
+        Save a chunk if it doesn't exist
+
+        :param data: Content of the chunk
+        :returns: Digest of the chunk
+        """
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A chunk is never partially written if the server is stopped
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        return digest
+
+    def _write_file(self, path):
+        """
+        Split a file in chunks
+
+        :param path: Path of the file
+        :returns: Tuple (size, list of the digests of the chunks)
+        """
+
+        size = 0
+        chunks = []
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                size += len(data)
+                chunks.append(self._write_chunk(data))
+        return size, chunks
+
+    def _write_bytes(self, data):
+        chunks = [self._write_chunk(data[i:i + CHUNK_SIZE]) for i in range(0, len(data), CHUNK_SIZE)]
+        return len(data), chunks
+
+    @asyncio.coroutine
+    def _write_response(self, response):
+        """
+        Split the content of an HTTP response in chunks
+
+        :returns: Tuple (size, list of the digests of the chunks)
+        """
+
+        size = 0
+        chunks = []
+        buffer = bytearray()
+        try:
+            while True:
+                data = yield from response.content.read(aiozipstream.CHUNK_SIZE)
+                buffer.extend(data)
+                while len(buffer) >= CHUNK_SIZE or (not data and buffer):
+                    chunk = bytes(buffer[:CHUNK_SIZE])
+                    del buffer[:CHUNK_SIZE]
+                    size += len(chunk)
+                    chunks.append((yield from wait_run_in_executor(self._write_chunk, chunk)))
+                if not data:
+                    break
+        finally:
+            response.close()
+        return size, chunks
+
+    def read_chunks(self, chunks):
+        """
+        Content of a file
+
+        :param chunks: List of the digests of the chunks of the file
+        :returns: Iterator on the content of the chunks
+        """
+
+        for digest in chunks:
+            yield self.read_chunk(digest)
+
+    def read_chunk(self, digest):
+        with open(self._chunk_path(digest), "rb") as f:
+            return f.read()
+
+    def manifests(self):
+        """
+        :returns: Paths of the manifests of the snapshots
+        """
+
+        if not os.path.exists(self._path):
+            return []
+        return [os.path.join(self._path, f) for f in os.listdir(self._path) if f.endswith(MANIFEST_EXTENSION)]
+
+    def _read_manifest(self, path):
+        """
+        :param path: Path of the manifest
+        :returns: Manifest without checking its version
+        """
+
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            if not isinstance(manifest.get("files"), list):
+                raise ValueError("no list of files")
+        except (OSError, ValueError, AttributeError) as e:
+            raise aiohttp.web.HTTPConflict(text="Could not read the snapshot {}: {}".format(path, e))
+        return manifest
+
+    def load_manifest(self, path):
+        """
+        :param path: Path of the manifest
+        :returns: Manifest with the list of the files of the snapshot
+        """
+
+        manifest = self._read_manifest(path)
+        if manifest.get("version", 0) > MANIFEST_VERSION:
+            raise aiohttp.web.HTTPConflict(text="The snapshot {} is designed for a more recent version of GNS3".format(path))
+        return manifest
+
+    def _remote_files(self):
+        """
+        Files of the remote computes in the snapshots, they are
+        downloaded again only if their md5 changed
+
+        :returns: Dictionary (compute id, path, md5sum) => file of a manifest
+        """
+
+        files = {}
+        for path in self.manifests():
+            try:
+                manifest = self.load_manifest(path)
+            except aiohttp.web.HTTPConflict:
+                continue
+            for file in manifest["files"]:
+                if file.get("md5sum"):
+                    files[(file["compute_id"], file["path"], file["md5sum"])] = file
+        return files
+
+    @asyncio.coroutine
+    def create(self, project, path):
+        """
+        Snapshot the project, the chunks of the files are saved
+        before the manifest
+
+        :param project: Project
+        :param path: Path of the manifest
+        """
+
+        with (yield from self._lock):
+            try:
+                yield from self._create(project, path)
+            except Exception:
+                # The chunks already written are not used by a snapshot
+                try:
+                    if os.path.exists(path + ".tmp"):
+                        os.remove(path + ".tmp")
+                    yield from wait_run_in_executor(self._collect_garbage)
+                except OSError as e:
+                    log.warning("Could not remove the chunks of the snapshot {}: {}".format(path, e))
+                raise
+
+    @asyncio.coroutine
+    def _create(self, project, path):
+        files = []
+        for file in os.listdir(project.path):
+            if file.endswith(".gns3"):
+                topology, images = patch_project_file(os.path.join(project.path, file), include_images=False, keep_compute_id=True, allow_all_nodes=True)
+                size, chunks = yield from wait_run_in_executor(self._write_bytes, json.dumps(topology).encode())
+                files.append({"path": "project.gns3", "size": size, "chunks": chunks})
+
+        for file_path, arcname in project_files(project):
+            # The modification time is saved to skip the unchanged files during a restore
+            mtime_ns = os.stat(file_path).st_mtime_ns
+            size, chunks = yield from wait_run_in_executor(self._write_file, file_path)
+            files.append({"path": arcname.replace(os.path.sep, "/"), "size": size, "chunks": chunks, "mtime_ns": mtime_ns})
+
+        remote_files = self._remote_files()
+        for compute, compute_file in (yield from compute_files(project)):
+            file = {"path": compute_file["path"].replace(os.path.sep, "/"), "compute_id": compute.id, "md5sum": compute_file.get("md5sum")}
+            previous = remote_files.get((compute.id, file["path"], file["md5sum"]))
+            if previous is not None and all(os.path.exists(self._chunk_path(digest)) for digest in previous["chunks"]):
+                file["size"], file["chunks"] = previous["size"], previous["chunks"]
+            else:
+                response = yield from compute.download_file(project, compute_file["path"])
+                file["size"], file["chunks"] = yield from self._write_response(response)
+            files.append(file)
+
+        manifest = {"version": MANIFEST_VERSION, "chunk_size": CHUNK_SIZE, "files": files}
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def can_restore(self, path, controller):
+        """
+        :param path: Path of the manifest
+        :param controller: Controller
+        :returns: True if the files of the snapshot can be restored in place,
+        the computes of the snapshot must exist
+        """
+
+        manifest = self.load_manifest(path)
+        return all(controller.has_compute(file["compute_id"]) for file in manifest["files"] if "compute_id" in file)
+
+    @asyncio.coroutine
+    def restore(self, project, path):
+        """
+        Restore the files of a snapshot in the project, only the files
+        different from the snapshot are written. The nodes must be stopped.
+
+        :param project: Project
+        :param path: Path of the manifest
+        :returns: Number of bytes written on the controller
+        """
+
+        manifest = self.load_manifest(path)
+        chunk_size = manifest.get("chunk_size", CHUNK_SIZE)
+        local_files = {}
+        remote_files = {}
+        for file in manifest["files"]:
+            if "compute_id" in file:
+                remote_files.setdefault(file["compute_id"], []).append(file)
+            elif file["path"] == "project.gns3":
+                local_files[project._topology_file()] = file
+            else:
+                local_files[os.path.join(project.path, os.path.normpath(file["path"]))] = file
+
+        written = yield from wait_run_in_executor(self._restore_local_files, project, local_files, chunk_size)
+        log.info("%d bytes of the project written to restore the snapshot %s", written, path)
+        yield from asyncio.gather(*[self._restore_compute_files(project, project.controller.get_compute(compute_id), files)
+                                    for compute_id, files in remote_files.items()])
+        return written
+
+    def _restore_local_files(self, project, files, chunk_size):
+        """
+        :param files: Dictionary path of the file => file of the manifest
+        :returns: Number of bytes written
+        """
+
+        written = 0
+        for path, file in files.items():
+            written += self._restore_file(path, file, chunk_size)
+
+        # The files added since the snapshot are removed
+        project_files = os.path.join(project.path, "project-files")
+        for root, dirs, filenames in os.walk(project_files):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                # The temporary files, captures and logs are not in the snapshots
+                if path not in files and not filter_files(path):
+                    os.remove(path)
+        return written
+
+    def _restore_file(self, path, file, chunk_size):
+        """
+        Write the chunks of a file different from the snapshot
+
+        :param path: Path of the file
+        :param file: File of the manifest
+        :param chunk_size: Size of the chunks of the snapshot
+        :returns: Number of bytes written
+        """
+
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            st = None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if st is not None and st.st_size == file["size"] and st.st_mtime_ns == file.get("mtime_ns"):
+            return 0
+
+        written = 0
+        with open(path, "r+b" if st is not None else "w+b") as f:
+            for i, digest in enumerate(file["chunks"]):
+                f.seek(i * chunk_size)
+                if hashlib.sha256(f.read(chunk_size)).hexdigest() != digest:
+                    data = self.read_chunk(digest)
+                    f.seek(i * chunk_size)
+                    f.write(data)
+                    written += len(data)
+            f.truncate(file["size"])
+        if "mtime_ns" in file:
+            os.utime(path, ns=(file["mtime_ns"], file["mtime_ns"]))
+        return written
+
+    @asyncio.coroutine
+    def _restore_compute_files(self, project, compute, files):
+        """
+        Upload to a compute the files different from the snapshot
+
+        :param compute: Compute
+        :param files: Files of the manifest on this compute
+        """
+
+        if compute not in project.computes:
+            yield from compute.post("/projects", data={
+                "name": project.name,
+                "project_id": project.id,
+            })
+            project.computes.add(compute)
+
+        current = {f["path"].replace(os.path.sep, "/"): f.get("md5sum") for f in (yield from compute.list_files(project))}
+        paths = set(file["path"] for file in files)
+        for path in current:
+            if path not in paths and path.startswith("project-files/") and not filter_files(path):
+                yield from compute.delete("/projects/{}/files/{}".format(project.id, path))
+
+        uploads = [file for file in files if current.get(file["path"]) != file["md5sum"]]
+        log.info("%d files uploaded to compute %s to restore a snapshot", len(uploads), compute.id)
+        pool = Pool(concurrency=UPLOAD_PARALLELISM, fail_fast=True)
+        for file in uploads:
+            pool.append(self._upload_file, project, compute, file)
+        yield from pool.join()
+
+    @asyncio.coroutine
+    def _upload_file(self, project, compute, file):
+        path = "/projects/{}/files/{}".format(project.id, file["path"])
+        yield from compute.http_query("POST", path, aiohttp.payload.get_payload(_chunks_sender(self, file["chunks"])), timeout=None)
+
+    @asyncio.coroutine
+    def delete(self, path):
+        """
+        Delete a snapshot and the chunks used only by this snapshot
+
+        :param path: Path of the manifest
+        """
+
+        with (yield from self._lock):
+            os.remove(path)
+            yield from wait_run_in_executor(self._collect_garbage)
+
+    def _collect_garbage(self):
+        """
+        Remove the chunks not used by a snapshot
+
+        :returns: Number of chunks removed
+        """
+
+        used = set()
+        for path in self.manifests():
+            try:
+                manifest = self._read_manifest(path)
+            except aiohttp.web.HTTPConflict as e:
+                log.warning("Snapshot ignored by the garbage collection: {}".format(e.text))
+                continue
+            for file in manifest["files"]:
+                used.update(file.get("chunks", []))
+
+        removed = 0
+        if not os.path.exists(self._chunks_path):
+            return removed
+        for directory in os.listdir(self._chunks_path):
+            directory = os.path.join(self._chunks_path, directory)
+            for chunk in os.listdir(directory):
+                if chunk not in used:
+                    os.remove(os.path.join(directory, chunk))
+                    removed += 1
+            if not os.listdir(directory):
+                os.rmdir(directory)
+        log.info("%d unused chunks removed from %s", removed, self._chunks_path)
+        return removed
+
+    def export(self, path):
+        """
+        Export a snapshot as a standalone project archive
+
+        :param path: Path of the manifest
+        :returns: ZipStream object
+        """
+
+        manifest = self.load_manifest(path)
+        z = aiozipstream.ZipFile(allowZip64=True)
+        for file in manifest["files"]:
+            z.write_iter(file["path"], self.read_chunks(file["chunks"]), compress_type=compress_type(file["path"], file["size"]))
+        return z
+
+
+@aiohttp.streamer
+def _chunks_sender(writer, store, chunks):
+    """
+    Send the content of a file of a snapshot, the chunks are read in a thread
+
+    :param store: SnapshotStore
+    :param chunks: List of the digests of the chunks of the file
+    """
+
+    for digest in chunks:
+        data = yield from wait_run_in_executor(store.read_chunk, digest)
+        yield from writer.write(data)
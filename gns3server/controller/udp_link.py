@@ -24,6 +24,8 @@ from .link import Link
 
 class UDPLink(Link):
 
+    __slots__ = ("_capture_node", "_link_data", "_node1_port", "_node2_port")
+
     def __init__(self, project, link_id=None):
         super().__init__(project, link_id=link_id)
         self._capture_node = None
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import sys
+import psutil
 
 from gns3server.web.route import Route
 from gns3server.config import Config
@@ -40,5 +41,7 @@ class CapabilitiesHandler:
         response.json({
             "version": __version__,
             "platform": sys.platform,
+            "cpus": psutil.cpu_count(logical=True),
+            "memory": psutil.virtual_memory().total,
             "node_types": node_types
         })
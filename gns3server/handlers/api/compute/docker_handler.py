@@ -20,7 +20,7 @@ from aiohttp.web import HTTPConflict
 
 from gns3server.web.route import Route
 from gns3server.compute.docker import Docker
-from gns3server.schemas.node import NODE_CAPTURE_SCHEMA
+from gns3server.schemas.node import NODE_CAPTURE_SCHEMA, NODE_BATCH_SCHEMA, NODE_BATCH_RESULT_SCHEMA
 from gns3server.schemas.nio import NIO_SCHEMA
 
 from gns3server.schemas.docker import (
@@ -69,6 +69,44 @@ class DockerHandler:
         response.set_status(201)
         response.json(container)
 
+    @Route.post(
+        r"/projects/{project_id}/docker/nodes/start",
+        parameters={
+            "project_id": "Project UUID"
+        },
+        status_codes={
+            200: "Result of the action on each instance",
+            400: "Invalid request",
+            404: "Instance doesn't exist"
+        },
+        description="Start many Docker containers",
+        input=NODE_BATCH_SCHEMA,
+        output=NODE_BATCH_RESULT_SCHEMA)
+    def start_many(request, response):
+
+        docker_manager = Docker.instance()
+        results = yield from docker_manager.batch("start", request.json["node_ids"], request.match_info["project_id"])
+        response.json(results)
+
+    @Route.post(
+        r"/projects/{project_id}/docker/nodes/stop",
+        parameters={
+            "project_id": "Project UUID"
+        },
+        status_codes={
+            200: "Result of the action on each instance",
+            400: "Invalid request",
+            404: "Instance doesn't exist"
+        },
+        description="Stop many Docker containers",
+        input=NODE_BATCH_SCHEMA,
+        output=NODE_BATCH_RESULT_SCHEMA)
+    def stop_many(request, response):
+
+        docker_manager = Docker.instance()
+        results = yield from docker_manager.batch("stop", request.json["node_ids"], request.match_info["project_id"])
+        response.json(results)
+
     @Route.post(
         r"/projects/{project_id}/docker/nodes/{node_id}/start",
         parameters={
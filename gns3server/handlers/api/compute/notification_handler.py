@@ -15,43 +15,23 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import asyncio
-import aiohttp
 from aiohttp.web import WebSocketResponse
 from gns3server.web.route import Route
 from gns3server.compute.notification_manager import NotificationManager
-
-
-@asyncio.coroutine
-def process_websocket(ws):
-    """
-    Process ping / pong and close message
-    """
-    try:
-        yield from ws.receive()
-    except aiohttp.WSServerHandshakeError:
-        pass
+from gns3server.notification_filter import NotificationFilter
+from gns3server.utils.asyncio.notification_websocket import send_notifications
 
 
 class NotificationHandler:
 
     @Route.get(
         r"/notifications/ws",
-        description="Send notifications using Websockets")
+        description="Send notifications using Websockets. Notifications can be filtered with the actions (wildcards allowed), node_ids and project_ids comma separated query parameters, the filter can be replaced by sending a JSON object with the same keys on the Websocket")
     def notifications(request, response):
         notifications = NotificationManager.instance()
         ws = WebSocketResponse()
         yield from ws.prepare(request)
 
-        asyncio.async(process_websocket(ws))
-
-        with notifications.queue() as queue:
-            while True:
-                try:
-                    notification = yield from queue.get_json(1)
-                except asyncio.futures.CancelledError:
-                    break
-                if ws.closed:
-                    break
-                ws.send_str(notification)
+        with notifications.queue(NotificationFilter.from_query(request.query)) as queue:
+            yield from send_notifications(ws, queue, 1)
         return ws
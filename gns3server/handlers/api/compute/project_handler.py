@@ -25,18 +25,25 @@ import tempfile
 from gns3server.web.route import Route
 from gns3server.compute.project_manager import ProjectManager
 from gns3server.compute import MODULES
+from gns3server.utils.asyncio import wait_run_in_executor
 
 from gns3server.schemas.project import (
     PROJECT_OBJECT_SCHEMA,
     PROJECT_CREATE_SCHEMA,
     PROJECT_UPDATE_SCHEMA,
     PROJECT_FILE_LIST_SCHEMA,
-    PROJECT_LIST_SCHEMA
+    PROJECT_LIST_SCHEMA,
+    PROJECT_DUPLICATE_FILES_SCHEMA
 )
 
 import logging
 log = logging.getLogger()
 
+# Size of the reads of the uploaded files
+CHUNK_SIZE = 64 * 1024
+# Size of an uploaded project kept in memory before writing it to a temporary file
+SPOOL_SIZE = 1024 * 1024
+
 
 class ProjectHandler:
 
@@ -120,6 +127,31 @@ class ProjectHandler:
             log.warning("Skip project closing, another client is listening for project notifications")
         response.set_status(204)
 
+    @Route.post(
+        r"/projects/{project_id}/duplicate",
+        description="Duplicate a project with its files, without transferring them to the controller",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            201: "Project duplicated",
+            404: "The project doesn't exist",
+            409: "The files can't be copied"
+        },
+        output=PROJECT_OBJECT_SCHEMA,
+        input=PROJECT_DUPLICATE_FILES_SCHEMA)
+    def duplicate(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        new_project = pm.create_project(
+            name=request.json.get("name"),
+            project_id=request.json["project_id"]
+        )
+        yield from project.duplicate_files(new_project, request.json.get("node_ids", {}))
+        response.set_status(201)
+        response.json(new_project)
+
     @Route.delete(
         r"/projects/{project_id}",
         description="Delete a project from disk",
@@ -194,7 +226,7 @@ class ProjectHandler:
 
     @Route.get(
         r"/projects/{project_id}/files",
-        description="List files of a project",
+        description="List files of a project, with their md5sum unless md5sum=0 is in the query",
         parameters={
             "project_id": "Project UUID",
         },
@@ -207,7 +239,7 @@ class ProjectHandler:
 
         pm = ProjectManager.instance()
         project = pm.get_project(request.match_info["project_id"])
-        files = yield from project.list_files()
+        files = yield from project.list_files(md5sum=bool(int(request.query.get("md5sum", "1"))))
         response.json(files)
         response.set_status(200)
 
@@ -219,8 +251,10 @@ class ProjectHandler:
         },
         status_codes={
             200: "File returned",
+            206: "Part of the file returned",
             403: "Permission denied",
-            404: "The file doesn't exist"
+            404: "The file doesn't exist",
+            416: "Range not satisfiable"
         })
     def get_file(request, response):
 
@@ -234,23 +268,7 @@ class ProjectHandler:
             raise aiohttp.web.HTTPForbidden()
         path = os.path.join(project.path, path)
 
-        response.content_type = "application/octet-stream"
-        response.set_status(200)
-        response.enable_chunked_encoding()
-
-        try:
-            with open(path, "rb") as f:
-                yield from response.prepare(request)
-                while True:
-                    data = f.read(4096)
-                    if not data:
-                        break
-                    yield from response.write(data)
-
-        except FileNotFoundError:
-            raise aiohttp.web.HTTPNotFound()
-        except PermissionError:
-            raise aiohttp.web.HTTPForbidden()
+        yield from response.file(path, content_type="application/octet-stream")
 
     @Route.get(
         r"/projects/{project_id}/stream/{path:.+}",
@@ -283,9 +301,10 @@ class ProjectHandler:
             with open(path, "rb") as f:
                 yield from response.prepare(request)
                 while True:
-                    data = f.read(4096)
+                    data = yield from wait_run_in_executor(f.read, CHUNK_SIZE)
                     if not data:
                         yield from asyncio.sleep(0.1)
+                        continue
                     yield from response.write(data)
 
         except FileNotFoundError:
@@ -323,7 +342,7 @@ class ProjectHandler:
             os.makedirs(os.path.dirname(path), exist_ok=True)
             with open(path, 'wb+') as f:
                 while True:
-                    packet = yield from request.content.read(512)
+                    packet = yield from request.content.read(CHUNK_SIZE)
                     if not packet:
                         break
                     f.write(packet)
@@ -333,6 +352,36 @@ class ProjectHandler:
         except PermissionError:
             raise aiohttp.web.HTTPForbidden()
 
+    @Route.delete(
+        r"/projects/{project_id}/files/{path:.+}",
+        description="Delete a file from a project",
+        parameters={
+            "project_id": "Project UUID",
+        },
+        status_codes={
+            204: "File deleted",
+            403: "Permission denied",
+            404: "The file doesn't exist"
+        })
+    def delete_file(request, response):
+
+        pm = ProjectManager.instance()
+        project = pm.get_project(request.match_info["project_id"])
+        project_path = os.path.abspath(project.path)
+        path = os.path.abspath(os.path.join(project_path, request.match_info["path"]))
+
+        # Raise error if user try to escape
+        if path == project_path or os.path.commonpath([project_path, path]) != project_path:
+            raise aiohttp.web.HTTPForbidden()
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            raise aiohttp.web.HTTPNotFound()
+        except PermissionError:
+            raise aiohttp.web.HTTPForbidden()
+        response.set_status(204)
+
     @Route.get(
         r"/projects/{project_id}/export",
         description="Export a project as a portable archive",
@@ -382,9 +431,9 @@ class ProjectHandler:
         # It could be more optimal to stream this but it is not implemented in Python.
         # Spooled means the file is temporary kept in memory until max_size is reached
         try:
-            with tempfile.SpooledTemporaryFile(max_size=10000) as temp:
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as temp:
                 while True:
-                    packet = yield from request.content.read(512)
+                    packet = yield from request.content.read(CHUNK_SIZE)
                     if not packet:
                         break
                     temp.write(packet)
@@ -24,7 +24,12 @@ from gns3server.config import Config
 from gns3server.schemas.version import VERSION_SCHEMA
 from gns3server.compute.port_manager import PortManager
 from gns3server.version import __version__
-from aiohttp.web import HTTPConflict
+from gns3server.utils.asyncio.loop_monitor import LoopMonitor
+from gns3server.utils.profiler import Profiler, ProfilerError
+from gns3server.schemas.profiler import PROFILER_START_SCHEMA, PROFILER_OBJECT_SCHEMA
+from gns3server.schemas.trace import TRACE_OBJECT_SCHEMA, TRACE_LIST_SCHEMA
+from gns3server.utils.tracing import TraceStore
+from aiohttp.web import HTTPConflict, HTTPBadRequest
 
 
 class ServerHandler:
@@ -40,6 +45,47 @@ class ServerHandler:
         response.json({"version": __version__, "local": local_server})
 
 
+    @Route.get(
+        r"/metrics",
+        description="Return the metrics of the server API with the Prometheus text format")
+    def metrics(request, response):
+        response.content_type = "text/plain"
+        response.text = Route.get_metrics().prometheus()
+
+    @Route.get(
+        r"/traces",
+        description="List the slowest recent requests traces",
+        parameters={
+            "min_duration": "Minimum duration in seconds",
+            "limit": "Maximum number of traces"
+        },
+        output=TRACE_LIST_SCHEMA,
+        status_codes={
+            200: "List of traces",
+            400: "Invalid parameters"
+        })
+    def traces(request, response):
+        try:
+            min_duration = float(request.query.get("min_duration", 0))
+            limit = int(request.query.get("limit", 20))
+        except ValueError:
+            raise HTTPBadRequest(text="min_duration and limit must be numbers")
+        response.json(TraceStore.instance().slow_traces(min_duration=min_duration, limit=limit))
+
+    @Route.get(
+        r"/traces/{trace_id}",
+        description="Get the spans of a trace recorded by this compute",
+        parameters={
+            "trace_id": "Trace identifier"
+        },
+        output=TRACE_OBJECT_SCHEMA,
+        status_codes={
+            200: "Spans of the trace, empty if unknown"
+        })
+    def trace(request, response):
+        trace_id = request.match_info["trace_id"]
+        response.json({"trace_id": trace_id, "spans": [span.__json__() for span in TraceStore.instance().get(trace_id)]})
+
     @Route.get(
         r"/debug",
         description="Return debug informations about the compute",
@@ -50,6 +96,39 @@ class ServerHandler:
         response.content_type = "text/plain"
         response.text = ServerHandler._getDebugData()
 
+    @Route.post(
+        r"/debug/profile/start",
+        description="Start the sampling profiler for a limited duration",
+        input=PROFILER_START_SCHEMA,
+        output=PROFILER_OBJECT_SCHEMA,
+        status_codes={
+            201: "Profiler started",
+            409: "Profiler already running"
+        })
+    def profile_start(request, response):
+        profiler = Profiler.instance()
+        try:
+            profiler.start(**request.json)
+        except ProfilerError as e:
+            raise HTTPConflict(text=str(e))
+        response.set_status(201)
+        response.json(profiler)
+
+    @Route.post(
+        r"/debug/profile/stop",
+        description="Stop the sampling profiler and return the collapsed stacks (flamegraph format) and the functions with the most samples",
+        output=PROFILER_OBJECT_SCHEMA,
+        status_codes={
+            200: "Profiler stopped",
+            409: "Profiler not started"
+        })
+    def profile_stop(request, response):
+        try:
+            profiler = Profiler.instance().stop()
+        except ProfilerError as e:
+            raise HTTPConflict(text=str(e))
+        response.json(profiler)
+
     @staticmethod
     def _getDebugData():
         try:
@@ -94,5 +173,8 @@ Networks:
                     if open_port.laddr[1] == port:
                         found = True
                 data += "UDP {}: {}\n".format(port, found)
+
+        data += "\n\nEvent loop:\n"
+        data += LoopMonitor.instance().debug_text()
         return data
 
@@ -19,7 +19,7 @@ import os
 from aiohttp.web import HTTPConflict
 from gns3server.web.route import Route
 from gns3server.schemas.nio import NIO_SCHEMA
-from gns3server.schemas.node import NODE_CAPTURE_SCHEMA
+from gns3server.schemas.node import NODE_CAPTURE_SCHEMA, NODE_BATCH_SCHEMA, NODE_BATCH_RESULT_SCHEMA
 from gns3server.compute.vpcs import VPCS
 
 from gns3server.schemas.vpcs import (
@@ -138,6 +138,44 @@ class VPCSHandler:
         response.set_status(201)
         response.json(new_node)
 
+    @Route.post(
+        r"/projects/{project_id}/vpcs/nodes/start",
+        parameters={
+            "project_id": "Project UUID"
+        },
+        status_codes={
+            200: "Result of the action on each instance",
+            400: "Invalid request",
+            404: "Instance doesn't exist"
+        },
+        description="Start many VPCS instances",
+        input=NODE_BATCH_SCHEMA,
+        output=NODE_BATCH_RESULT_SCHEMA)
+    def start_many(request, response):
+
+        vpcs_manager = VPCS.instance()
+        results = yield from vpcs_manager.batch("start", request.json["node_ids"], request.match_info["project_id"])
+        response.json(results)
+
+    @Route.post(
+        r"/projects/{project_id}/vpcs/nodes/stop",
+        parameters={
+            "project_id": "Project UUID"
+        },
+        status_codes={
+            200: "Result of the action on each instance",
+            400: "Invalid request",
+            404: "Instance doesn't exist"
+        },
+        description="Stop many VPCS instances",
+        input=NODE_BATCH_SCHEMA,
+        output=NODE_BATCH_RESULT_SCHEMA)
+    def stop_many(request, response):
+
+        vpcs_manager = VPCS.instance()
+        results = yield from vpcs_manager.batch("stop", request.json["node_ids"], request.match_info["project_id"])
+        response.json(results)
+
     @Route.post(
         r"/projects/{project_id}/vpcs/nodes/{node_id}/start",
         parameters={
@@ -15,6 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+import asyncio
 import aiohttp
 
 from gns3server.web.route import Route
@@ -25,9 +27,13 @@ from gns3server.schemas.node import (
     NODE_OBJECT_SCHEMA,
     NODE_UPDATE_SCHEMA,
     NODE_CREATE_SCHEMA,
-    NODE_DUPLICATE_SCHEMA
+    NODE_DUPLICATE_SCHEMA,
+    NODE_BULK_ACTION_SCHEMA
 )
 
+import logging
+log = logging.getLogger(__name__)
+
 
 class NodeHandler:
     """
@@ -180,6 +186,59 @@ class NodeHandler:
         yield from project.start_all()
         response.set_status(204)
 
+    @Route.post(
+        r"/projects/{project_id}/nodes/bulk",
+        parameters={
+            "project_id": "Project UUID"
+        },
+        status_codes={
+            200: "Action running, the result of each node is streamed",
+            400: "Invalid request",
+            404: "Instance doesn't exist"
+        },
+        description="Run an action on the nodes matching a selector. One JSON object is sent on a line "
+                    "when a node is processed and a summary is sent at the end",
+        input=NODE_BULK_ACTION_SCHEMA)
+    def bulk(request, response):
+
+        project = yield from Controller.instance().get_loaded_project(request.match_info["project_id"])
+        action = request.json["action"]
+        nodes = project.select_nodes(node_ids=request.json.get("node_ids"),
+                                     node_type=request.json.get("node_type"),
+                                     compute_id=request.json.get("compute_id"),
+                                     name=request.json.get("name"))
+
+        response.content_type = "application/json"
+        response.set_status(200)
+        response.enable_chunked_encoding()
+        yield from response.prepare(request)
+
+        # Error of each node processed
+        processed = {}
+        finished = False
+
+        def node_done(node, error):
+            # Nodes can still be processed in background after a failure
+            if finished:
+                return
+            processed[node.id] = error
+            response.write((json.dumps({"node_id": node.id, "name": node.name, "action": action, "error": error}) + "\n").encode("utf-8"))
+
+        try:
+            errors = yield from project.bulk_action(action, nodes, callback=node_done)
+            summary = {"action": action, "nodes": len(nodes), "errors": errors}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The headers are already sent, the error is reported in the summary
+            log.error("Error while running {} on {} nodes of project {}: {}".format(action, len(nodes), project.id, e), exc_info=1)
+            # The nodes not processed are in error
+            failed = len([node for node in nodes if node.id not in processed or processed[node.id] is not None])
+            summary = {"action": action, "nodes": len(nodes), "errors": failed, "error": str(e) or e.__class__.__name__}
+        finished = True
+        response.write((json.dumps(summary) + "\n").encode("utf-8"))
+        yield from response.write_eof()
+
     @Route.post(
         r"/projects/{project_id}/nodes/{node_id}/duplicate",
         parameters={
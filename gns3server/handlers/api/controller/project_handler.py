@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import json
 import aiohttp
 import asyncio
 import tempfile
@@ -25,6 +26,8 @@ from gns3server.controller import Controller
 from gns3server.controller.import_project import import_project
 from gns3server.controller.export_project import export_project
 from gns3server.config import Config
+from gns3server.notification_filter import NotificationFilter
+from gns3server.utils.asyncio.notification_websocket import send_notifications
 
 
 from gns3server.schemas.project import (
@@ -37,16 +40,10 @@ from gns3server.schemas.project import (
 import logging
 log = logging.getLogger()
 
-
-@asyncio.coroutine
-def process_websocket(ws):
-    """
-    Process ping / pong and close message
-    """
-    try:
-        yield from ws.receive()
-    except aiohttp.WSServerHandshakeError:
-        pass
+# Size of the reads of the uploaded files
+CHUNK_SIZE = 64 * 1024
+# Size of an uploaded project kept in memory before writing it to a temporary file
+SPOOL_SIZE = 1024 * 1024
 
 
 class ProjectHandler:
@@ -194,7 +191,7 @@ class ProjectHandler:
 
     @Route.get(
         r"/projects/{project_id}/notifications",
-        description="Receive notifications about projects",
+        description="Receive notifications about projects. Notifications can be filtered with the actions (wildcards allowed), node_ids and project_ids comma separated query parameters",
         parameters={
             "project_id": "Project UUID",
         },
@@ -212,7 +209,7 @@ class ProjectHandler:
         response.enable_chunked_encoding()
 
         yield from response.prepare(request)
-        with controller.notification.queue(project) as queue:
+        with controller.notification.queue(project, NotificationFilter.from_query(request.query)) as queue:
             while True:
                 try:
                     msg = yield from queue.get_json(5)
@@ -230,7 +227,7 @@ class ProjectHandler:
 
     @Route.get(
         r"/projects/{project_id}/notifications/ws",
-        description="Receive notifications about projects from a Websocket",
+        description="Receive notifications about projects from a Websocket. Notifications can be filtered with the actions (wildcards allowed), node_ids and project_ids comma separated query parameters, the filter can be replaced by sending a JSON object with the same keys on the Websocket",
         parameters={
             "project_id": "Project UUID",
         },
@@ -246,17 +243,8 @@ class ProjectHandler:
         ws = aiohttp.web.WebSocketResponse()
         yield from ws.prepare(request)
 
-        asyncio.async(process_websocket(ws))
-
-        with controller.notification.queue(project) as queue:
-            while True:
-                try:
-                    notification = yield from queue.get_json(5)
-                except asyncio.futures.CancelledError as e:
-                    break
-                if ws.closed:
-                    break
-                ws.send_str(notification)
+        with controller.notification.queue(project, NotificationFilter.from_query(request.query)) as queue:
+            yield from send_notifications(ws, queue, 5)
 
         if project.auto_close:
             # To avoid trouble with client connecting disconnecting we sleep few seconds before checking
@@ -284,22 +272,15 @@ class ProjectHandler:
         project = yield from controller.get_loaded_project(request.match_info["project_id"])
 
         try:
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                datas = yield from export_project(
-                    project, tmp_dir,
-                    include_images=bool(int(request.query.get("include_images", "0"))))
-                # We need to do that now because export could failed and raise an HTTP error
-                # that why response start need to be the later possible
-                response.content_type = 'application/gns3project'
-                response.headers['CONTENT-DISPOSITION'] = 'attachment; filename="{}.gns3project"'.format(project.name)
-                response.enable_chunked_encoding()
-                yield from response.prepare(request)
-
-                for data in datas:
-                    response.write(data)
-                    yield from response.drain()
-
-                yield from response.write_eof()
+            datas = yield from export_project(
+                project,
+                include_images=bool(int(request.query.get("include_images", "0"))),
+                archive_format=request.query.get("archive_format", "zip"))
+            # We need to do that now because export could failed and raise an HTTP error
+            # that why response start need to be the later possible
+            response.content_type = 'application/gns3project'
+            response.headers['CONTENT-DISPOSITION'] = 'attachment; filename="{}.gns3project"'.format(project.name)
+            yield from response.stream(datas)
         # Will be raise if you have no space left or permission issue on your temporary directory
         # RuntimeError: something was wrong during the zip process
         except (OSError, RuntimeError) as e:
@@ -333,9 +314,9 @@ class ProjectHandler:
         # It could be more optimal to stream this but it is not implemented in Python.
         # Spooled means the file is temporary kept in memory until max_size is reached
         try:
-            with tempfile.SpooledTemporaryFile(max_size=10000) as temp:
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as temp:
                 while True:
-                    packet = yield from request.content.read(512)
+                    packet = yield from request.content.read(CHUNK_SIZE)
                     if not packet:
                         break
                     temp.write(packet)
@@ -386,8 +367,10 @@ class ProjectHandler:
         },
         status_codes={
             200: "File returned",
+            206: "Part of the file returned",
             403: "Permission denied",
-            404: "The file doesn't exist"
+            404: "The file doesn't exist",
+            416: "Range not satisfiable"
         })
     def get_file(request, response):
 
@@ -401,23 +384,7 @@ class ProjectHandler:
             raise aiohttp.web.HTTPForbidden()
         path = os.path.join(project.path, path)
 
-        response.content_type = "application/octet-stream"
-        response.set_status(200)
-        response.enable_chunked_encoding()
-
-        try:
-            with open(path, "rb") as f:
-                yield from response.prepare(request)
-                while True:
-                    data = f.read(4096)
-                    if not data:
-                        break
-                    yield from response.write(data)
-
-        except FileNotFoundError:
-            raise aiohttp.web.HTTPNotFound()
-        except PermissionError:
-            raise aiohttp.web.HTTPForbidden()
+        yield from response.file(path, content_type="application/octet-stream")
 
     @Route.post(
         r"/projects/{project_id}/files/{path:.+}",
@@ -448,7 +415,7 @@ class ProjectHandler:
         try:
             with open(path, 'wb+') as f:
                 while True:
-                    packet = yield from request.content.read(512)
+                    packet = yield from request.content.read(CHUNK_SIZE)
                     if not packet:
                         break
                     f.write(packet)
@@ -20,8 +20,13 @@ from gns3server.config import Config
 from gns3server.controller import Controller
 from gns3server.schemas.version import VERSION_SCHEMA
 from gns3server.version import __version__
+from gns3server.utils.asyncio.loop_monitor import LoopMonitor
+from gns3server.utils.profiler import Profiler, ProfilerError
+from gns3server.schemas.profiler import PROFILER_START_SCHEMA, PROFILER_OBJECT_SCHEMA
+from gns3server.schemas.trace import TRACE_OBJECT_SCHEMA, TRACE_LIST_SCHEMA
+from gns3server.utils import tracing
 
-from aiohttp.web import HTTPConflict, HTTPForbidden
+from aiohttp.web import HTTPConflict, HTTPForbidden, HTTPBadRequest
 
 import os
 import psutil
@@ -98,6 +103,61 @@ class ServerHandler:
             raise HTTPConflict(text="Client version {} is not the same as server version {}".format(request.json["version"], __version__))
         response.json({"version": __version__})
 
+    @Route.get(
+        r"/metrics",
+        description="Return the metrics of the server API with the Prometheus text format")
+    def metrics(request, response):
+        response.content_type = "text/plain"
+        response.text = Route.get_metrics().prometheus()
+
+    @Route.get(
+        r"/traces",
+        description="List the slowest recent requests traces",
+        parameters={
+            "min_duration": "Minimum duration in seconds",
+            "limit": "Maximum number of traces"
+        },
+        output=TRACE_LIST_SCHEMA,
+        status_codes={
+            200: "List of traces",
+            400: "Invalid parameters"
+        })
+    def traces(request, response):
+        try:
+            min_duration = float(request.query.get("min_duration", 0))
+            limit = int(request.query.get("limit", 20))
+        except ValueError:
+            raise HTTPBadRequest(text="min_duration and limit must be numbers")
+        response.json(tracing.TraceStore.instance().slow_traces(min_duration=min_duration, limit=limit))
+
+    @Route.get(
+        r"/traces/{trace_id}",
+        description="Get the spans of a trace from the controller and all the connected computes",
+        parameters={
+            "trace_id": "Trace identifier"
+        },
+        output=TRACE_OBJECT_SCHEMA,
+        status_codes={
+            200: "Spans of the trace, empty if unknown"
+        })
+    def trace(request, response):
+        trace_id = request.match_info["trace_id"]
+
+        # The queries to the computes should not be part of a trace
+        tracing.set_current_span(None)
+
+        spans = {span.span_id: span.__json__() for span in tracing.TraceStore.instance().get(trace_id)}
+        computes = [c for c in Controller.instance().computes.values() if c.connected]
+        results = yield from asyncio.gather(*[c.get("/traces/{}".format(trace_id)) for c in computes], return_exceptions=True)
+        for compute, result in zip(computes, results):
+            if isinstance(result, Exception):
+                log.warning("Could not get the trace {} from compute {}: {}".format(trace_id, compute.id, result))
+                continue
+            # The local compute share the trace store of the controller
+            for span in result.json.get("spans", []):
+                spans.setdefault(span["span_id"], span)
+        response.json({"trace_id": trace_id, "spans": sorted(spans.values(), key=lambda s: s["start_time"])})
+
     @Route.get(
         r"/settings",
         description="Retrieve gui settings from the server. Temporary will we removed in later release")
@@ -150,6 +210,11 @@ class ServerHandler:
             os.makedirs(debug_dir)
             with open(os.path.join(debug_dir, "controller.txt"), "w+") as f:
                 f.write(ServerHandler._getDebugData())
+            # Result of the last run of the profiler
+            profiler = Profiler.instance()
+            if profiler.samples and not profiler.running:
+                with open(os.path.join(debug_dir, "controller_profile.txt"), "w+") as f:
+                    f.write(profiler.collapsed())
         except Exception as e:
             # If something is wrong we log the info to the log and we hope the log will be include correctly to the debug export
             log.error("Could not export debug informations {}".format(e), exc_info=1)
@@ -175,6 +240,39 @@ class ServerHandler:
 
         response.set_status(201)
 
+    @Route.post(
+        r"/debug/profile/start",
+        description="Start the sampling profiler for a limited duration",
+        input=PROFILER_START_SCHEMA,
+        output=PROFILER_OBJECT_SCHEMA,
+        status_codes={
+            201: "Profiler started",
+            409: "Profiler already running"
+        })
+    def profile_start(request, response):
+        profiler = Profiler.instance()
+        try:
+            profiler.start(**request.json)
+        except ProfilerError as e:
+            raise HTTPConflict(text=str(e))
+        response.set_status(201)
+        response.json(profiler)
+
+    @Route.post(
+        r"/debug/profile/stop",
+        description="Stop the sampling profiler and return the collapsed stacks (flamegraph format) and the functions with the most samples",
+        output=PROFILER_OBJECT_SCHEMA,
+        status_codes={
+            200: "Profiler stopped",
+            409: "Profiler not started"
+        })
+    def profile_stop(request, response):
+        try:
+            profiler = Profiler.instance().stop()
+        except ProfilerError as e:
+            raise HTTPConflict(text=str(e))
+        response.json(profiler)
+
     @staticmethod
     def _getDebugData():
         try:
@@ -217,6 +315,9 @@ Processus:
             except psutil.NoSuchProcess:
                 pass
 
+        data += "\n\nEvent loop:\n"
+        data += LoopMonitor.instance().debug_text()
+
         data += "\n\nProjects"
         for project in Controller.instance().projects.values():
             data += "\n\nProject name: {}\nProject ID: {}\n".format(project.name, project.id)
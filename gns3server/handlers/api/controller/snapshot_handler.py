@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import aiohttp
 
 import logging
 log = logging.getLogger()
@@ -84,6 +85,32 @@ class SnapshotHandler:
         yield from project.delete_snapshot(request.match_info["snapshot_id"])
         response.set_status(204)
 
+    @Route.get(
+        r"/projects/{project_id}/snapshots/{snapshot_id}/export",
+        description="Export a snapshot as a portable archive",
+        parameters={
+            "project_id": "Project UUID",
+            "snapshot_id": "Snasphot UUID"
+        },
+        raw=True,
+        status_codes={
+            200: "File returned",
+            404: "The project or snapshot doesn't exist"
+        })
+    def export(request, response):
+
+        controller = Controller.instance()
+        project = controller.get_project(request.match_info["project_id"])
+        snapshot = project.get_snapshot(request.match_info["snapshot_id"])
+
+        try:
+            datas = snapshot.export()
+            response.content_type = 'application/gns3project'
+            response.headers['CONTENT-DISPOSITION'] = 'attachment; filename="{}_{}.gns3project"'.format(project.name, snapshot.name)
+            yield from response.stream(datas)
+        except (OSError, RuntimeError) as e:
+            raise aiohttp.web.HTTPNotFound(text="Can't export snapshot: {}".format(str(e)))
+
     @Route.post(
         r"/projects/{project_id}/snapshots/{snapshot_id}/restore",
         description="Restore a snapshot from disk",
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import fnmatch
+
+
+class NotificationFilter:
+    """
+    Filter of the notifications sent to a listener. The filter
+    is checked before the event is queued so events not matching
+    are never serialized.
+
+    Each criteria is optional, None mean everything is accepted. Events
+    without node (or project) information are not filtered by the
+    node_ids (or project_ids) criteria.
+
+    :param actions: List of action names, wildcards are allowed (log.*)
+    :param node_ids: List of node identifiers
+    :param project_ids: List of project identifiers
+    """
+
+    def __init__(self, actions=None, node_ids=None, project_ids=None):
+        self.update(actions=actions, node_ids=node_ids, project_ids=project_ids)
+
+    def update(self, actions=None, node_ids=None, project_ids=None):
+        """
+        Replace the criteria of the filter
+        """
+
+        if actions is None:
+            self._actions = None
+            self._action_patterns = None
+        else:
+            self._actions = set(a for a in actions if not self._is_pattern(a))
+            self._action_patterns = [a for a in actions if self._is_pattern(a)]
+        self._node_ids = None if node_ids is None else set(node_ids)
+        self._project_ids = None if project_ids is None else set(project_ids)
+
+    def update_from_json(self, data):
+        """
+        Replace the criteria of the filter with a JSON message
+        sent by the client:
+
+        {"actions": ["node.updated", "log.*"], "node_ids": [...], "project_ids": [...]}
+
+        :raises ValueError: if the message is invalid
+        """
+
+        data = json.loads(data)
+        if not isinstance(data, dict):
+            raise ValueError("The notification filter must be a JSON object")
+        criteria = {}
+        for key in ("actions", "node_ids", "project_ids"):
+            value = data.get(key)
+            if value is not None and (not isinstance(value, list) or not all(isinstance(v, str) for v in value)):
+                raise ValueError("{} must be a list of strings".format(key))
+            criteria[key] = value
+        self.update(**criteria)
+
+    @classmethod
+    def from_query(cls, query):
+        """
+        Build a filter from the query string of a request,
+        each criteria is a comma separated list:
+
+        ?actions=node.updated,log.*&node_ids=...&project_ids=...
+
+        :param query: Query MultiDict of the request
+        """
+
+        criteria = {}
+        for key in ("actions", "node_ids", "project_ids"):
+            if key in query:
+                criteria[key] = [v for v in query[key].split(",") if len(v)]
+        return cls(**criteria)
+
+    @staticmethod
+    def _is_pattern(action):
+        return "*" in action or "?" in action or "[" in action
+
+    def __json__(self):
+        actions = None
+        if self._actions is not None:
+            actions = sorted(self._actions) + sorted(self._action_patterns)
+        return {
+            "actions": actions,
+            "node_ids": None if self._node_ids is None else sorted(self._node_ids),
+            "project_ids": None if self._project_ids is None else sorted(self._project_ids)
+        }
+
+    def match(self, action, event, project_id=None):
+        """
+        :param action: Action name
+        :param event: Event to send (a dictionary or an object with a __json__ method)
+        :param project_id: Project identifier if not part of the event
+        :returns: True if the event should be sent to the listener
+        """
+
+        if self._actions is not None and action not in self._actions:
+            if not any(fnmatch.fnmatchcase(action, pattern) for pattern in self._action_patterns):
+                return False
+
+        if self._project_ids is not None:
+            if project_id is None:
+                project_id = self._event_project_id(event)
+            if project_id is not None and project_id not in self._project_ids:
+                return False
+
+        if self._node_ids is not None:
+            node_ids = self._event_node_ids(action, event)
+            if node_ids and self._node_ids.isdisjoint(node_ids):
+                return False
+        return True
+
+    @staticmethod
+    def _event_project_id(event):
+        if isinstance(event, dict):
+            return event.get("project_id")
+        project = getattr(event, "project", None)
+        return getattr(project, "id", None)
+
+    @staticmethod
+    def _event_node_ids(action, event):
+        """
+        :returns: List of the node ids related to the event
+        """
+
+        if isinstance(event, dict):
+            if "node_id" in event:
+                return [event["node_id"]]
+            # Links are related to the nodes on each side
+            nodes = event.get("nodes")
+            if isinstance(nodes, list):
+                return [n["node_id"] for n in nodes if isinstance(n, dict) and "node_id" in n]
+            return []
+        # Compute side nodes are sent as object and serialized later
+        if action.startswith("node."):
+            node_id = getattr(event, "id", None)
+            if node_id is not None:
+                return [node_id]
+        return []
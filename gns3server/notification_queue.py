@@ -19,15 +19,36 @@ import asyncio
 import json
 import psutil
 
+from .notification_filter import NotificationFilter
+
 
 class NotificationQueue(asyncio.Queue):
     """
     Queue returned by the notification manager.
+
+    :param notification_filter: NotificationFilter applied before queuing events
     """
 
-    def __init__(self):
+    def __init__(self, notification_filter=None):
         super().__init__()
         self._first = True
+        if notification_filter is None:
+            notification_filter = NotificationFilter()
+        self.filter = notification_filter
+
+    def put_filtered(self, action, event, project_id=None, **kwargs):
+        """
+        Queue the event only if it match the filter of the queue
+
+        :param action: Action name
+        :param event: Event to send
+        :param project_id: Project identifier if not part of the event
+        :param kwargs: Meta sent with the notification
+        """
+        if self.filter.match(action, event, project_id=project_id):
+            if project_id is not None:
+                kwargs["project_id"] = project_id
+            self.put_nowait((action, event, kwargs))
 
     @asyncio.coroutine
     def get(self, timeout):
@@ -36,6 +36,14 @@ CAPABILITIES_SCHEMA = {
         "platform": {
             "type": "string",
             "description": "Platform where the compute is running"
+        },
+        "cpus": {
+            "type": ["integer", "null"],
+            "description": "Number of logical CPUs of the compute"
+        },
+        "memory": {
+            "type": "integer",
+            "description": "Total memory of the compute in bytes"
         }
     },
     "additionalProperties": False
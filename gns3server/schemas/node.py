@@ -94,6 +94,67 @@ NODE_CAPTURE_SCHEMA = {
 }
 
 
+READINESS_CONSOLE_PROBE_SCHEMA = {
+    "description": "The node is ready when a pattern is found on its telnet console",
+    "type": "object",
+    "properties": {
+        "type": {
+            "enum": ["console"]
+        },
+        "pattern": {
+            "description": "Regular expression searched in the console output",
+            "type": "string",
+            "minLength": 1
+        },
+        "timeout": {
+            "description": "Maximum boot time in seconds",
+            "type": "number",
+            "minimum": 0
+        },
+        "interval": {
+            "description": "Delay in seconds between two attempts to connect",
+            "type": "number",
+            "minimum": 0
+        }
+    },
+    "required": ["type", "pattern"],
+    "additionalProperties": False
+}
+
+READINESS_TCP_PROBE_SCHEMA = {
+    "description": "The node is ready when a TCP port accept connections",
+    "type": "object",
+    "properties": {
+        "type": {
+            "enum": ["tcp"]
+        },
+        "host": {
+            "description": "Host of the TCP port, by default the compute host",
+            "type": "string",
+            "minLength": 1
+        },
+        "port": {
+            "description": "TCP port",
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 65535
+        },
+        "timeout": {
+            "description": "Maximum boot time in seconds",
+            "type": "number",
+            "minimum": 0
+        },
+        "interval": {
+            "description": "Delay in seconds between two attempts to connect",
+            "type": "number",
+            "minimum": 0
+        }
+    },
+    "required": ["type", "port"],
+    "additionalProperties": False
+}
+
+
 NODE_OBJECT_SCHEMA = {
     "$schema": "http://json-schema.org/draft-04/schema#",
     "description": "A node object",
@@ -193,6 +254,22 @@ NODE_OBJECT_SCHEMA = {
             "description": "Name of the first port",
             "type": ["string", "null"],
         },
+        "start_priority": {
+            "description": "Nodes with a higher priority are started before and stopped after the others",
+            "type": "integer"
+        },
+        "readiness_probe": {
+            "description": "Check used to detect the end of the boot of the node",
+            "oneOf": [
+                READINESS_CONSOLE_PROBE_SCHEMA,
+                READINESS_TCP_PROBE_SCHEMA,
+                {"type": "null"}
+            ]
+        },
+        "readiness": {
+            "description": "Result of the readiness probe (Read only)",
+            "enum": ["pending", "ready", "failed", None]
+        },
         "ports": {
             "description": "List of node ports READ only",
             "type": "array",
@@ -260,3 +337,80 @@ NODE_DUPLICATE_SCHEMA = {
     "additionalProperties": False,
     "required": ["x", "y"]
 }
+
+
+NODE_BATCH_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to run an action on many nodes of a compute",
+    "type": "object",
+    "properties": {
+        "node_ids": {
+            "description": "List of node UUID",
+            "type": "array",
+            "items": {
+                "type": "string",
+                "minLength": 36,
+                "maxLength": 36,
+                "pattern": "^[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}$"
+            }
+        }
+    },
+    "additionalProperties": False,
+    "required": ["node_ids"]
+}
+
+NODE_BATCH_RESULT_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Result of an action on many nodes of a compute",
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "node_id": {
+                "description": "Node UUID",
+                "type": "string"
+            },
+            "status": {
+                "description": "Status of the node after the action",
+                "enum": ["stopped", "started", "suspended"]
+            },
+            "error": {
+                "description": "Error message if the action failed",
+                "type": ["string", "null"]
+            }
+        },
+        "additionalProperties": False,
+        "required": ["node_id", "status", "error"]
+    }
+}
+
+NODE_BULK_ACTION_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to run an action on the nodes of a project matching a selector",
+    "type": "object",
+    "properties": {
+        "action": {
+            "description": "Action to run on the nodes",
+            "enum": ["start", "stop", "suspend", "reload"]
+        },
+        "node_ids": {
+            "description": "Select the nodes by UUID",
+            "type": "array",
+            "items": {
+                "type": "string"
+            }
+        },
+        "node_type": NODE_TYPE_SCHEMA,
+        "compute_id": {
+            "description": "Select the nodes running on this compute",
+            "type": "string"
+        },
+        "name": {
+            "description": "Select the nodes with a name matching this shell style pattern (R*, PC?...)",
+            "type": "string",
+            "minLength": 1
+        }
+    },
+    "additionalProperties": False,
+    "required": ["action"]
+}
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+PROFILER_START_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to start the profiler",
+    "type": "object",
+    "properties": {
+        "duration": {
+            "description": "Maximum duration of the profiling in seconds",
+            "type": "number",
+            "minimum": 1,
+            "maximum": 600
+        },
+        "interval": {
+            "description": "Interval between two samples in seconds",
+            "type": "number",
+            "minimum": 0.001,
+            "maximum": 1
+        },
+        "ignore_idle": {
+            "description": "Ignore the samples of the threads waiting for work",
+            "type": "boolean"
+        }
+    },
+    "additionalProperties": False
+}
+
+PROFILER_OBJECT_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Result of the profiler",
+    "type": "object",
+    "properties": {
+        "running": {
+            "description": "True if the profiler is still running",
+            "type": "boolean"
+        },
+        "samples": {
+            "description": "Number of samples",
+            "type": "integer"
+        },
+        "interval": {
+            "description": "Interval between two samples in seconds",
+            "type": "number"
+        },
+        "duration": {
+            "description": "Duration of the profiling in seconds",
+            "type": "number"
+        },
+        "collapsed": {
+            "description": "Samples as collapsed stacks, compatible with the flamegraph tools",
+            "type": "string"
+        },
+        "top": {
+            "description": "Functions with the most samples",
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "function": {"type": "string"},
+                    "filename": {"type": "string"},
+                    "line": {"type": "integer"},
+                    "self": {
+                        "description": "Number of samples where the function was running",
+                        "type": "integer"
+                    },
+                    "total": {
+                        "description": "Number of samples where the function was in the stack",
+                        "type": "integer"
+                    }
+                }
+            }
+        }
+    },
+    "additionalProperties": False,
+    "required": ["running", "samples", "interval", "duration", "collapsed", "top"]
+}
@@ -253,3 +253,38 @@ PROJECT_FILE_LIST_SCHEMA = {
     ],
     "additionalProperties": False,
 }
+
+PROJECT_DUPLICATE_FILES_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Request validation to duplicate the files of a project on a compute",
+    "type": "object",
+    "properties": {
+        "project_id": {
+            "description": "UUID of the new project",
+            "type": "string",
+            "minLength": 36,
+            "maxLength": 36,
+            "pattern": "^[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}$"
+        },
+        "name": {
+            "description": "Name of the new project",
+            "type": ["string", "null"],
+            "minLength": 1
+        },
+        "node_ids": {
+            "description": "New UUID of the nodes, by UUID of the node in the project",
+            "type": "object",
+            "patternProperties": {
+                "^[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}$": {
+                    "type": "string",
+                    "minLength": 36,
+                    "maxLength": 36,
+                    "pattern": "^[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}$"
+                }
+            },
+            "additionalProperties": False
+        }
+    },
+    "additionalProperties": False,
+    "required": ["project_id"]
+}
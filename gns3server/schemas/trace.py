@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+SPAN_OBJECT_SCHEMA = {
+    "description": "Timing of one operation of a trace",
+    "type": "object",
+    "properties": {
+        "trace_id": {
+            "description": "Trace identifier",
+            "type": "string"
+        },
+        "span_id": {
+            "description": "Span identifier",
+            "type": "string"
+        },
+        "parent_id": {
+            "description": "Identifier of the parent span",
+            "type": ["string", "null"]
+        },
+        "name": {
+            "description": "Operation name (HTTP method and route)",
+            "type": "string"
+        },
+        "kind": {
+            "description": "server for a request received, client for a request sent to a compute",
+            "enum": ["server", "client"]
+        },
+        "start_time": {
+            "description": "Start time (Unix timestamp)",
+            "type": "number"
+        },
+        "duration": {
+            "description": "Duration in seconds",
+            "type": "number"
+        },
+        "tags": {
+            "description": "Informations about the operation (status, compute_id...)",
+            "type": "object"
+        }
+    },
+    "additionalProperties": False,
+    "required": ["trace_id", "span_id", "parent_id", "name", "kind", "start_time", "duration"]
+}
+
+TRACE_OBJECT_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Spans of a trace",
+    "type": "object",
+    "properties": {
+        "trace_id": {
+            "description": "Trace identifier",
+            "type": "string"
+        },
+        "spans": {
+            "description": "Spans sorted by start time",
+            "type": "array",
+            "items": SPAN_OBJECT_SCHEMA
+        }
+    },
+    "additionalProperties": False,
+    "required": ["trace_id", "spans"]
+}
+
+TRACE_LIST_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-04/schema#",
+    "description": "Slowest recent traces",
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "trace_id": {
+                "description": "Trace identifier",
+                "type": "string"
+            },
+            "name": {
+                "description": "Name of the longest span",
+                "type": "string"
+            },
+            "start_time": {
+                "description": "Start time (Unix timestamp)",
+                "type": "number"
+            },
+            "duration": {
+                "description": "Duration in seconds of the longest span",
+                "type": "number"
+            },
+            "spans": {
+                "description": "Number of spans",
+                "type": "integer"
+            }
+        },
+        "additionalProperties": False
+    }
+}
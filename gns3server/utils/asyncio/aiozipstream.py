@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Zip archive generated while it's read, the content of the files
+can come from asyncio streams like the HTTP responses of the computes.
+Nothing is written on the disk and only a few chunks of each stream
+are kept in memory.
+"""
+
+import os
+import time
+import zlib
+import struct
+import asyncio
+import zipfile
+import zipstream
+import collections
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    # zstandard is optional, only the zstd archives need it
+    ZSTD_AVAILABLE = False
+
+from zipfile import ZIP64_LIMIT, crc32
+
+
+# Size of the reads on the streams
+CHUNK_SIZE = 64 * 1024
+
+# Number of chunks read from a stream before they are added to the archive
+READ_AHEAD = 16
+
+# Number of streams read in parallel, in total and with the same key (a compute)
+PREFETCH = 6
+KEY_PREFETCH = 2
+
+ZSTD_LEVEL = 3
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class _Stream:
+    """
+    Content of a file read in background from an asyncio stream
+
+    :param open_stream: Coroutine function returning a response with a content stream
+    :param read_ahead: Maximum number of chunks waiting to be added to the archive
+    :param key: Streams with the same key are limited by the key prefetch
+    :param position: Position of the file in the archive
+    """
+
+    def __init__(self, open_stream, read_ahead, key, position):
+        self._open_stream = open_stream
+        self._queue = asyncio.Queue(maxsize=read_ahead)
+        self._task = None
+        # Chunk received by wait() before the archive asks for it
+        self._next = None
+        self.key = key
+        self.position = position
+        # All the chunks are in the archive
+        self.finished = False
+
+    @property
+    def started(self):
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.async(self._read())
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    @property
+    def ready(self):
+        """
+        True if a chunk can be added to the archive without waiting
+        """
+        return self._next is not None or not self._queue.empty()
+
+    @asyncio.coroutine
+    def _read(self):
+        try:
+            response = yield from self._open_stream()
+            try:
+                while True:
+                    data = yield from response.content.read(CHUNK_SIZE)
+                    yield from self._queue.put(data)
+                    if not data:
+                        break
+            finally:
+                response.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            yield from self._queue.put(e)
+
+    @asyncio.coroutine
+    def wait(self):
+        """
+        Wait until a chunk is ready
+        """
+
+        if not self.ready:
+            self._next = yield from self._queue.get()
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                if self._next is not None:
+                    data, self._next = self._next, None
+                elif self._queue.empty():
+                    # The archive reader waits for the stream before the next iteration
+                    yield b""
+                    continue
+                else:
+                    data = self._queue.get_nowait()
+                if isinstance(data, Exception):
+                    raise data
+                if not data:
+                    return
+                yield data
+        finally:
+            self.finished = True
+
+
+class ZipFile(zipstream.ZipFile):
+    """
+    Zip archive with files read from asyncio streams. The archive
+    is read with readchunk(), the files are in the order they were
+    added. The streams of the next files are opened in advance, in
+    the order of the archive, and read in parallel while the archive
+    is consumed.
+
+    :param read_ahead: Number of chunks of a stream read in advance
+    :param prefetch: Maximum number of streams read in parallel
+    :param key_prefetch: Maximum number of streams with the same key read in parallel
+    :param compresslevel: Level of the deflate compression
+    """
+
+    def __init__(self, *args, read_ahead=READ_AHEAD, prefetch=PREFETCH, key_prefetch=KEY_PREFETCH,
+                 compresslevel=zlib.Z_DEFAULT_COMPRESSION, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compresslevel = compresslevel
+        self._read_ahead = read_ahead
+        self._prefetch = prefetch
+        self._key_prefetch = key_prefetch
+        self._chunks = None
+        self._stream = None
+        # Streams not yet started, by key in the order of the archive
+        self._waiting_streams = collections.OrderedDict()
+        self._running_streams = []
+
+    def write_stream(self, arcname, open_stream, compress_type=None, key=None):
+        """
+        Add a file with the content of a stream
+
+        :param arcname: Name of the file in the archive
+        :param open_stream: Coroutine function returning the response (with a content stream and a close method)
+        :param compress_type: Compression of the file
+        :param key: Key of the stream, for example the compute where the file is downloaded
+        """
+
+        stream = _Stream(open_stream, self._read_ahead, key, len(self.paths_to_write))
+        self._waiting_streams.setdefault(key, collections.deque()).append(stream)
+        self.paths_to_write.append({"arcname": arcname,
+                                    "stream": stream,
+                                    "compress_type": compress_type})
+
+    def _start_streams(self):
+        """
+        Start the next streams of the archive in the limits of the prefetch
+        """
+
+        self._running_streams = [s for s in self._running_streams if not s.finished]
+        running_by_key = collections.Counter(s.key for s in self._running_streams)
+        while len(self._running_streams) < self._prefetch:
+            # The first stream of the archive among the keys below their limit
+            candidates = [q[0] for k, q in self._waiting_streams.items() if running_by_key[k] < self._key_prefetch]
+            if not candidates:
+                break
+            stream = min(candidates, key=lambda s: s.position)
+            self._start_stream(stream)
+            running_by_key[stream.key] += 1
+
+    def _start_stream(self, stream):
+        queue = self._waiting_streams[stream.key]
+        queue.remove(stream)
+        if not queue:
+            del self._waiting_streams[stream.key]
+        stream.start()
+        self._running_streams.append(stream)
+
+    @asyncio.coroutine
+    def readchunk(self):
+        """
+        Read the next chunk of the archive
+
+        :returns: Bytes, empty at the end of the archive
+        """
+
+        if self._chunks is None:
+            self._chunks = iter(self)
+            # The streams are read while the local files are added
+            self._start_streams()
+        try:
+            while True:
+                try:
+                    data = next(self._chunks)
+                except StopIteration:
+                    return b""
+                if data:
+                    return data
+                # The chunk is also empty when the compressor keeps the data
+                if self._stream is not None and not self._stream.ready:
+                    yield from self._stream.wait()
+        except Exception:
+            self.cancel()
+            raise
+
+    def cancel(self):
+        """
+        Stop reading the streams, if the archive will not be read until the end
+        """
+
+        for kwargs in self.paths_to_write:
+            if "stream" in kwargs:
+                kwargs["stream"].cancel()
+
+    # The name mangling of the methods of zipstream.ZipFile is the
+    # same because the class has the same name
+    def __iter__(self):
+        for kwargs in self.paths_to_write:
+            if "stream" in kwargs:
+                yield from self.__write_stream(**kwargs)
+            elif kwargs.get("filename") and os.path.isdir(kwargs["filename"]):
+                yield from self.__write(**kwargs)
+            elif kwargs.get("filename"):
+                yield from self.__write_file(**kwargs)
+            else:
+                yield from self.__write_iterable(**kwargs)
+        yield from self.__close()
+
+    def _compressor(self, compress_type):
+        if compress_type == zipfile.ZIP_DEFLATED:
+            return zlib.compressobj(self._compresslevel, zlib.DEFLATED, -15)
+        return zipstream._get_compressor(compress_type)
+
+    def __new_zinfo(self, arcname, date_time, compress_type):
+        if not self.fp:
+            raise RuntimeError("Attempt to write to ZIP archive that was already closed")
+
+        arcname = os.path.normpath(os.path.splitdrive(arcname)[1]).lstrip(os.sep)
+        zinfo = zipstream.ZipInfo(arcname, date_time)
+        zinfo.external_attr = 0o600 << 16
+        if compress_type is None:
+            zinfo.compress_type = self.compression
+        else:
+            zinfo.compress_type = compress_type
+        zinfo.file_size = 0
+        zinfo.flag_bits = 0x08  # Sizes and CRC in the data descriptor
+        if zinfo.compress_type == zipfile.ZIP_LZMA:
+            zinfo.flag_bits |= 0x02
+        zinfo.header_offset = self.fp.tell()
+        self._writecheck(zinfo)
+        self._didModify = True
+        return zinfo
+
+    def __write_file(self, filename, arcname=None, compress_type=None):
+        st = os.stat(filename)
+        zinfo = self.__new_zinfo(arcname or filename, time.localtime(st.st_mtime)[0:6], compress_type)
+        zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+        # Compressed size can be larger than uncompressed size
+        zip64 = self._allowZip64 and st.st_size * 1.05 > ZIP64_LIMIT
+
+        def chunks():
+            with open(filename, "rb") as f:
+                while True:
+                    buf = f.read(CHUNK_SIZE)
+                    if not buf:
+                        break
+                    yield buf
+        yield from self.__write_data(zinfo, chunks(), zip64)
+
+    def __write_iterable(self, iterable, arcname=None, compress_type=None):
+        zinfo = self.__new_zinfo(arcname, time.localtime()[0:6], compress_type)
+        yield from self.__write_data(zinfo, iterable, self._allowZip64)
+
+    def __write_stream(self, arcname, stream, compress_type=None):
+        zinfo = self.__new_zinfo(arcname, time.localtime()[0:6], compress_type)
+        self._stream = stream
+        # The stream of the file must be read even if the prefetch is full
+        if not stream.started:
+            self._start_stream(stream)
+        self._start_streams()
+        try:
+            # The size is unknown before the end of the stream
+            yield from self.__write_data(zinfo, stream, self._allowZip64)
+        finally:
+            self._stream = None
+        self._start_streams()
+
+    def __write_data(self, zinfo, chunks, zip64):
+        cmpr = self._compressor(zinfo.compress_type)
+        yield self.fp.write(zinfo.FileHeader(zip64))
+
+        crc = 0
+        file_size = 0
+        compress_size = 0
+        for buf in chunks:
+            file_size += len(buf)
+            crc = crc32(buf, crc) & 0xffffffff
+            if cmpr:
+                buf = cmpr.compress(buf)
+                compress_size += len(buf)
+            yield self.fp.write(buf)
+        if cmpr:
+            buf = cmpr.flush()
+            compress_size += len(buf)
+            yield self.fp.write(buf)
+        else:
+            compress_size = file_size
+
+        if not zip64 and max(file_size, compress_size) > ZIP64_LIMIT:
+            raise zipfile.LargeZipFile("Filesize would require ZIP64 extensions")
+        zinfo.CRC = crc
+        zinfo.file_size = file_size
+        zinfo.compress_size = compress_size
+        fmt = "<4sLQQ" if zip64 else "<4sLLL"
+        yield self.fp.write(struct.pack(fmt, zipstream.stringDataDescriptor, crc, compress_size, file_size))
+        self.filelist.append(zinfo)
+        self.NameToInfo[zinfo.filename] = zinfo
+
+
+class ZstdZipFile(ZipFile):
+    """
+    Zip archive compressed as a whole with zstd, the files are stored
+    without compression in the zip. Requires the zstandard module.
+
+    :param level: zstd compression level
+    """
+
+    def __init__(self, *args, level=ZSTD_LEVEL, **kwargs):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("The zstandard module is not installed")
+        super().__init__(*args, **kwargs)
+        self._zstd = zstandard.ZstdCompressor(level=level).compressobj()
+        self._flushed = False
+
+    def write(self, filename, arcname=None, compress_type=None):
+        super().write(filename, arcname=arcname, compress_type=zipfile.ZIP_STORED)
+
+    def write_iter(self, arcname, iterable, compress_type=None):
+        super().write_iter(arcname, iterable, compress_type=zipfile.ZIP_STORED)
+
+    def write_stream(self, arcname, open_stream, compress_type=None, key=None):
+        super().write_stream(arcname, open_stream, compress_type=zipfile.ZIP_STORED, key=key)
+
+    @asyncio.coroutine
+    def readchunk(self):
+        while not self._flushed:
+            data = yield from super().readchunk()
+            if data:
+                data = self._zstd.compress(data)
+            else:
+                data = self._zstd.flush()
+                self._flushed = True
+            if data:
+                return data
+        return b""
+
+
+def is_zstd(stream):
+    """
+    :param stream: Seekable file object
+    :returns: True if the file is compressed with zstd
+    """
+
+    position = stream.tell()
+    magic = stream.read(len(ZSTD_MAGIC))
+    stream.seek(position)
+    return magic == ZSTD_MAGIC
+
+
+def decompress_zstd(stream, destination):
+    """
+    Decompress a zstd file
+
+    :param stream: File object compressed with zstd
+    :param destination: File object where the decompressed data is written
+    """
+
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("The zstandard module is not installed")
+    zstandard.ZstdDecompressor().copy_stream(stream, destination)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+import collections
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Watchdog of the event loop.
+
+    A callback scheduled every interval measures the scheduling lag
+    of the loop. A thread checks the loop is still running this callback,
+    when the loop is blocked longer than the threshold the stack of
+    the loop thread is captured to find the code responsible.
+
+    :param interval: Interval between two measures in seconds
+    :param threshold: Duration in seconds after which a callback is considered slow
+    :param samples: Number of lag measures kept for the percentiles
+    :param max_offenders: Maximum number of different slow callbacks kept
+    """
+
+    def __init__(self, interval=0.25, threshold=0.1, samples=1000, max_offenders=50):
+        self._interval = interval
+        self._threshold = threshold
+        self._max_offenders = max_offenders
+        self._lags = collections.deque(maxlen=samples)
+        self._offenders = {}
+        self._slow_callbacks = 0
+        self._loop = None
+        self._handle = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = None
+        self._last_beat = None
+        self._expected = None
+        # Stack captured by the watchdog thread: (beat, stack)
+        self._captured = None
+
+    @property
+    def running(self):
+        return self._handle is not None
+
+    @property
+    def threshold(self):
+        return self._threshold
+
+    def start(self, loop=None, threshold=None):
+        """
+        Start to monitor the loop, need to be called from the loop thread
+
+        :param loop: Event loop (default the current one)
+        :param threshold: Duration in seconds after which a callback is considered slow
+        """
+
+        if self.running:
+            return
+        if threshold is not None:
+            self._threshold = threshold
+        self._loop = loop or asyncio.get_event_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._expected = self._last_beat + self._interval
+        self._handle = self._loop.call_later(self._interval, self._beat)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watchdog, name="LoopMonitor", daemon=True)
+        self._thread.start()
+        log.info("Event loop monitor started (slow callback threshold {}s)".format(self._threshold))
+
+    def stop(self):
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(1)
+            self._thread = None
+
+    def _beat(self):
+        """
+        Called by the loop every interval
+        """
+
+        now = time.monotonic()
+        lag = max(0.0, now - self._expected)
+        self._lags.append(lag)
+
+        captured = self._captured
+        if captured is not None and captured[0] == self._last_beat:
+            self._record_offender(captured[1], lag)
+        elif lag >= self._threshold:
+            # The watchdog has not been fast enough to capture the stack
+            self._record_offender(None, lag)
+        self._captured = None
+
+        self._last_beat = now
+        self._expected = now + self._interval
+        self._handle = self._loop.call_later(self._interval, self._beat)
+
+    def _watchdog(self):
+        """
+        Thread checking that the loop is not blocked
+        """
+
+        while not self._stopped.wait(self._threshold / 2):
+            last_beat = self._last_beat
+            if self._captured is not None and self._captured[0] == last_beat:
+                continue
+            if time.monotonic() - last_beat > self._interval + self._threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                self._captured = (last_beat, self._extract_stack(frame))
+
+    @staticmethod
+    def _extract_stack(frame):
+        """
+        Extract the stack without the asyncio internals
+
+        :returns: List of (filename, line number, function name)
+        """
+
+        stack = [(f.filename, f.lineno, f.name) for f in traceback.extract_stack(frame)]
+        asyncio_dir = os.path.dirname(asyncio.__file__)
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0].startswith(asyncio_dir):
+                return stack[i + 1:] or stack
+        return stack
+
+    def _record_offender(self, stack, duration):
+        self._slow_callbacks += 1
+        if stack is None:
+            key = ("unknown",)
+        else:
+            # The innermost frames identify the blocking code
+            key = tuple(stack[-8:])
+
+        offender = self._offenders.get(key)
+        if offender is None:
+            if len(self._offenders) >= self._max_offenders:
+                del self._offenders[min(self._offenders, key=lambda k: self._offenders[k]["total"])]
+            offender = {"stack": stack or [], "count": 0, "total": 0.0, "max": 0.0}
+            self._offenders[key] = offender
+        offender["count"] += 1
+        offender["total"] += duration
+        offender["max"] = max(offender["max"], duration)
+        log.debug("Event loop blocked during {:.3f}s".format(duration))
+
+    def percentiles(self):
+        """
+        :returns: Dictionary of lag percentiles in seconds
+        """
+
+        lags = sorted(self._lags)
+        if not lags:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "p50": lags[int(len(lags) * 0.50)],
+            "p90": lags[min(len(lags) - 1, int(len(lags) * 0.90))],
+            "p99": lags[min(len(lags) - 1, int(len(lags) * 0.99))],
+            "max": lags[-1]
+        }
+
+    def top_offenders(self, count=10):
+        """
+        :returns: Slow callbacks sorted by the total time they blocked the loop
+        """
+
+        offenders = sorted(self._offenders.values(), key=lambda o: o["total"], reverse=True)
+        return offenders[:count]
+
+    def __json__(self):
+        return {
+            "running": self.running,
+            "threshold": self._threshold,
+            "lag": self.percentiles(),
+            "slow_callbacks": self._slow_callbacks,
+            "top_offenders": [
+                {
+                    "count": o["count"],
+                    "total": o["total"],
+                    "max": o["max"],
+                    "stack": ["{}:{} {}".format(*f) for f in o["stack"]]
+                } for o in self.top_offenders()
+            ]
+        }
+
+    def debug_text(self):
+        """
+        :returns: Lag and slow callbacks for the debug informations
+        """
+
+        lag = self.percentiles()
+        data = "Event loop lag: p50 {p50:.4f}s p90 {p90:.4f}s p99 {p99:.4f}s max {max:.4f}s\n".format(**lag)
+        data += "Slow callbacks (> {}s): {}\n".format(self._threshold, self._slow_callbacks)
+        for offender in self.top_offenders():
+            data += "\n* Blocked {count} times, total {total:.3f}s, max {max:.3f}s\n".format(**offender)
+            for f in offender["stack"]:
+                data += "    {}:{} {}\n".format(*f)
+        return data
+
+    def prometheus(self):
+        """
+        :returns: List of lines with the Prometheus text format
+        """
+
+        if not self.running:
+            return []
+        lines = []
+        lines.append("# HELP gns3_event_loop_lag_seconds Scheduling lag of the event loop")
+        lines.append("# TYPE gns3_event_loop_lag_seconds summary")
+        lag = self.percentiles()
+        for quantile, key in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"), ("1", "max")):
+            lines.append('gns3_event_loop_lag_seconds{{quantile="{}"}} {}'.format(quantile, lag[key]))
+        lines.append("# HELP gns3_event_loop_slow_callbacks_total Number of times the event loop has been blocked longer than the threshold")
+        lines.append("# TYPE gns3_event_loop_slow_callbacks_total counter")
+        lines.append("gns3_event_loop_slow_callbacks_total {}".format(self._slow_callbacks))
+        return lines
+
+    @staticmethod
+    def reset():
+        if hasattr(LoopMonitor, "_instance") and LoopMonitor._instance is not None:
+            LoopMonitor._instance.stop()
+        LoopMonitor._instance = None
+
+    @staticmethod
+    def instance():
+        """
+        Singleton to return only one instance of LoopMonitor.
+
+        :returns: instance of LoopMonitor
+        """
+
+        if not hasattr(LoopMonitor, "_instance") or LoopMonitor._instance is None:
+            LoopMonitor._instance = LoopMonitor()
+        return LoopMonitor._instance
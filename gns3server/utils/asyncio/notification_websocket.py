@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Send the notifications of a queue on a Websocket, shared by the
+notification streams of the compute and the controller.
+"""
+
+import json
+import asyncio
+import aiohttp
+
+
+@asyncio.coroutine
+def send_str(ws, data, lock):
+    """
+    Send a text message and wait until it's flushed when the write
+    buffer of the Websocket is full. A slow client slows down the
+    stream instead of buffering the notifications in memory.
+
+    :param ws: WebSocketResponse
+    :param data: Text to send
+    :param lock: Lock shared by the coroutines writing on the Websocket,
+    only one of them can wait for the buffer to be flushed
+    """
+
+    with (yield from lock):
+        drain = ws.send_str(data)
+        if drain is not None:
+            yield from drain
+
+
+@asyncio.coroutine
+def process_websocket(ws, queue, lock):
+    """
+    Process ping / pong and close message. Text messages
+    replace the notification filter of the queue.
+    """
+    try:
+        while True:
+            msg = yield from ws.receive()
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            try:
+                queue.filter.update_from_json(msg.data)
+            except ValueError as e:
+                yield from send_str(ws, json.dumps({"action": "log.error", "event": {"message": "Invalid notification filter: {}".format(e)}}), lock)
+    except aiohttp.WSServerHandshakeError:
+        pass
+
+
+@asyncio.coroutine
+def send_notifications(ws, queue, timeout):
+    """
+    Send the notifications of the queue until the Websocket is closed
+
+    :param ws: Prepared WebSocketResponse
+    :param queue: Notification queue
+    :param timeout: Send a ping notification if nothing happens during this delay
+    """
+
+    lock = asyncio.Lock()
+    asyncio.async(process_websocket(ws, queue, lock))
+    while True:
+        try:
+            notification = yield from queue.get_json(timeout)
+        except asyncio.futures.CancelledError:
+            break
+        if ws.closed:
+            break
+        yield from send_str(ws, notification, lock)
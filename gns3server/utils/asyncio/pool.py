@@ -15,38 +15,166 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import time
 import asyncio
+import collections
+
+
+class TaskResult:
+    """
+    Result of a task run by the pool
+
+    :param key: Key of the task
+    :param args: Arguments of the task
+    """
+
+    def __init__(self, key, args):
+        self.key = key
+        self.args = args
+        self.result = None
+        self.exception = None
+        self.cancelled = False
+        self.duration = None
+
+    def __repr__(self):
+        return "<TaskResult key={} duration={} exception={!r}>".format(self.key, self.duration, self.exception)
+
+
+class PoolResult:
+    """
+    Results of all the tasks of a pool, in the order they were appended
+    """
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    @property
+    def exceptions(self):
+        return [t.exception for t in self.tasks if t.exception is not None]
+
+    @property
+    def cancelled(self):
+        return [t for t in self.tasks if t.cancelled]
+
+    @property
+    def results(self):
+        return [t.result for t in self.tasks]
+
+    def raise_first_exception(self):
+        exceptions = self.exceptions
+        if exceptions:
+            raise exceptions[0]
 
 
 class Pool():
     """
     Limit concurrency for running parallel tasks
+
+    :param concurrency: Maximum number of tasks running in parallel
+    :param key_concurrency: Maximum number of tasks with the same key running in parallel (for example one compute)
+    :param fail_fast: Cancel the other tasks after the first error
     """
 
-    def __init__(self, concurrency=5):
-        self._tasks = []
+    def __init__(self, concurrency=5, key_concurrency=None, fail_fast=False):
+        # Tasks waiting to run, by key
+        self._queues = collections.OrderedDict()
+        self._results = []
         self._concurrency = concurrency
+        self._key_concurrency = key_concurrency
+        self._fail_fast = fail_fast
+
+    def append(self, task, *args, key=None, **kwargs):
+        """
+        Add a task to the pool
+
+        :param task: Coroutine function
+        :param key: Tasks with the same key are limited by key_concurrency
+        """
+
+        result = TaskResult(key, args)
+        self._results.append(result)
+        self._queues.setdefault(key, collections.deque()).append((result, task, args, kwargs))
 
-    def append(self, task, *args, **kwargs):
-        self._tasks.append((task, args, kwargs))
+    def _can_run(self, key, running):
+        return self._key_concurrency is None or running.get(key, 0) < self._key_concurrency
 
     @asyncio.coroutine
-    def join(self):
+    def join(self, raise_exception=True):
         """
         Wait for all task to finish
+
+        :param raise_exception: Raise the first exception after all the tasks are finished
+        :returns: PoolResult
+        """
+
+        pending = {}
+        running = {}
+        failed = False
+        while self._queues or pending:
+            # Start tasks from each key in turn so a key with many tasks doesn't delay the others
+            started = True
+            while started and len(pending) < self._concurrency:
+                started = False
+                for key in list(self._queues):
+                    if len(pending) >= self._concurrency:
+                        break
+                    if not self._can_run(key, running):
+                        continue
+                    queue = self._queues[key]
+                    result, task, args, kwargs = queue.popleft()
+                    if not queue:
+                        del self._queues[key]
+                    future = asyncio.async(task(*args, **kwargs))
+                    pending[future] = (result, time.monotonic())
+                    running[key] = running.get(key, 0) + 1
+                    started = True
+
+            (done, _) = yield from asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                result, start = pending.pop(future)
+                running[result.key] -= 1
+                result.duration = time.monotonic() - start
+                if future.cancelled():
+                    result.cancelled = True
+                elif future.exception():
+                    result.exception = future.exception()
+                    failed = True
+                else:
+                    result.result = future.result()
+
+            if failed and self._fail_fast:
+                yield from self._cancel(pending)
+                pending = {}
+
+        pool_result = PoolResult(self._results)
+        self._results = []
+        if raise_exception:
+            pool_result.raise_first_exception()
+        return pool_result
+
+    @asyncio.coroutine
+    def _cancel(self, pending):
         """
-        pending = set()
-        exceptions = set()
-        while len(self._tasks) > 0 or len(pending) > 0:
-            while len(self._tasks) > 0 and len(pending) < self._concurrency:
-                task, args, kwargs = self._tasks.pop(0)
-                pending.add(task(*args, **kwargs))
-            (done, pending) = yield from asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
-            for task in done:
-                if task.exception():
-                    exceptions.add(task.exception())
-        if len(exceptions) > 0:
-            raise exceptions.pop()
+        Cancel the running tasks and drop the tasks not yet started
+        """
+
+        for future in pending:
+            future.cancel()
+        if pending:
+            yield from asyncio.wait(list(pending))
+        for future, (result, start) in pending.items():
+            result.duration = time.monotonic() - start
+            # The task can finish before the cancellation
+            if future.cancelled():
+                result.cancelled = True
+            elif future.exception():
+                result.exception = future.exception()
+            else:
+                result.result = future.result()
+        for queue in self._queues.values():
+            for result, task, args, kwargs in queue:
+                result.cancelled = True
+        self._queues.clear()
 
 
 def main():
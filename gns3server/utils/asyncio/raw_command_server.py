@@ -86,7 +86,7 @@ class AsyncioRawCommandServer:
             for coro in done:
                 data = coro.result()
                 if coro == network_read:
-                    if network_reader.at_eof():
+                    if not data:  # EOF, the last chunk of data can be received with the EOF
                         raise ConnectionResetError()
 
                     network_read = asyncio.async(network_reader.read(READ_SIZE))
@@ -94,7 +94,7 @@ class AsyncioRawCommandServer:
                     process_writer.write(data)
                     yield from process_writer.drain()
                 elif coro == reader_read:
-                    if process_reader.at_eof():
+                    if not data:
                         raise ConnectionResetError()
 
                     reader_read = asyncio.async(process_reader.read(READ_SIZE))
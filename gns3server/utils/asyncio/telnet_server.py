@@ -301,7 +301,8 @@ class AsyncioTelnetServer:
         except IndexError:
             op = yield from reader.read(1)
             buffer.extend(op)
-            cmd.append(buffer[location])
+            op = buffer[location]
+            cmd.append(op)
             return op
 
     def _negotiate(self, data, connection):
@@ -325,7 +326,8 @@ class AsyncioTelnetServer:
         :returns: buffer minus Telnet commands
         """
 
-
+        # A command split between two reads is completed from the network
+        buf = bytearray(buf)
         skip_to = 0
         while True:
             # Locate an IAC to process
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Copy of files and directories. The files are cloned when the filesystem
+supports it (reflink on btrfs, XFS...), the copy shares the data with
+the original file until one of them is modified. Otherwise the data is
+copied without filling the holes of the sparse files like the disks.
+"""
+
+import os
+import sys
+import errno
+import shutil
+import asyncio
+
+from .asyncio import wait_run_in_executor
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# ioctl cloning a file on Linux (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# Size of the reads when the data is copied
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Number of files copied at the same time
+COPY_PARALLELISM = 4
+
+
+def copy_file(src, dst):
+    """
+    Copy a file with its permissions and modification time
+
+    :param src: Source file
+    :param dst: Destination file
+    :returns: True if the file was cloned by the filesystem
+    """
+
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+        return False
+
+    with open(src, "rb") as fsrc:
+        with open(dst, "wb") as fdst:
+            cloned = _clone(fsrc, fdst)
+            if not cloned:
+                _copy_data(fsrc, fdst)
+    shutil.copystat(src, dst)
+    return cloned
+
+
+def _clone(fsrc, fdst):
+    """
+    Clone a file with the FICLONE ioctl
+
+    :returns: False if the filesystem doesn't support it
+    """
+
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _copy_data(fsrc, fdst):
+    """
+    Copy the data of a file, the holes are not written
+    """
+
+    size = os.fstat(fsrc.fileno()).st_size
+    for start, end in _data_ranges(fsrc, size):
+        _copy_range(fsrc, fdst, start, end - start)
+    # The file ends with a hole
+    fdst.truncate(size)
+
+
+def _data_ranges(f, size):
+    """
+    Ranges of a file with data
+
+    :param f: File object
+    :param size: Size of the file
+    :returns: Iterator of (start, end), the whole file if the system can't find the holes
+    """
+
+    if not hasattr(os, "SEEK_DATA"):
+        yield 0, size
+        return
+
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(f.fileno(), offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # Only a hole until the end of the file
+                return
+            yield offset, size
+            return
+        end = os.lseek(f.fileno(), start, os.SEEK_HOLE)
+        yield start, end
+        offset = end
+
+
+def _copy_range(fsrc, fdst, offset, count):
+    """
+    Copy a range of a file, in the kernel with copy_file_range (Python 3.8+)
+    if available
+    """
+
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            while count > 0:
+                copied = copy_file_range(fsrc.fileno(), fdst.fileno(), count, offset, offset)
+                if copied == 0:
+                    return
+                offset += copied
+                count -= copied
+            return
+        except OSError as e:
+            # Not supported between these filesystems
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL):
+                raise
+
+    fsrc.seek(offset)
+    fdst.seek(offset)
+    while count > 0:
+        data = fsrc.read(min(COPY_BUFFER_SIZE, count))
+        if not data:
+            return
+        fdst.write(data)
+        count -= len(data)
+
+
+@asyncio.coroutine
+def copy_tree(src, dst, ignore=None, parallelism=COPY_PARALLELISM):
+    """
+    Copy a directory, the files are copied in parallel in threads
+
+    :param src: Source directory
+    :param dst: Destination directory, created if it doesn't exist
+    :param ignore: Function called with the path of a file or directory of the source, return True to skip it
+    :param parallelism: Number of files copied at the same time
+    :returns: Number of files cloned by the filesystem
+    """
+
+    files = []
+    for root, dirs, filenames in os.walk(src):
+        if ignore is not None:
+            dirs[:] = [d for d in dirs if not ignore(os.path.join(root, d))]
+            filenames = [f for f in filenames if not ignore(os.path.join(root, f))]
+        directory = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(directory, exist_ok=True)
+        for filename in filenames:
+            files.append((os.path.join(root, filename), os.path.join(directory, filename)))
+
+    def copy_files(files):
+        return sum(copy_file(file_src, file_dst) for file_src, file_dst in files)
+
+    cloned = yield from asyncio.gather(*[wait_run_in_executor(copy_files, files[i::parallelism]) for i in range(parallelism)])
+    cloned = sum(cloned)
+    log.debug("%d files copied from %s to %s, %d cloned", len(files), src, dst, cloned)
+    return cloned
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import time
+import threading
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Innermost frames of a thread waiting for work, these samples
+# are dropped when idle threads are ignored
+IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get")
+}
+
+
+class ProfilerError(Exception):
+    pass
+
+
+class Profiler:
+    """
+    Sampling profiler. A thread captures at regular interval the
+    stack of all the other threads (the event loop and the executor threads)
+    without any instrumentation of the profiled code.
+
+    The result can be exported as collapsed stacks, the input
+    format of the flamegraph tools.
+    """
+
+    MAX_DURATION = 600
+
+    def __init__(self):
+        self._thread = None
+        self._stopped = threading.Event()
+        self._reset(0.005, 0, True)
+
+    def _reset(self, interval, duration, ignore_idle):
+        self._interval = interval
+        self._duration = duration
+        self._ignore_idle = ignore_idle
+        self._stacks = {}
+        self._samples = 0
+        self._start_time = None
+        self._end_time = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def samples(self):
+        return self._samples
+
+    def start(self, duration=30, interval=0.005, ignore_idle=True):
+        """
+        Start the profiler, it will stop automatically after the duration
+
+        :param duration: Maximum duration of the profiling in seconds
+        :param interval: Interval between two samples in seconds
+        :param ignore_idle: Drop the samples of the threads waiting for work
+        """
+
+        if self.running:
+            raise ProfilerError("The profiler is already running")
+        if duration <= 0 or duration > self.MAX_DURATION:
+            raise ProfilerError("The profiling duration must be between 0 and {} seconds".format(self.MAX_DURATION))
+        self._reset(interval, duration, ignore_idle)
+        self._stopped.clear()
+        self._start_time = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="Profiler", daemon=True)
+        self._thread.start()
+        log.info("Profiler started for {} seconds".format(duration))
+
+    def stop(self):
+        """
+        Stop the profiler if running and return the result
+
+        :returns: Profiler instance
+        """
+
+        if self._start_time is None:
+            raise ProfilerError("The profiler has not been started")
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _run(self):
+        thread_id = threading.get_ident()
+        deadline = self._start_time + self._duration
+        while not self._stopped.wait(self._interval) and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == thread_id:
+                    continue
+                self._sample(names.get(ident, str(ident)), frame)
+            self._samples += 1
+        self._end_time = time.monotonic()
+        log.info("Profiler stopped after {} samples".format(self._samples))
+
+    def _sample(self, thread_name, frame):
+        stack = []
+        leaf = frame
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        if self._ignore_idle and (os.path.basename(leaf.f_code.co_filename), leaf.f_code.co_name) in IDLE_FUNCTIONS:
+            return
+        stack.reverse()
+        key = (thread_name, tuple(stack))
+        self._stacks[key] = self._stacks.get(key, 0) + 1
+
+    @staticmethod
+    def _frame_name(frame):
+        filename, line, name = frame
+        return "{} ({}:{})".format(name, os.path.basename(filename), line)
+
+    def collapsed(self):
+        """
+        :returns: Samples as collapsed stacks (one line per stack: thread;frame1;frame2 count)
+        """
+
+        lines = []
+        for (thread_name, stack), count in sorted(list(self._stacks.items()), key=lambda item: item[1], reverse=True):
+            frames = [thread_name.replace(";", ":")] + [self._frame_name(f).replace(";", ":") for f in stack]
+            lines.append("{} {}".format(";".join(frames), count))
+        return "\n".join(lines)
+
+    def top(self, count=20):
+        """
+        :param count: Number of functions returned
+        :returns: Functions with the most samples, self is the number of samples
+        where the function was running and total where the function was in the stack
+        """
+
+        functions = {}
+        for (thread_name, stack), samples in list(self._stacks.items()):
+            for f in set(stack):
+                functions.setdefault(f, {"self": 0, "total": 0})
+                functions[f]["total"] += samples
+            functions[stack[-1]]["self"] += samples
+
+        result = []
+        for f, counters in sorted(functions.items(), key=lambda item: (item[1]["self"], item[1]["total"]), reverse=True)[:count]:
+            result.append({
+                "function": f[2],
+                "filename": f[0],
+                "line": f[1],
+                "self": counters["self"],
+                "total": counters["total"]
+            })
+        return result
+
+    def __json__(self):
+        end_time = self._end_time or time.monotonic()
+        return {
+            "running": self.running,
+            "samples": self._samples,
+            "interval": self._interval,
+            "duration": round(end_time - self._start_time, 3) if self._start_time else 0,
+            "collapsed": self.collapsed(),
+            "top": self.top()
+        }
+
+    @staticmethod
+    def instance():
+        """
+        Singleton to return only one instance of Profiler.
+
+        :returns: instance of Profiler
+        """
+
+        if not hasattr(Profiler, "_instance") or Profiler._instance is None:
+            Profiler._instance = Profiler()
+        return Profiler._instance
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import os
+import time
+import weakref
+import asyncio
+import binascii
+import collections
+
+
+# Headers sent by the controller to the computes
+TRACE_ID_HEADER = "X-GNS3-Trace-Id"
+PARENT_SPAN_ID_HEADER = "X-GNS3-Parent-Span-Id"
+
+_VALID_ID = re.compile(r"^[0-9a-zA-Z-]{1,64}$")
+
+# Span currently running in each task
+_current_spans = weakref.WeakKeyDictionary()
+
+
+def _new_id():
+    return binascii.hexlify(os.urandom(8)).decode()
+
+
+class Span:
+    """
+    Timing of one operation of a trace
+
+    :param name: Name of the operation
+    :param trace_id: Identifier of the trace, a new trace is created if None
+    :param parent_id: Identifier of the parent span
+    :param kind: server for a received request, client for a request sent to a compute
+    """
+
+    def __init__(self, name, trace_id=None, parent_id=None, kind="server"):
+        if trace_id is None or not _VALID_ID.match(trace_id):
+            trace_id = _new_id()
+        if parent_id is not None and not _VALID_ID.match(parent_id):
+            parent_id = None
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_time = time.time()
+        self._start = time.monotonic()
+        self.duration = None
+        self.tags = {}
+
+    def finish(self, **tags):
+        """
+        Stop the timer and save the span in the trace store
+
+        :param tags: Informations about the result of the operation
+        """
+        self.duration = time.monotonic() - self._start
+        self.tags.update(tags)
+        TraceStore.instance().add(self)
+
+    def child(self, name, kind="client"):
+        """
+        :returns: A new span of the same trace
+        """
+        return Span(name, trace_id=self.trace_id, parent_id=self.span_id, kind=kind)
+
+    def headers(self):
+        """
+        :returns: HTTP headers to propagate the trace to a compute
+        """
+        return {
+            TRACE_ID_HEADER: self.trace_id,
+            PARENT_SPAN_ID_HEADER: self.span_id
+        }
+
+    def __json__(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "tags": self.tags
+        }
+
+
+def current_span():
+    """
+    :returns: The span of the current task or None
+    """
+    try:
+        task = asyncio.Task.current_task()
+    except RuntimeError:  # No event loop
+        return None
+    if task is None:
+        return None
+    span = _current_spans.get(task)
+    if span is not None and span.duration is not None:
+        # The request which started the task is finished, the
+        # task is running in background and is not part of it
+        del _current_spans[task]
+        return None
+    return span
+
+
+def set_current_span(span):
+    """
+    Set the span of the current task
+
+    :returns: The previous span
+    """
+    task = asyncio.Task.current_task()
+    if task is None:
+        return None
+    previous = _current_spans.get(task)
+    if span is None:
+        _current_spans.pop(task, None)
+    else:
+        _current_spans[task] = span
+    return previous
+
+
+def install(loop):
+    """
+    Propagate the current span to the tasks created
+    by a task (for example when starting nodes in parallel).
+
+    The span stops being propagated when it's finished, a task
+    outliving the request doesn't collect unrelated spans. A long-lived
+    task started during a request must call set_current_span(None).
+    """
+
+    if loop.get_task_factory() is not None:
+        return
+
+    def task_factory(loop, coro):
+        task = asyncio.Task(coro, loop=loop)
+        parent = current_span()
+        if parent is not None:
+            _current_spans[task] = parent
+        return task
+
+    loop.set_task_factory(task_factory)
+
+
+class TraceStore:
+    """
+    Keep in memory the spans of the last traces
+
+    :param max_traces: Maximum number of traces kept
+    :param max_spans: Maximum number of spans kept by trace
+    """
+
+    def __init__(self, max_traces=1000, max_spans=500):
+        self._max_traces = max_traces
+        self._max_spans = max_spans
+        self._traces = collections.OrderedDict()
+
+    def add(self, span):
+        spans = self._traces.get(span.trace_id)
+        if spans is None:
+            spans = []
+            self._traces[span.trace_id] = spans
+            if len(self._traces) > self._max_traces:
+                self._traces.popitem(last=False)
+        else:
+            self._traces.move_to_end(span.trace_id)
+        if len(spans) < self._max_spans:
+            spans.append(span)
+
+    def get(self, trace_id):
+        """
+        :returns: List of spans of the trace (empty if unknown)
+        """
+        return list(self._traces.get(trace_id, []))
+
+    def slow_traces(self, min_duration=0, limit=20):
+        """
+        :param min_duration: Minimum duration of the trace in seconds
+        :param limit: Maximum number of traces returned
+        :returns: Summary of the slowest traces, slowest first
+        """
+
+        result = []
+        for trace_id, spans in self._traces.items():
+            root = max(spans, key=lambda s: s.duration)
+            if root.duration >= min_duration:
+                result.append({
+                    "trace_id": trace_id,
+                    "name": root.name,
+                    "start_time": min(s.start_time for s in spans),
+                    "duration": root.duration,
+                    "spans": len(spans)
+                })
+        result.sort(key=lambda t: t["duration"], reverse=True)
+        return result[:limit]
+
+    @staticmethod
+    def reset():
+        TraceStore._instance = None
+
+    @staticmethod
+    def instance():
+        """
+        Singleton to return only one instance of TraceStore.
+
+        :returns: instance of TraceStore
+        """
+
+        if not hasattr(TraceStore, "_instance") or TraceStore._instance is None:
+            TraceStore._instance = TraceStore()
+        return TraceStore._instance
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bisect
+import psutil
+
+from ..utils.asyncio.loop_monitor import LoopMonitor
+
+
+# Buckets of the histograms in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Histogram of values with fixed buckets. Counts are stored per
+    bucket and made cumulative only when exported.
+
+    :param buckets: Sorted upper bounds of the buckets
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        # The last slot is the +Inf bucket
+        self._counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_buckets(self):
+        """
+        :returns: List of (upper bound, number of observations lower or equal)
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self._buckets, self._counts):
+            total += count
+            result.append((bound, total))
+        result.append((float("inf"), self.count))
+        return result
+
+
+class RouteMetrics:
+    """
+    Metrics of one route of the API
+
+    :param method: HTTP method
+    :param route: Route path as declared by the handler
+    """
+
+    def __init__(self, method, route):
+        self.method = method
+        self.route = route
+        self.in_flight = 0
+        self.status_codes = {}
+        self.latency = Histogram()
+        self.lock_wait = Histogram()
+
+    def record(self, status, duration):
+        """
+        Record a finished request
+
+        :param status: HTTP status code of the response
+        :param duration: Duration of the request in seconds
+        """
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        self.latency.observe(duration)
+
+    def __json__(self):
+        return {
+            "method": self.method,
+            "route": self.route,
+            "in_flight": self.in_flight,
+            "status_codes": {str(status): count for status, count in self.status_codes.items()},
+            "count": self.latency.count,
+            "latency_sum": self.latency.sum,
+            "lock_wait_sum": self.lock_wait.sum
+        }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    return "{" + ",".join('{}="{}"'.format(k, _escape(v)) for k, v in labels) + "}"
+
+
+def _format_bound(bound):
+    if bound == float("inf"):
+        return "+Inf"
+    return repr(float(bound))
+
+
+class Metrics:
+    """
+    Registry of the metrics of all the routes of the server
+    """
+
+    def __init__(self):
+        self._routes = []
+
+    def add_route(self, method, route):
+        """
+        Register a route, called only once when the route is declared
+
+        :returns: RouteMetrics instance updated by the route
+        """
+        metrics = RouteMetrics(method, route)
+        self._routes.append(metrics)
+        return metrics
+
+    @property
+    def routes(self):
+        return self._routes
+
+    def prometheus(self):
+        """
+        :returns: Metrics in the Prometheus text exposition format
+        """
+
+        lines = []
+        used_routes = [r for r in self._routes if r.latency.count or r.in_flight]
+
+        lines.append("# HELP gns3_http_requests_total Number of HTTP requests processed")
+        lines.append("# TYPE gns3_http_requests_total counter")
+        for r in used_routes:
+            for status, count in sorted(r.status_codes.items()):
+                lines.append("gns3_http_requests_total{} {}".format(_format_labels((("method", r.method), ("route", r.route), ("status", status))), count))
+
+        lines.append("# HELP gns3_http_requests_in_flight Number of HTTP requests in progress")
+        lines.append("# TYPE gns3_http_requests_in_flight gauge")
+        for r in used_routes:
+            lines.append("gns3_http_requests_in_flight{} {}".format(_format_labels((("method", r.method), ("route", r.route))), r.in_flight))
+
+        self._histogram(lines, "gns3_http_request_duration_seconds", "Duration of HTTP requests", used_routes, "latency")
+        self._histogram(lines, "gns3_http_node_lock_wait_seconds", "Time spent waiting for the node lock", [r for r in used_routes if r.lock_wait.count], "lock_wait")
+
+        lines.extend(LoopMonitor.instance().prometheus())
+
+        process = psutil.Process()
+        cpu_times = process.cpu_times()
+        lines.append("# HELP process_cpu_seconds_total Total user and system CPU time spent in seconds")
+        lines.append("# TYPE process_cpu_seconds_total counter")
+        lines.append("process_cpu_seconds_total {}".format(cpu_times.user + cpu_times.system))
+        lines.append("# HELP process_resident_memory_bytes Resident memory size in bytes")
+        lines.append("# TYPE process_resident_memory_bytes gauge")
+        lines.append("process_resident_memory_bytes {}".format(process.memory_info().rss))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram(lines, name, description, routes, attribute):
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} histogram".format(name))
+        for r in routes:
+            histogram = getattr(r, attribute)
+            labels = (("method", r.method), ("route", r.route))
+            for bound, count in histogram.cumulative_buckets():
+                lines.append("{}_bucket{} {}".format(name, _format_labels(labels + (("le", _format_bound(bound)),)), count))
+            lines.append("{}_sum{} {}".format(name, _format_labels(labels), histogram.sum))
+            lines.append("{}_count{} {}".format(name, _format_labels(labels), histogram.count))
@@ -26,12 +26,18 @@ import jinja2
 import sys
 import os
 
+from aiohttp.web_fileresponse import SendfilePayloadWriter, NOSENDFILE
+
 from ..utils.get_resource import get_resource
+from ..utils.asyncio import wait_run_in_executor
 from ..version import __version__
 
 log = logging.getLogger(__name__)
 renderer = jinja2.Environment(loader=jinja2.FileSystemLoader(get_resource('templates')))
 
+# Size of the reads when a file can't be sent with sendfile
+FILE_CHUNK_SIZE = 256 * 1024
+
 
 class Response(aiohttp.web.Response):
 
@@ -113,42 +119,143 @@ class Response(aiohttp.web.Response):
         self.body = json.dumps(answer, indent=4, sort_keys=True).encode('utf-8')
 
     @asyncio.coroutine
-    def file(self, path, status=200, set_content_length=True):
+    def file(self, path, status=200, set_content_length=True, content_type=None):
         """
-        Return a file as a response
-        """
-        ct, encoding = mimetypes.guess_type(path)
-        if not ct:
-            ct = 'application/octet-stream'
-        if encoding:
-            self.headers[aiohttp.hdrs.CONTENT_ENCODING] = encoding
-        self.content_type = ct
+        Return a file as a response. The file is sent by the kernel
+        (sendfile) when possible and the Range requests are supported.
 
-        if set_content_length:
-            st = os.stat(path)
-            self.last_modified = st.st_mtime
-            self.headers[aiohttp.hdrs.CONTENT_LENGTH] = str(st.st_size)
-        else:
-            self.enable_chunked_encoding()
+        :param path: Path of the file
+        :param status: HTTP status
+        :param set_content_length: False to send the file with chunked encoding
+        :param content_type: Content type, guessed from the file name if None
+        """
 
-        self.set_status(status)
+        if content_type is None:
+            ct, encoding = mimetypes.guess_type(path)
+            if not ct:
+                ct = 'application/octet-stream'
+            if encoding:
+                self.headers[aiohttp.hdrs.CONTENT_ENCODING] = encoding
+            content_type = ct
+        self.content_type = content_type
 
         try:
             with open(path, 'rb') as fobj:
-                yield from self.prepare(self._request)
+                st = os.fstat(fobj.fileno())
+                if not set_content_length:
+                    self.enable_chunked_encoding()
+                    self.set_status(status)
+                    yield from self._send_data(fobj, st.st_size)
+                    return
 
-                while True:
-                    data = fobj.read(4096)
-                    if not data:
-                        break
-                    yield from self.write(data)
-                    yield from self.drain()
+                self.last_modified = st.st_mtime
+                self.headers[aiohttp.hdrs.ACCEPT_RANGES] = "bytes"
+                start, count = self._range(st.st_size)
+                if count != st.st_size:
+                    status = aiohttp.web.HTTPPartialContent.status_code
+                    self.headers[aiohttp.hdrs.CONTENT_RANGE] = "bytes {}-{}/{}".format(start, start + count - 1, st.st_size)
+                self.headers[aiohttp.hdrs.CONTENT_LENGTH] = str(count)
+                self.set_status(status)
+
+                fobj.seek(start)
+                if count and self._can_sendfile():
+                    writer = self._request._protocol.writer.replace(self._request._writer, SendfilePayloadWriter)
+                    self._request._writer = writer
+                    yield from self.prepare(self._request)
+                    yield from writer.sendfile(fobj, count)
+                else:
+                    yield from self._send_data(fobj, count)
 
         except FileNotFoundError:
             raise aiohttp.web.HTTPNotFound()
         except PermissionError:
             raise aiohttp.web.HTTPForbidden()
 
+    def _range(self, size):
+        """
+        Part of the file requested with the Range header
+
+        :param size: Size of the file
+        :returns: Tuple (start, count)
+        """
+
+        try:
+            rng = self._request.http_range
+        except ValueError:
+            # The range is ignored
+            return 0, size
+        start, end = rng.start, rng.stop
+        if start is None and end is None:
+            return 0, size
+
+        if start is None:
+            # Tail of the file
+            start = max(size + end, 0)
+            end = size
+        elif end is None or end > size:
+            end = size
+
+        if start >= size:
+            raise aiohttp.web.HTTPRequestRangeNotSatisfiable(headers={aiohttp.hdrs.CONTENT_RANGE: "bytes */{}".format(size)})
+        return start, end - start
+
+    def _can_sendfile(self):
+        """
+        :returns: True if the file can be sent with the sendfile system call
+        """
+
+        if not hasattr(os, "sendfile") or NOSENDFILE:
+            return False
+        transport = self._request.transport
+        return transport.get_extra_info("socket") is not None and not transport.get_extra_info("sslcontext")
+
+    @asyncio.coroutine
+    def _send_data(self, fobj, count):
+        """
+        Send the file without sendfile, the file is read in a thread
+        """
+
+        yield from self.prepare(self._request)
+        while count > 0:
+            data = yield from wait_run_in_executor(fobj.read, min(FILE_CHUNK_SIZE, count))
+            if not data:
+                break
+            yield from self.write(data)
+            yield from self.drain()
+            count -= len(data)
+
+    @asyncio.coroutine
+    def stream(self, stream):
+        """
+        Send the data read with stream.readchunk() with chunked encoding.
+
+        The headers are already sent when an error occurs while reading the
+        stream (for example the download of a file from a compute fails),
+        the connection is aborted so the client can't take the truncated
+        data for a complete response.
+
+        :param stream: Object with a readchunk() coroutine and a cancel() method like an aiozipstream.ZipFile
+        """
+
+        self.enable_chunked_encoding()
+        yield from self.prepare(self._request)
+        try:
+            while True:
+                data = yield from stream.readchunk()
+                if not data:
+                    break
+                self.write(data)
+                yield from self.drain()
+        except (aiohttp.web.HTTPException, aiohttp.ClientError, asyncio.TimeoutError, OSError, RuntimeError) as e:
+            log.error("Error while sending the response to {} {}: {}".format(self._request.method, self._request.path, e))
+            if self._request.transport is not None:
+                self._request.transport.abort()
+            return
+        finally:
+            # The client can close the connection before the end
+            stream.cancel()
+        yield from self.write_eof()
+
     def redirect(self, url):
         """
         Redirect to url
@@ -17,6 +17,7 @@
 
 import sys
 import json
+import time
 import urllib
 import asyncio
 import aiohttp
@@ -32,6 +33,8 @@ from ..controller.controller_error import ControllerError
 from ..ubridge.ubridge_error import UbridgeError
 from ..controller.gns3vm.gns3_vm_error import GNS3VMError
 from .response import Response
+from .metrics import Metrics
+from ..utils import tracing
 from ..crash_report import CrashReport
 from ..config import Config
 
@@ -77,6 +80,7 @@ class Route(object):
 
     _routes = []
     _documentation = {}
+    _metrics = Metrics()
 
     _node_locks = {}
 
@@ -241,6 +245,8 @@ class Route(object):
 
                 return response
 
+            route_metrics = cls._metrics.add_route(method, route)
+
             @asyncio.coroutine
             def node_concurrency(request):
                 """
@@ -248,6 +254,29 @@ class Route(object):
                 between the same instance of the node
                 """
 
+                # The controller send the trace of the request to the compute
+                span = tracing.Span("{} {}".format(method, route),
+                                    trace_id=request.headers.get(tracing.TRACE_ID_HEADER),
+                                    parent_id=request.headers.get(tracing.PARENT_SPAN_ID_HEADER))
+                previous_span = tracing.set_current_span(span)
+                status = None
+
+                start = time.monotonic()
+                route_metrics.in_flight += 1
+                try:
+                    response = yield from node_lock(request)
+                    status = response.status
+                    if not response.prepared:
+                        response.headers[tracing.TRACE_ID_HEADER] = span.trace_id
+                finally:
+                    route_metrics.in_flight -= 1
+                    tracing.set_current_span(previous_span)
+                    span.finish(status=status, path=request.path)
+                route_metrics.record(response.status, time.monotonic() - start)
+                return response
+
+            @asyncio.coroutine
+            def node_lock(request):
                 if "node_id" in request.match_info:
                     node_id = request.match_info.get("node_id")
 
@@ -259,7 +288,9 @@ class Route(object):
                     cls._node_locks.setdefault(lock_key, {"lock": asyncio.Lock(), "concurrency": 0})
                     cls._node_locks[lock_key]["concurrency"] += 1
 
+                    wait_start = time.monotonic()
                     with (yield from cls._node_locks[lock_key]["lock"]):
+                        route_metrics.lock_wait.observe(time.monotonic() - wait_start)
                         response = yield from control_schema(request)
                     cls._node_locks[lock_key]["concurrency"] -= 1
 
@@ -282,3 +313,7 @@ class Route(object):
     @classmethod
     def get_documentation(cls):
         return cls._documentation
+
+    @classmethod
+    def get_metrics(cls):
+        return cls._metrics
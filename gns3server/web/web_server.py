@@ -35,6 +35,8 @@ from ..compute import MODULES
 from ..compute.port_manager import PortManager
 from ..compute.qemu import Qemu
 from ..controller import Controller
+from ..utils.asyncio.loop_monitor import LoopMonitor
+from ..utils import tracing
 
 # do not delete this import
 import gns3server.handlers
@@ -111,6 +113,7 @@ class WebServer:
             yield from self._app.cleanup()
 
         yield from Controller.instance().stop()
+        LoopMonitor.instance().stop()
 
         for module in MODULES:
             log.debug("Unloading module {}".format(module.__name__))
@@ -238,6 +241,8 @@ class WebServer:
             ssl_context = self._create_ssl_context(server_config)
 
         self._loop = asyncio.get_event_loop()
+        # Propagate the request traces to the tasks started by the handlers
+        tracing.install(self._loop)
 
         if log.getEffectiveLevel() == logging.DEBUG:
             # On debug version we enable info that
@@ -247,6 +252,9 @@ class WebServer:
         for key, val in os.environ.items():
             log.debug("ENV %s=%s", key, val)
 
+        if server_config.getboolean("event_loop_monitor", True):
+            LoopMonitor.instance().start(self._loop, threshold=server_config.getfloat("slow_callback_duration", 0.1))
+
         self._app = aiohttp.web.Application()
         # Background task started with the server
         self._app.on_startup.append(self._on_startup)
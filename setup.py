@@ -50,6 +50,10 @@ setup(
     description="GNS3 server",
     long_description=open("README.rst", "r").read(),
     install_requires=dependencies,
+    extras_require={
+        # Project archives compressed with zstd
+        "zstd": ["zstandard>=0.8.0"]
+    },
     entry_points={
         "console_scripts": [
             "gns3server = gns3server.main:main",
@@ -57,7 +61,7 @@ setup(
             "gns3loopback = gns3server.utils.windows_loopback:main"
         ]
     },
-    packages=find_packages(".", exclude=["docs", "tests"]),
+    packages=find_packages(".", exclude=["docs", "tests", "benchmarks"]),
     include_package_data=True,
     zip_safe=False,
     platforms="any",
@@ -18,6 +18,7 @@
 import uuid
 
 from gns3server.compute.notification_manager import NotificationManager
+from gns3server.notification_filter import NotificationFilter
 
 
 def test_queue(async_run):
@@ -86,3 +87,18 @@ def test_queue_ping(async_run):
         assert res[0] == "ping"
         assert res[1]["cpu_usage_percent"] is not None
     assert len(notifications._listeners) == 0
+
+
+def test_queue_filter(async_run):
+    NotificationManager.reset()
+    project_id = str(uuid.uuid4())
+    notifications = NotificationManager.instance()
+    with notifications.queue(NotificationFilter(project_ids=[project_id])) as queue:
+        res = async_run(queue.get(5))
+        assert res[0] == "ping"
+
+        notifications.emit("test", {"a": 1}, project_id=str(uuid.uuid4()))
+        notifications.emit("test", {"a": 2}, project_id=project_id)
+        res = async_run(queue.get(5))
+        assert res == ('test', {"a": 2}, {"project_id": project_id})
+        assert queue.empty()
@@ -27,7 +27,7 @@ from uuid import uuid4
 from unittest.mock import patch
 
 from tests.utils import asyncio_patch
-from gns3server.compute.project import Project
+from gns3server.compute.project import Project, FILES_CACHE
 from gns3server.compute.notification_manager import NotificationManager
 from gns3server.compute.vpcs import VPCS, VPCSVM
 from gns3server.config import Config
@@ -175,6 +175,63 @@ def test_list_files(tmpdir, loop):
         ]
 
 
+def test_list_files_cache(tmpdir, loop):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = Project(project_id=str(uuid4()))
+    path = project.path
+    with open(os.path.join(path, "a.txt"), "w+") as f:
+        f.write("test")
+    with open(os.path.join(path, "b.txt"), "w+") as f:
+        f.write("test2")
+
+    files = loop.run_until_complete(asyncio.async(project.list_files()))
+    assert os.path.exists(os.path.join(path, FILES_CACHE))
+
+    # Only the modified file is hashed again
+    with open(os.path.join(path, "b.txt"), "w+") as f:
+        f.write("test3")
+    os.utime(os.path.join(path, "b.txt"), ns=(0, 0))
+    with patch("gns3server.compute.project.Project._hash_file", return_value="aaaa") as mock:
+        files = loop.run_until_complete(asyncio.async(project.list_files()))
+        mock.assert_called_once_with(os.path.join(path, "b.txt"))
+    assert sorted(files, key=lambda f: f["path"]) == [
+        {"path": "a.txt", "md5sum": "098f6bcd4621d373cade4e832627b4f6"},
+        {"path": "b.txt", "md5sum": "aaaa"}
+    ]
+
+
+def test_list_files_without_md5sum(tmpdir, loop):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = Project(project_id=str(uuid4()))
+    with open(os.path.join(project.path, "test.txt"), "w+") as f:
+        f.write("test")
+
+    with patch("gns3server.compute.project.Project._hash_file") as mock:
+        files = loop.run_until_complete(asyncio.async(project.list_files(md5sum=False)))
+        assert not mock.called
+    assert files == [{"path": "test.txt"}]
+
+
+
+def test_duplicate_files_outside_project(tmpdir, async_run):
+    """
+    The ids of the nodes can't rename a directory outside of the project
+    """
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = Project(project_id=str(uuid4()))
+        new_project = Project(project_id=str(uuid4()))
+    os.makedirs(os.path.join(project.path, "project-files", "qemu"))
+
+    with pytest.raises(aiohttp.web.HTTPForbidden):
+        async_run(project.duplicate_files(new_project, {"../../..": str(uuid4())}))
+    with pytest.raises(aiohttp.web.HTTPForbidden):
+        async_run(project.duplicate_files(new_project, {str(uuid4()): "../../../victim"}))
+    assert os.path.exists(new_project.path)
+    assert not os.path.exists(os.path.join(str(tmpdir), "victim"))
+
 def test_emit(async_run):
 
     with NotificationManager.instance().queue() as queue:
@@ -26,6 +26,7 @@ from unittest.mock import patch, MagicMock
 from gns3server.controller.project import Project
 from gns3server.controller.compute import Compute, ComputeError, ComputeConflict
 from gns3server.version import __version__
+from gns3server.utils import tracing
 from tests.utils import asyncio_patch, AsyncioMagicMock
 
 
@@ -86,6 +87,16 @@ def test_compute_httpQuery(compute, async_run):
         assert compute._auth is None
 
 
+def test_compute_httpQueryPayload(compute, async_run):
+    response = MagicMock()
+    payload = aiohttp.payload.get_payload(b"DATA")
+    with asyncio_patch("aiohttp.ClientSession.request", return_value=response) as mock:
+        response.status = 200
+
+        async_run(compute.post("/projects/test/files/test", payload))
+        mock.assert_called_with("POST", "https://example.com:84/v2/compute/projects/test/files/test", data=payload, headers={'content-type': 'application/octet-stream'}, auth=None, chunked=True, timeout=20)
+
+
 def test_compute_httpQueryAuth(compute, async_run):
     response = MagicMock()
     with asyncio_patch("aiohttp.ClientSession.request", return_value=response) as mock:
@@ -229,6 +240,18 @@ def test_connectNotification(compute, async_run):
     assert compute._connected is False
 
 
+def test_update_notification_filter(compute, controller, async_run):
+    """
+    The compute send us only notifications for the opened projects
+    """
+    opened = async_run(controller.add_project(name="Opened"))
+    async_run(controller.add_project(name="Closed", status="closed"))
+    compute._ws = MagicMock()
+    compute._ws.closed = False
+    compute.update_notification_filter()
+    compute._ws.send_str.assert_called_with(json.dumps({"project_ids": [opened.id]}))
+
+
 def test_connectNotificationPing(compute, async_run):
     """
     When we receive a ping from a compute we update
@@ -381,6 +404,8 @@ def test_list_files(project, async_run, compute):
     with asyncio_patch("aiohttp.ClientSession.request", return_value=response) as mock:
         assert async_run(compute.list_files(project)) == res
         mock.assert_any_call("GET", "https://example.com:84/v2/compute/projects/{}/files".format(project.id), auth=None, chunked=None, data=None, headers={'content-type': 'application/json'}, timeout=120)
+        async_run(compute.list_files(project, md5sum=False))
+        mock.assert_any_call("GET", "https://example.com:84/v2/compute/projects/{}/files?md5sum=0".format(project.id), auth=None, chunked=None, data=None, headers={'content-type': 'application/json'}, timeout=120)
 
 
 def test_interfaces(project, async_run, compute):
@@ -490,3 +515,45 @@ def test_get_ip_on_same_subnet(controller, async_run):
         },
     ]
     assert async_run(compute1.get_ip_on_same_subnet(compute2)) == ('192.168.2.1', '192.168.1.2')
+
+
+def test_compute_httpQueryTrace(compute, loop):
+    response = MagicMock()
+    response.status = 200
+
+    @asyncio.coroutine
+    def query():
+        span = tracing.Span("GET /v2/projects")
+        tracing.set_current_span(span)
+        yield from compute.post("/projects", {"a": "b"})
+        return span
+
+    with asyncio_patch("aiohttp.ClientSession.request", return_value=response) as mock:
+        span = loop.run_until_complete(asyncio.async(query()))
+        headers = mock.call_args[1]["headers"]
+        assert headers[tracing.TRACE_ID_HEADER] == span.trace_id
+    client_span = [s for s in tracing.TraceStore.instance().get(span.trace_id) if s.kind == "client"][0]
+    assert headers[tracing.PARENT_SPAN_ID_HEADER] == client_span.span_id
+    assert client_span.parent_id == span.span_id
+    assert client_span.tags == {"compute_id": "my_compute_id", "status": 200}
+
+
+def test_compute_httpQueryTraceReadError(compute, loop):
+    response = MagicMock()
+    response.status = 200
+    response.read = AsyncioMagicMock(side_effect=aiohttp.ClientPayloadError("Response payload is not completed"))
+
+    @asyncio.coroutine
+    def query():
+        span = tracing.Span("GET /v2/projects")
+        tracing.set_current_span(span)
+        try:
+            yield from compute.post("/projects", {"a": "b"})
+        except aiohttp.ClientPayloadError:
+            pass
+        return span
+
+    with asyncio_patch("aiohttp.ClientSession.request", return_value=response):
+        span = loop.run_until_complete(asyncio.async(query()))
+    client_span = [s for s in tracing.TraceStore.instance().get(span.trace_id) if s.kind == "client"][0]
+    assert client_span.tags == {"compute_id": "my_compute_id", "error": "Response payload is not completed"}
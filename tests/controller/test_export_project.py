@@ -18,6 +18,7 @@
 
 import os
 import json
+import uuid
 import pytest
 import aiohttp
 import zipfile
@@ -27,7 +28,9 @@ from unittest.mock import MagicMock
 from tests.utils import AsyncioMagicMock, AsyncioBytesIO
 
 from gns3server.controller.project import Project
-from gns3server.controller.export_project import export_project, _filter_files
+from gns3server.controller.export_project import export_project, write_zip, filter_files, compress_type
+from gns3server.controller.import_project import import_project
+from gns3server.utils.asyncio import aiozipstream
 
 
 @pytest.fixture
@@ -51,13 +54,13 @@ def node(controller, project, async_run):
 
 
 def test_filter_files():
-    assert not _filter_files("hello/world")
-    assert _filter_files("project-files/tmp")
-    assert _filter_files("project-files/test_log.txt")
-    assert _filter_files("project-files/test.log")
-    assert _filter_files("test/snapshots")
-    assert _filter_files("test/project-files/snapshots")
-    assert _filter_files("test/project-files/snapshots/test.gns3p")
+    assert not filter_files("hello/world")
+    assert filter_files("project-files/tmp")
+    assert filter_files("project-files/test_log.txt")
+    assert filter_files("project-files/test.log")
+    assert filter_files("test/snapshots")
+    assert filter_files("test/project-files/snapshots")
+    assert filter_files("test/project-files/snapshots/test.gns3p")
 
 
 def test_export(tmpdir, project, async_run):
@@ -103,11 +106,10 @@ def test_export(tmpdir, project, async_run):
         f.write("WORLD")
 
     with patch("gns3server.compute.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
-        z = async_run(export_project(project, str(tmpdir), include_images=False))
+        z = async_run(export_project(project, include_images=False))
 
     with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
-        for data in z:
-            f.write(data)
+        async_run(write_zip(z, f))
 
     with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
         with myzip.open("vm-1/dynamips/test") as myfile:
@@ -129,8 +131,7 @@ def test_export(tmpdir, project, async_run):
 
 def test_export_vm(tmpdir, project, async_run, controller):
     """
-    If data is on a remote server export it locally before
-    sending it in the archive.
+    If data is on a remote server it's streamed in the archive
     """
 
     compute = MagicMock()
@@ -153,12 +154,13 @@ def test_export_vm(tmpdir, project, async_run, controller):
     with open(os.path.join(path, "test.gns3"), 'w+') as f:
         f.write("{}")
 
-    z = async_run(export_project(project, str(tmpdir)))
+    z = async_run(export_project(project))
     assert compute.list_files.called
+    # The file is downloaded while the zip is read
+    assert not compute.download_file.called
 
     with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
-        for data in z:
-            f.write(data)
+        async_run(write_zip(z, f))
 
     with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
         with myzip.open("vm-1/dynamips/test") as myfile:
@@ -188,7 +190,7 @@ def test_export_disallow_running(tmpdir, project, node, async_run):
 
     node._status = "started"
     with pytest.raises(aiohttp.web.HTTPConflict):
-        async_run(export_project(project, str(tmpdir)))
+        async_run(export_project(project))
 
 
 def test_export_disallow_some_type(tmpdir, project, async_run):
@@ -212,8 +214,8 @@ def test_export_disallow_some_type(tmpdir, project, async_run):
         json.dump(topology, f)
 
     with pytest.raises(aiohttp.web.HTTPConflict):
-        z = async_run(export_project(project, str(tmpdir)))
-    z = async_run(export_project(project, str(tmpdir), allow_all_nodes=True))
+        z = async_run(export_project(project))
+    z = async_run(export_project(project, allow_all_nodes=True))
 
     # VirtualBox is always disallowed
     topology = {
@@ -231,7 +233,7 @@ def test_export_disallow_some_type(tmpdir, project, async_run):
     with open(os.path.join(path, "test.gns3"), 'w+') as f:
         json.dump(topology, f)
     with pytest.raises(aiohttp.web.HTTPConflict):
-        z = async_run(export_project(project, str(tmpdir), allow_all_nodes=True))
+        z = async_run(export_project(project, allow_all_nodes=True))
 
 
 def test_export_fix_path(tmpdir, project, async_run):
@@ -263,10 +265,9 @@ def test_export_fix_path(tmpdir, project, async_run):
     with open(os.path.join(path, "test.gns3"), 'w+') as f:
         json.dump(topology, f)
 
-    z = async_run(export_project(project, str(tmpdir)))
+    z = async_run(export_project(project))
     with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
-        for data in z:
-            f.write(data)
+        async_run(write_zip(z, f))
 
     with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
         with myzip.open("project.gns3") as myfile:
@@ -303,10 +304,9 @@ def test_export_with_images(tmpdir, project, async_run):
         json.dump(topology, f)
 
     with patch("gns3server.compute.Dynamips.get_images_directory", return_value=str(tmpdir / "IOS"),):
-        z = async_run(export_project(project, str(tmpdir), include_images=True))
+        z = async_run(export_project(project, include_images=True))
         with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
-            for data in z:
-                f.write(data)
+            async_run(write_zip(z, f))
 
     with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
         myzip.getinfo("images/IOS/test.image")
@@ -340,11 +340,10 @@ def test_export_keep_compute_id(tmpdir, project, async_run):
         }
         json.dump(data, f)
 
-    z = async_run(export_project(project, str(tmpdir), keep_compute_id=True))
+    z = async_run(export_project(project, keep_compute_id=True))
 
     with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
-        for data in z:
-            f.write(data)
+        async_run(write_zip(z, f))
 
     with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
         with myzip.open("project.gns3") as myfile:
@@ -354,8 +353,7 @@ def test_export_keep_compute_id(tmpdir, project, async_run):
 
 def test_export_images_from_vm(tmpdir, project, async_run, controller):
     """
-    If data is on a remote server export it locally before
-    sending it in the archive.
+    If data is on a remote server it's streamed in the archive
     """
 
     compute = MagicMock()
@@ -402,12 +400,11 @@ def test_export_images_from_vm(tmpdir, project, async_run, controller):
     with open(os.path.join(path, "test.gns3"), 'w+') as f:
         f.write(json.dumps(topology))
 
-    z = async_run(export_project(project, str(tmpdir), include_images=True))
+    z = async_run(export_project(project, include_images=True))
     assert compute.list_files.called
 
     with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
-        for data in z:
-            f.write(data)
+        async_run(write_zip(z, f))
 
     with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
         with myzip.open("vm-1/dynamips/test") as myfile:
@@ -417,3 +414,58 @@ def test_export_images_from_vm(tmpdir, project, async_run, controller):
         with myzip.open("images/dynamips/test.image") as myfile:
             content = myfile.read()
             assert content == b"IMAGE"
+
+
+def test_compress_type():
+    assert compress_type("project-files/qemu/a/hda_disk.qcow2") == zipfile.ZIP_STORED
+    assert compress_type("images/IOU/L3.BIN") == zipfile.ZIP_STORED
+    assert compress_type("project-files/captures/a.pcap") == zipfile.ZIP_STORED
+    assert compress_type("project-files/vpcs/a/startup.vpc") == zipfile.ZIP_DEFLATED
+    assert compress_type("project-files/iou/a/nvram_00001", 1024) == zipfile.ZIP_DEFLATED
+    assert compress_type("project-files/iou/a/nvram_00001", 1024 ** 3) == zipfile.ZIP_STORED
+
+
+def test_export_compression(tmpdir, project, async_run):
+    path = project.path
+    os.makedirs(os.path.join(path, "project-files", "qemu", "a"))
+    with open(os.path.join(path, "project-files", "qemu", "a", "hda_disk.qcow2"), "wb") as f:
+        f.write(b"QFI\xfb" + b"\0" * 1000)
+    with open(os.path.join(path, "project-files", "qemu", "a", "config.txt"), "w") as f:
+        f.write("hostname R1\n" * 100)
+    with open(os.path.join(path, "test.gns3"), 'w+') as f:
+        f.write("{}")
+
+    z = async_run(export_project(project))
+    with open(str(tmpdir / 'zipfile.zip'), 'wb') as f:
+        async_run(write_zip(z, f))
+
+    with zipfile.ZipFile(str(tmpdir / 'zipfile.zip')) as myzip:
+        assert myzip.getinfo("project-files/qemu/a/hda_disk.qcow2").compress_type == zipfile.ZIP_STORED
+        assert myzip.getinfo("project-files/qemu/a/config.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert myzip.getinfo("project.gns3").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_export_unknown_format(project, async_run):
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        async_run(export_project(project, archive_format="rar"))
+
+
+@pytest.mark.skipif(not aiozipstream.ZSTD_AVAILABLE, reason="zstandard is not installed")
+def test_export_import_zstd(tmpdir, project, async_run, controller):
+    path = project.path
+    os.makedirs(os.path.join(path, "vm-1", "dynamips"))
+    with open(os.path.join(path, "vm-1", "dynamips", "test"), 'w+') as f:
+        f.write("HELLO" * 1000)
+    with open(os.path.join(path, "test.gns3"), 'w+') as f:
+        json.dump({"project_id": project.id, "name": "zstd", "topology": {}, "version": "2.0.0"}, f)
+
+    z = async_run(export_project(project, archive_format="zstd"))
+    with open(str(tmpdir / 'project.gns3project'), 'wb') as f:
+        async_run(write_zip(z, f))
+    assert os.path.getsize(str(tmpdir / 'project.gns3project')) < 1000
+
+    with open(str(tmpdir / 'project.gns3project'), 'rb') as f:
+        assert aiozipstream.is_zstd(f)
+        imported = async_run(import_project(controller, str(uuid.uuid4()), f))
+    with open(os.path.join(imported.path, "vm-1", "dynamips", "test")) as f:
+        assert f.read() == "HELLO" * 1000
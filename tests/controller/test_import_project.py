@@ -16,15 +16,20 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import time
 import uuid
 import json
+import pytest
+import aiohttp
+import asyncio
 import zipfile
 
 
 from tests.utils import asyncio_patch, AsyncioMagicMock
 
 from gns3server.controller.project import Project
-from gns3server.controller.import_project import import_project, _move_files_to_compute
+from gns3server.controller.import_project import import_project, _move_files_to_compute, _read_archive
+from gns3server.controller.topology import GNS3_FILE_FORMAT_REVISION
 
 from gns3server.version import __version__
 
@@ -509,6 +514,174 @@ def test_move_files_to_compute(tmpdir, async_run):
     assert not os.path.exists(str(tmpdir / "project-files" / "docker"))
 
 
+def test_import_stream_files(windows_platform, async_run, tmpdir, controller):
+    """
+    The files of a topology without conversion are extracted
+    from the archive to their compute
+    """
+
+    project_id = str(uuid.uuid4())
+    controller._computes["vm"] = AsyncioMagicMock()
+
+    topology = {
+        "project_id": str(uuid.uuid4()),
+        "name": "test",
+        "type": "topology",
+        "topology": {
+            "nodes": [
+                {
+                    "compute_id": "local",
+                    "node_id": "0fd3dd4d-dc93-4a04-a9b9-7396a9e22e8b",
+                    "node_type": "qemu",
+                    "name": "test",
+                    "properties": {}
+                },
+                {
+                    "compute_id": "local",
+                    "node_id": "c3ae286c-c81f-40d9-a2d0-5874b2f2478d",
+                    "node_type": "vpcs",
+                    "name": "test2",
+                    "properties": {}
+                }
+            ],
+            "links": [],
+            "computes": [],
+            "drawings": []
+        },
+        "revision": GNS3_FILE_FORMAT_REVISION,
+        "version": "2.1.0"
+    }
+
+    class Writer:
+        data = b""
+
+        @asyncio.coroutine
+        def write(self, chunk):
+            self.data += chunk
+
+    uploads = {}
+
+    @asyncio.coroutine
+    def http_query(method, path, payload, **kwargs):
+        writer = Writer()
+        yield from payload.write(writer)
+        uploads[path] = writer.data
+
+    controller._computes["vm"].http_query = http_query
+
+    zip_path = str(tmpdir / "project.zip")
+    with zipfile.ZipFile(zip_path, 'w') as myzip:
+        myzip.writestr("project.gns3", json.dumps(topology))
+        myzip.writestr("project-files/qemu/0fd3dd4d-dc93-4a04-a9b9-7396a9e22e8b/hda_disk.qcow2", b"DISK" * 100000, compress_type=zipfile.ZIP_DEFLATED)
+        myzip.writestr("project-files/vpcs/c3ae286c-c81f-40d9-a2d0-5874b2f2478d/startup.vpc", "ip dhcp")
+        myzip.writestr("README.txt", "test")
+
+    with open(zip_path, "rb") as f:
+        project = async_run(import_project(controller, project_id, f))
+
+    with open(os.path.join(project.path, "test.gns3")) as f:
+        topo = json.load(f)
+    qemu_id = topo["topology"]["nodes"][0]["node_id"]
+    vpcs_id = topo["topology"]["nodes"][1]["node_id"]
+
+    # The files of the local nodes are extracted with the new node id
+    with open(os.path.join(project.path, "project-files", "vpcs", vpcs_id, "startup.vpc")) as f:
+        assert f.read() == "ip dhcp"
+    assert os.path.exists(os.path.join(project.path, "README.txt"))
+    assert not os.path.exists(os.path.join(project.path, "project-files", "qemu"))
+
+    # The files of the remote nodes are sent to the compute
+    assert uploads == {
+        "/projects/{}/files/project-files/qemu/{}/hda_disk.qcow2".format(project_id, qemu_id): b"DISK" * 100000
+    }
+
+
+def test_read_archive_cancelled(loop):
+    """
+    When the read is cancelled the thread is finished before returning
+    """
+
+    finished = []
+
+    def read():
+        time.sleep(0.1)
+        finished.append(True)
+
+    task = asyncio.async(_read_archive(read))
+    loop.call_later(0.01, task.cancel)
+    with pytest.raises(asyncio.CancelledError):
+        loop.run_until_complete(task)
+    assert finished == [True]
+
+
+def test_import_stream_files_upload_error(async_run, tmpdir, controller):
+    """
+    When an upload to a compute fails the uploads to
+    the other computes are cancelled and the error is raised
+    """
+
+    project_id = str(uuid.uuid4())
+
+    topology = {
+        "project_id": str(uuid.uuid4()),
+        "name": "test",
+        "type": "topology",
+        "topology": {
+            "nodes": [
+                {
+                    "compute_id": "vm",
+                    "node_id": "0fd3dd4d-dc93-4a04-a9b9-7396a9e22e8b",
+                    "node_type": "qemu",
+                    "name": "test",
+                    "properties": {}
+                },
+                {
+                    "compute_id": "vm2",
+                    "node_id": "c3ae286c-c81f-40d9-a2d0-5874b2f2478d",
+                    "node_type": "qemu",
+                    "name": "test2",
+                    "properties": {}
+                }
+            ],
+            "links": [],
+            "computes": [],
+            "drawings": []
+        },
+        "revision": GNS3_FILE_FORMAT_REVISION,
+        "version": "2.1.0"
+    }
+
+    @asyncio.coroutine
+    def failed_upload(method, path, payload, **kwargs):
+        raise aiohttp.web.HTTPConflict(text="No space left on device")
+
+    cancelled = []
+
+    @asyncio.coroutine
+    def slow_upload(method, path, payload, **kwargs):
+        try:
+            yield from asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(path)
+            raise
+
+    controller._computes["vm"] = AsyncioMagicMock()
+    controller._computes["vm"].http_query = failed_upload
+    controller._computes["vm2"] = AsyncioMagicMock()
+    controller._computes["vm2"].http_query = slow_upload
+
+    zip_path = str(tmpdir / "project.zip")
+    with zipfile.ZipFile(zip_path, 'w') as myzip:
+        myzip.writestr("project.gns3", json.dumps(topology))
+        myzip.writestr("project-files/qemu/0fd3dd4d-dc93-4a04-a9b9-7396a9e22e8b/hda_disk.qcow2", b"DISK")
+        myzip.writestr("project-files/qemu/c3ae286c-c81f-40d9-a2d0-5874b2f2478d/hda_disk.qcow2", b"DISK")
+
+    with open(zip_path, "rb") as f:
+        with pytest.raises(aiohttp.web.HTTPConflict):
+            async_run(asyncio.wait_for(import_project(controller, project_id, f, keep_compute_id=True), 5))
+    assert len(cancelled) == 1
+
+
 def test_import_project_name_and_location(async_run, tmpdir, controller):
     """
     Import a project with a different location and name
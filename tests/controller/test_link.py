@@ -32,6 +32,13 @@ from gns3server.controller.project import Project
 from tests.utils import AsyncioBytesIO, AsyncioMagicMock
 
 
+class MockableLink(Link):
+    """
+    The links have slots, a subclass without slots
+    allows the tests to replace the methods of a link
+    """
+
+
 @pytest.fixture
 def project(controller):
     return Project(controller=controller, name="Test")
@@ -49,7 +56,7 @@ def link(async_run, project, compute):
     node2 = Node(project, compute, "node2", node_type="qemu")
     node2._ports = [EthernetPort("E0", 0, 1, 3)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node1, 0, 4))
     async_run(link.add_node(node2, 1, 3))
@@ -57,16 +64,16 @@ def link(async_run, project, compute):
 
 
 def test_eq(project, link, controller):
-    assert link == Link(project, link_id=link.id)
+    assert link == MockableLink(project, link_id=link.id)
     assert link != "a"
-    assert link != Link(project)
+    assert link != MockableLink(project)
 
 
 def test_add_node(async_run, project, compute):
     node1 = Node(project, compute, "node1", node_type="qemu")
     node1._ports = [EthernetPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
     project.dump = AsyncioMagicMock()
@@ -110,7 +117,7 @@ def test_add_node_already_connected(async_run, project, compute):
     node1 = Node(project, compute, "node1", node_type="qemu")
     node1._ports = [EthernetPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
     async_run(link.add_node(node1, 0, 4))
@@ -119,7 +126,7 @@ def test_add_node_already_connected(async_run, project, compute):
     async_run(link.add_node(node2, 0, 4))
 
     assert link.create.called
-    link2 = Link(project)
+    link2 = MockableLink(project)
     link2.create = AsyncioMagicMock()
     with pytest.raises(aiohttp.web.HTTPConflict):
         async_run(link2.add_node(node1, 0, 4))
@@ -131,7 +138,7 @@ def test_add_node_cloud(async_run, project, compute):
     node2 = Node(project, compute, "node2", node_type="cloud")
     node2._ports = [EthernetPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
 
@@ -148,7 +155,7 @@ def test_add_node_cloud_to_cloud(async_run, project, compute):
     node2 = Node(project, compute, "node2", node_type="cloud")
     node2._ports = [EthernetPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
 
@@ -164,7 +171,7 @@ def test_add_node_same_node(async_run, project, compute):
     node1 = Node(project, compute, "node1", node_type="qemu")
     node1._ports = [EthernetPort("E0", 0, 0, 4), EthernetPort("E1", 0, 0, 5)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
 
@@ -182,7 +189,7 @@ def test_add_node_serial_to_ethernet(async_run, project, compute):
     node2 = Node(project, compute, "node2", node_type="qemu")
     node2._ports = [SerialPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
 
@@ -197,7 +204,7 @@ def test_json(async_run, project, compute, link):
     node2 = Node(project, compute, "node2", node_type="qemu")
     node2._ports = [EthernetPort("E0", 0, 1, 3)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node1, 0, 4))
     async_run(link.add_node(node2, 1, 3))
@@ -276,7 +283,7 @@ def test_json_serial_link(async_run, project, compute, link):
     node2 = Node(project, compute, "node2", node_type="qemu")
     node2._ports = [SerialPort("S0", 0, 1, 3)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node1, 0, 4))
     async_run(link.add_node(node2, 1, 3))
@@ -306,7 +313,7 @@ def test_default_capture_file_name(project, compute, async_run):
     node2 = Node(project, compute, "w0.rld", node_type="qemu")
     node2._ports = [EthernetPort("E0", 0, 1, 3)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node1, 0, 4))
     async_run(link.add_node(node2, 1, 3))
@@ -338,7 +345,7 @@ def test_delete(async_run, project, compute):
     node1 = Node(project, compute, "node1", node_type="qemu")
     node1._ports = [EthernetPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
     project.dump = AsyncioMagicMock()
@@ -358,7 +365,7 @@ def test_update_filters(async_run, project, compute):
     node1 = Node(project, compute, "node1", node_type="qemu")
     node1._ports = [EthernetPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     link._project.controller.notification.emit = MagicMock()
     project.dump = AsyncioMagicMock()
@@ -387,7 +394,7 @@ def test_available_filters(async_run, project, compute):
     node1 = Node(project, compute, "node1", node_type="ethernet_switch")
     node1._ports = [EthernetPort("E0", 0, 0, 4)]
 
-    link = Link(project)
+    link = MockableLink(project)
     link.create = AsyncioMagicMock()
     assert link.available_filters() == []
 
@@ -25,7 +25,7 @@ import os
 from unittest.mock import MagicMock, ANY
 
 
-from tests.utils import AsyncioMagicMock
+from tests.utils import AsyncioMagicMock, asyncio_patch
 
 from gns3server.controller.node import Node
 from gns3server.controller.project import Project
@@ -141,6 +141,9 @@ def test_json(node, compute):
         "port_name_format": "Ethernet{0}",
         "port_segment_size": 0,
         "first_port_name": None,
+        "start_priority": 0,
+        "readiness_probe": None,
+        "readiness": None,
         "ports": [
             {
                 "adapter_number": 0,
@@ -169,7 +172,9 @@ def test_json(node, compute):
         "label": node.label,
         "port_name_format": "Ethernet{0}",
         "port_segment_size": 0,
-        "first_port_name": None
+        "first_port_name": None,
+        "start_priority": 0,
+        "readiness_probe": None
     }
 
 
@@ -203,13 +208,13 @@ def test_create(node, compute, project, async_run):
 def test_create_image_missing(node, compute, project, async_run):
     node._console = 2048
 
-    node.__calls = 0
+    calls = []
 
     @asyncio.coroutine
     def resp(*args, **kwargs):
-        node.__calls += 1
+        calls.append(args)
         response = MagicMock()
-        if node.__calls == 1:
+        if len(calls) == 1:
             response.status = 409
             response.json = {"image": "linux.img", "exception": "ImageMissingError"}
         else:
@@ -217,10 +222,8 @@ def test_create_image_missing(node, compute, project, async_run):
         return response
 
     compute.post = AsyncioMagicMock(side_effect=resp)
-    node._upload_missing_image = AsyncioMagicMock(return_value=True)
-
-    assert async_run(node.create()) is True
-    node._upload_missing_image.called is True
+    with asyncio_patch("gns3server.controller.node.Node._upload_missing_image", return_value=True):
+        assert async_run(node.create()) is True
 
 
 def test_create_base_script(node, config, compute, tmpdir, async_run):
@@ -346,6 +349,75 @@ def test_update_properties(node, compute, project, async_run, controller):
     controller._notification.emit.assert_called_with("node.updated", node_notif)
 
 
+def test_update_only_properties(node, compute, project, async_run, controller):
+    """
+    When only the properties change the node is notified with the
+    properties sent back by the compute
+    """
+    response = MagicMock()
+    response.json = {"ram": 2}
+    compute.put = AsyncioMagicMock(return_value=response)
+    controller._notification = MagicMock()
+
+    async_run(node.update(properties={"ram": 2}))
+    assert node.properties["ram"] == 2
+    controller._notification.emit.assert_called_once_with("node.updated", node.__json__())
+
+
+
+def test_update_name_and_properties(node, compute, project, async_run, controller):
+    """
+    When a controller field and the properties change the node is
+    notified once with the properties sent back by the compute
+    """
+    response = MagicMock()
+    response.json = {"name": "demo2", "ram": 2}
+    compute.put = AsyncioMagicMock(return_value=response)
+    controller._notification = MagicMock()
+    # The properties of the notification are copied when it's sent
+    notifications = []
+    controller._notification.emit.side_effect = lambda action, event: notifications.append((action, copy.deepcopy(event)))
+
+    async_run(node.update(name="demo2", properties={"ram": 2}))
+    assert node.name == "demo2"
+    assert node.properties["ram"] == 2
+    assert notifications == [("node.updated", node.__json__())]
+
+
+def test_batch_invalid_answer(node, compute, async_run):
+    """
+    The nodes missing from the answer of the compute have no result
+    and an answer which isn't a list of results is an error
+    """
+
+    response = MagicMock()
+    response.json = [{"node_id": str(uuid.uuid4()), "error": None}]
+    compute.post = AsyncioMagicMock(return_value=response)
+    assert async_run(Node.batch("start", [node])) == {}
+
+    response.json = {"message": "error"}
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        async_run(Node.batch("start", [node]))
+
+def test_parse_node_response_changes(node, async_run):
+    assert async_run(node.parse_node_response({"status": "started", "console": 2048, "ram": 256})) == {"status", "console", "properties"}
+    assert async_run(node.parse_node_response({"status": "started", "console": 2048, "ram": 256})) == set()
+    assert async_run(node.parse_node_response({"node_id": node.id, "ram": 512})) == {"properties"}
+
+
+def test_properties_shared(compute, project, node, async_run):
+    """
+    The strings of the properties identical for many nodes are shared
+    """
+
+    image = "".join(["linux", ".img"])
+    other = Node(project, compute, "demo2", node_type="vpcs", properties={"image": "".join(["linux", ".img"])})
+    assert other.properties["image"] is not image
+    async_run(node.parse_node_response({"image": image}))
+    assert node.properties["image"] is other.properties["image"]
+    assert not hasattr(node, "__dict__")
+
+
 def test_update_only_controller(node, controller, compute, project, async_run):
     """
     When updating property used only on controller we don't need to
@@ -359,10 +431,12 @@ def test_update_only_controller(node, controller, compute, project, async_run):
     assert node.x == 42
     controller._notification.emit.assert_called_with("node.updated", node.__json__())
 
-    # If nothing change a second notif should not be send
+    # If nothing change a second notif should not be send and the project is not saved
     controller._notification = AsyncioMagicMock()
+    project.dump = MagicMock()
     async_run(node.update(x=42))
     assert not controller._notification.emit.called
+    assert not project.dump.called
 
 
 def test_update_no_changes(node, compute, project, async_run):
@@ -520,6 +594,34 @@ def test_get_port(node):
     with pytest.raises(aiohttp.web.HTTPNotFound):
         port = node.get_port(42, 0)
 
+    # The index is rebuilt when the ports change
+    node._properties["adapters"] = 3
+    node._list_ports()
+    assert node.get_port(2, 0).adapter_number == 2
+
+
+def test_list_ports_cache(node, async_run):
+    node._node_type = "qemu"
+    node._properties["adapters"] = 2
+    node._list_ports()
+    ports = node.ports
+    link = MagicMock()
+    node.get_port(1, 0).link = link
+
+    # Only the status change, the ports are not generated again
+    async_run(node.parse_node_response({"status": "started", "ram": 512}))
+    assert node.ports is ports
+
+    async_run(node.parse_node_response({"adapters": 3}))
+    assert node.ports is not ports
+    assert len(node.ports) == 3
+    assert node.get_port(1, 0).link == link
+    assert node.get_port(2, 0).link is None
+
+    node.port_name_format = "eth{0}"
+    node._list_ports()
+    assert node.ports[0].__json__()["name"] == "eth0"
+
 
 def test_parse_node_response(node, async_run):
     """
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+import random
+import aiohttp
+import pytest
+
+from gns3server.controller.node_name_allocator import NodeNameAllocator
+
+
+def reference_allocate(names, base_name):
+    """
+    Allocation by testing all the numbers, the allocator
+    must return the same names
+    """
+
+    base_name = re.sub(r"[ ]", "", base_name)
+    if base_name in names:
+        base_name = re.sub(r"[0-9]+$", "{0}", base_name)
+    if '{0}' in base_name or '{id}' in base_name:
+        for number in range(1, 1000000):
+            name = base_name.format(number, id=number, name="Node")
+            if name not in names:
+                names.add(name)
+                return name
+    else:
+        if base_name not in names:
+            names.add(base_name)
+            return base_name
+        for number in range(1, 1000000):
+            name = base_name + str(number)
+            if name not in names:
+                names.add(name)
+                return name
+
+
+def test_allocate():
+    allocator = NodeNameAllocator()
+    assert allocator.allocate("PC") == "PC"
+    assert allocator.allocate("PC") == "PC1"
+    assert allocator.allocate("PC") == "PC2"
+    assert allocator.allocate("R{0}") == "R1"
+    assert allocator.allocate("R{id}") == "R2"
+    assert allocator.allocate("R1") == "R3"
+    assert allocator.allocate("R 10") == "R10"
+    assert allocator.allocate("R10") == "R4"
+    assert allocator.allocate(None) is None
+    assert "R4" in allocator
+
+
+def test_remove():
+    allocator = NodeNameAllocator()
+    for i in range(5):
+        allocator.allocate("R{0}")
+    allocator.remove("R4")
+    allocator.remove("R2")
+    allocator.remove("unknown")
+    assert allocator.allocate("R{0}") == "R2"
+    assert allocator.allocate("R{0}") == "R4"
+    assert allocator.allocate("R{0}") == "R6"
+
+
+def test_released_name_used_by_another_template():
+    allocator = NodeNameAllocator()
+    for i in range(3):
+        allocator.allocate("R{0}")
+    allocator.remove("R1")
+    assert allocator.allocate("R{id}") == "R1"
+    assert allocator.allocate("R{0}") == "R4"
+    allocator.remove("R1")
+    assert allocator.allocate("R{0}") == "R1"
+
+
+def test_invalid_template():
+    allocator = NodeNameAllocator()
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        allocator.allocate("R{test}{0}")
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        allocator.allocate("R{1}{0}")
+
+
+def test_same_names_than_reference():
+    random.seed(42)
+    allocator = NodeNameAllocator()
+    names = set()
+    allocated = []
+    base_names = ["R{0}", "R{id}", "R", "R1", "R12", "PC", "PC{0}", "PC-{0}", "SW{0}-1"]
+    for i in range(3000):
+        if allocated and random.random() < 0.3:
+            name = allocated.pop(random.randrange(len(allocated)))
+            allocator.remove(name)
+            names.remove(name)
+        else:
+            base_name = random.choice(base_names)
+            name = allocator.allocate(base_name)
+            assert name == reference_allocate(names, base_name)
+            allocated.append(name)
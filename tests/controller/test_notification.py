@@ -16,10 +16,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from gns3server.controller.notification import Notification
 from gns3server.controller import Controller
+from gns3server.notification_filter import NotificationFilter
 from tests.utils import AsyncioMagicMock
 
 
@@ -72,6 +73,20 @@ def test_emit_to_project(async_run, controller, project):
     assert len(notif._listeners[project.id]) == 0
 
 
+def test_emit_filtered(async_run, controller, project):
+    """
+    Events not matching the filter of the queue are dropped
+    """
+    notif = controller.notification
+    with notif.queue(project, NotificationFilter(actions=["log.*"])) as queue:
+        async_run(queue.get(0.1))  # ping
+        notif.emit('node.updated', {"project_id": project.id})
+        notif.emit('log.info', {"message": "test"})
+        msg = async_run(queue.get(5))
+        assert msg == ('log.info', {"message": "test"}, {})
+        assert queue.empty()
+
+
 def test_dispatch(async_run, controller, project):
     notif = controller.notification
     with notif.queue(project) as queue:
@@ -116,9 +131,49 @@ def test_dispatch_node_updated(async_run, controller, node, project):
         assert event["properties"]["startup_config"] == "ip 192"
 
 
+def test_dispatch_node_updated_no_change(async_run, controller, node, project):
+    """
+    A node.updated notification from the compute without change
+    is not sent to the clients
+    """
+
+    notif = controller.notification
+    with notif.queue(project) as queue:
+        async_run(queue.get(0.1))  # ping
+        async_run(notif.dispatch("node.updated", {
+            "node_id": node.id,
+            "project_id": project.id,
+            "name": node.name
+        },
+            compute_id=1))
+        notif.emit("test", {})
+        action, event, _ = async_run(queue.get(5))
+        assert action == "test"
+
+
 def test_various_notification(controller, node):
     notif = controller.notification
     notif.emit("log.info", {"message": "Image uploaded"})
     notif.emit("log.warning", {"message": "Warning ASA 8 is not officialy supported by GNS3"})
     notif.emit("log.error", {"message": "Permission denied on /tmp"})
     notif.emit("node.updated", node.__json__())
+
+
+def test_dispatch_node_updated_filtered(async_run, controller, node, project):
+    """
+    The node is updated even if no listener want the notification
+    """
+
+    notif = controller.notification
+    with notif.queue(project, NotificationFilter(node_ids=["other"])) as queue:
+        async_run(queue.get(0.1))  # ping
+        with patch("gns3server.controller.node.Node.__json__") as mock_json:
+            async_run(notif.dispatch("node.updated", {
+                "node_id": node.id,
+                "project_id": project.id,
+                "name": "hello"
+            },
+                compute_id=1))
+            assert node.name == "hello"
+            assert not mock_json.called
+        assert queue.empty()
@@ -17,10 +17,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import asyncio
 import sys
 import pytest
 import aiohttp
-import zipstream
 from unittest.mock import MagicMock
 from tests.utils import AsyncioMagicMock, asyncio_patch
 from unittest.mock import patch
@@ -30,6 +30,7 @@ from gns3server.controller.project import Project
 from gns3server.controller.appliance import Appliance
 from gns3server.controller.ports.ethernet_port import EthernetPort
 from gns3server.config import Config
+from gns3server.utils.asyncio import aiozipstream
 
 
 @pytest.fixture
@@ -324,6 +325,40 @@ def test_add_link(async_run, project, controller):
     controller.notification.emit.assert_any_call("link.created", link.__json__())
 
 
+def test_link_indexes(async_run, project, controller):
+    compute = MagicMock()
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+    controller._notification = MagicMock()
+
+    node1 = async_run(project.add_node(compute, "node1", None, node_type="vpcs"))
+    node2 = async_run(project.add_node(compute, "node2", None, node_type="vpcs"))
+    node3 = async_run(project.add_node(compute, "node3", None, node_type="vpcs"))
+
+    link1 = async_run(project.add_link())
+    async_run(link1.add_node(node1, 0, 0))
+    with asyncio_patch("gns3server.controller.udp_link.UDPLink.create"):
+        async_run(link1.add_node(node2, 0, 0))
+    link2 = async_run(project.add_link())
+    async_run(link2.add_node(node3, 0, 0))
+
+    assert project.get_node_links(node1.id) == [link1]
+    assert project.get_node_links(node3.id) == [link2]
+    assert project.get_port_link(node2.id, 0, 0) == link1
+    assert project.get_port_link(node2.id, 0, 1) is None
+
+    with asyncio_patch("gns3server.controller.udp_link.UDPLink.delete"):
+        async_run(project.delete_link(link1.id))
+    assert project.get_node_links(node1.id) == []
+    assert project.get_port_link(node2.id, 0, 0) is None
+    assert project.get_node_links(node3.id) == [link2]
+
+    async_run(project.delete_node(node3.id))
+    assert link2.id not in project.links
+    assert project.get_node_links(node3.id) == []
+
+
 def test_get_link(async_run, project):
     compute = MagicMock()
 
@@ -463,6 +498,11 @@ def test_duplicate(project, async_run, controller):
     new_project = async_run(project.duplicate(name="Hello"))
     assert new_project.id != project.id
     assert new_project.name == "Hello"
+    # The remote compute copy the files of its nodes
+    args, kwargs = compute.post.call_args
+    assert args[0] == "/projects/{}/duplicate".format(project.id)
+    assert kwargs["data"]["project_id"] == new_project.id
+    assert set(kwargs["data"]["node_ids"]) == {remote_vpcs.id, remote_virtualbox.id}
 
     async_run(new_project.open())
 
@@ -470,11 +510,50 @@ def test_duplicate(project, async_run, controller):
     assert list(new_project.nodes.values())[1].compute.id == "remote"
 
 
-def test_duplicate_with_zipfile_encoding_issues(project, async_run, controller):
-    zf = zipstream.ZipFile()
-    zf.writestr('test\udcc3', "data")
+def test_duplicate_copy_files(project, async_run, controller):
+    """
+    The files of the project are copied and the directories of the
+    nodes are renamed with their new id
+    """
+
+    compute = MagicMock()
+    compute.id = "local"
+    controller._computes["local"] = compute
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
 
-    with asyncio_patch('gns3server.controller.project.export_project', return_value=zf):
+    node = async_run(project.add_node(compute, "test", None, node_type="vpcs"))
+    node_dir = os.path.join(project.path, "project-files", "vpcs", node.id)
+    os.makedirs(node_dir)
+    with open(os.path.join(node_dir, "startup.vpc"), "w") as f:
+        f.write("ip 192.168.1.1")
+    with open(os.path.join(node_dir, "vpcs.log"), "w") as f:
+        f.write("LOG")
+
+    new_project = async_run(project.duplicate(name="Hello"))
+    async_run(new_project.open())
+    new_node = list(new_project.nodes.values())[0]
+    assert new_node.id != node.id
+    new_node_dir = os.path.join(new_project.path, "project-files", "vpcs", new_node.id)
+    with open(os.path.join(new_node_dir, "startup.vpc")) as f:
+        assert f.read() == "ip 192.168.1.1"
+    assert not os.path.exists(os.path.join(new_node_dir, "vpcs.log"))
+    assert os.path.exists(os.path.join(node_dir, "startup.vpc"))
+
+
+def test_duplicate_running(project, async_run, controller):
+
+    with patch("gns3server.controller.project.Project.is_running", return_value=True):
+        with asyncio_patch('gns3server.controller.duplicate_project.copy_tree') as mock:
+            with pytest.raises(aiohttp.web.HTTPConflict):
+                async_run(project.duplicate(name="Hello"))
+            assert not mock.called
+
+
+def test_duplicate_copy_error(project, async_run, controller):
+
+    with asyncio_patch('gns3server.controller.duplicate_project.copy_tree', side_effect=OSError("No space left on device")):
         with pytest.raises(aiohttp.web.HTTPConflict):
             async_run(project.duplicate(name="Hello"))
 
@@ -551,6 +630,55 @@ def test_start_all(project, async_run):
     assert len(compute.post.call_args_list) == 10
 
 
+def test_select_nodes(project, async_run):
+    compute = MagicMock()
+    compute.id = "local"
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+    remote = MagicMock()
+    remote.id = "remote"
+    remote.post = compute.post
+
+    pc1 = async_run(project.add_node(compute, "PC1", None, node_type="vpcs"))
+    pc2 = async_run(project.add_node(remote, "PC2", None, node_type="vpcs"))
+    r1 = async_run(project.add_node(compute, "R1", None, node_type="qemu"))
+
+    assert len(project.select_nodes()) == 3
+    assert project.select_nodes(node_ids=[pc2.id, r1.id]) == [pc2, r1]
+    assert project.select_nodes(node_type="vpcs", compute_id="local") == [pc1]
+    assert sorted(node.name for node in project.select_nodes(name="PC*")) == ["PC1", "PC2"]
+    with pytest.raises(aiohttp.web.HTTPNotFound):
+        project.select_nodes(node_ids=[str(uuid4())])
+
+
+def test_bulk_action(project, async_run):
+    compute = MagicMock()
+    compute.id = "local"
+    response = MagicMock()
+    response.json = {"console": 2048}
+    compute.post = AsyncioMagicMock(return_value=response)
+
+    pcs = [async_run(project.add_node(compute, "PC{}".format(i), None, node_type="vpcs")) for i in range(3)]
+    router = async_run(project.add_node(compute, "R1", None, node_type="qemu"))
+
+    @asyncio.coroutine
+    def post(path, **kwargs):
+        response = MagicMock()
+        if path == "/projects/{}/vpcs/nodes/start".format(project.id):
+            response.json = [{"node_id": node_id, "status": "started", "error": None} for node_id in kwargs["data"]["node_ids"]]
+            response.json[1]["error"] = "Could not start"
+        else:
+            raise aiohttp.web.HTTPConflict(text="Router error")
+        return response
+
+    compute.post = post
+    done = {}
+    errors = async_run(project.bulk_action("start", pcs + [router], callback=lambda node, error: done.__setitem__(node.name, error)))
+    assert errors == 2
+    assert done == {"PC0": None, "PC1": "Could not start", "PC2": None, "R1": "Router error"}
+
+
 def test_stop_all(project, async_run):
     compute = MagicMock()
     compute.id = "local"
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import uuid
+import asyncio
+import aiohttp
+import pytest
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+
+from gns3server.controller.node import Node
+from gns3server.controller.project import Project
+from gns3server.controller.readiness import create_probe, ReadinessProbe, ConsoleProbe, TCPProbe
+
+
+@pytest.fixture
+def compute():
+    s = AsyncioMagicMock()
+    s.id = "local"
+    s.host = "127.0.0.1"
+    return s
+
+
+@pytest.fixture
+def project(controller):
+    return Project(str(uuid.uuid4()), controller=controller)
+
+
+@pytest.fixture
+def node(compute, project):
+    return Node(project, compute, "demo",
+                node_id=str(uuid.uuid4()),
+                node_type="vpcs",
+                console_type="telnet")
+
+
+def _server(loop, output=None):
+    """
+    Start a TCP server on a free port, the output is sent in
+    two chunks to each client
+
+    :returns: Server and port
+    """
+
+    @asyncio.coroutine
+    def handle(reader, writer):
+        if output:
+            writer.write(output[:5])
+            yield from asyncio.sleep(0.05)
+            writer.write(output[5:])
+        yield from reader.read()
+        writer.close()
+
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0, loop=loop))
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_create_probe(node):
+    assert isinstance(create_probe(node, {"type": "console", "pattern": "login:"}), ConsoleProbe)
+    assert isinstance(create_probe(node, {"type": "tcp", "port": 22}), TCPProbe)
+
+
+def test_tcp_probe(node, loop, async_run):
+    server, port = _server(loop)
+    probe = create_probe(node, {"type": "tcp", "port": port, "timeout": 5})
+    assert async_run(probe.wait())
+    server.close()
+
+    probe = create_probe(node, {"type": "tcp", "port": port, "timeout": 0.2, "interval": 0.05})
+    assert not async_run(probe.wait())
+
+
+def test_console_probe(node, loop, async_run):
+    server, port = _server(loop, b"Booting...\r\nRouter login: ")
+    node.console = port
+    probe = create_probe(node, {"type": "console", "pattern": "login:", "timeout": 5})
+    assert async_run(probe.wait())
+
+    probe = create_probe(node, {"type": "console", "pattern": "Password:", "timeout": 0.3, "interval": 0.05})
+    assert not async_run(probe.wait())
+    server.close()
+
+
+def test_readiness_probe_invalid_pattern(node):
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        node.readiness_probe = {"type": "console", "pattern": "("}
+
+
+def test_start_with_readiness_probe(node, compute, controller, loop, async_run):
+    server, port = _server(loop)
+    controller._notification = MagicMock()
+    compute.post = AsyncioMagicMock()
+    node.readiness_probe = {"type": "tcp", "port": port}
+
+    async_run(node.start())
+    assert node.readiness == "pending"
+    assert node.__json__()["readiness"] == "pending"
+    assert async_run(node.wait_ready())
+    assert node.readiness == "ready"
+    controller._notification.emit.assert_called_with("node.updated", node.__json__())
+
+    async_run(node.stop())
+    assert node.readiness is None
+    server.close()
+
+
+def test_start_without_readiness_probe(node, compute, async_run):
+    compute.post = AsyncioMagicMock()
+    async_run(node.start())
+    assert node.readiness is None
+    assert async_run(node.wait_ready())
+
+
+def test_readiness_probe_failed(node, compute, controller, async_run):
+    controller._notification = MagicMock()
+    compute.post = AsyncioMagicMock()
+    # Nothing listen on the console port
+    node.console = 1
+    node.readiness_probe = {"type": "console", "pattern": "login:", "timeout": 0.2, "interval": 0.05}
+
+    async_run(node.start())
+    assert not async_run(node.wait_ready())
+    assert node.readiness == "failed"
+
+
+def test_readiness_reset_when_stopped(node, compute, async_run):
+    compute.post = AsyncioMagicMock()
+    node.console = 1
+    node.readiness_probe = {"type": "console", "pattern": "login:", "interval": 0.05}
+    async_run(node.start())
+    assert node.readiness == "pending"
+    async_run(node.parse_node_response({"status": "stopped"}))
+    assert node.readiness is None
+
+
+def test_readiness_sent_back_by_client(node, compute, project, async_run):
+    """
+    The client can send back the node it received with its readiness
+    """
+    project.dump = MagicMock()
+    other = Node(project, compute, "demo2", node_type="vpcs", readiness="ready")
+    assert other.readiness is None
+    async_run(node.update(readiness="ready", x=42))
+    assert node.readiness is None
+    assert node.x == 42
+
+
+def test_readiness_probe_abstract(node):
+    with pytest.raises(TypeError):
+        ReadinessProbe(node, {})
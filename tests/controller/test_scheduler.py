@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import pytest
+import aiohttp
+from unittest.mock import MagicMock
+
+from gns3server.controller.scheduler import NodeScheduler, compute_capacity
+
+
+def _compute(compute_id, cpus=1, cpu_usage=None, memory_usage=None):
+    compute = MagicMock()
+    compute.id = compute_id
+    compute.capabilities = {"cpus": cpus}
+    compute.cpu_usage_percent = cpu_usage
+    compute.memory_usage_percent = memory_usage
+    return compute
+
+
+class FakeNode:
+
+    def __init__(self, name, compute, node_type="vpcs", start_priority=0, error=None):
+        self.name = name
+        self.compute = compute
+        self.node_type = node_type
+        self.start_priority = start_priority
+        self.error = error
+        self.history = None
+
+    @asyncio.coroutine
+    def start(self):
+        self.history.append(("begin", self.name))
+        yield from asyncio.sleep(0.01)
+        self.history.append(("end", self.name))
+        if self.error:
+            raise self.error
+
+    @asyncio.coroutine
+    def wait_ready(self):
+        self.history.append(("ready", self.name))
+        return True
+
+
+def _max_parallel(history, names):
+    running = 0
+    maximum = 0
+    for event, name in history:
+        if name not in names:
+            continue
+        running += 1 if event == "begin" else -1
+        maximum = max(maximum, running)
+    return maximum
+
+
+def _run(async_run, nodes, reverse=False):
+    history = []
+    for node in nodes:
+        node.history = history
+    async_run(NodeScheduler("start", reverse=reverse).run(nodes))
+    return history
+
+
+def test_compute_capacity():
+    assert compute_capacity(_compute("a", cpus=4)) == 8
+    assert compute_capacity(_compute("a", cpus=4, cpu_usage=50, memory_usage=10)) == 4
+    assert compute_capacity(_compute("a", cpus=4, memory_usage=100)) == 2
+    assert compute_capacity(_compute("a", cpus=None)) == 4
+    assert compute_capacity(MagicMock()) == 4
+
+
+def test_priority(async_run):
+    compute = _compute("local", cpus=8)
+    nodes = [
+        FakeNode("low", compute, start_priority=-1),
+        FakeNode("high", compute, start_priority=10),
+        FakeNode("default", compute)
+    ]
+    history = _run(async_run, nodes)
+    assert [name for event, name in history if event == "begin"] == ["high", "default", "low"]
+    # A level is finished before the next one begins
+    assert history.index(("end", "high")) < history.index(("begin", "default"))
+
+    history = _run(async_run, nodes, reverse=True)
+    assert [name for event, name in history if event == "begin"] == ["low", "default", "high"]
+
+
+def test_capacity_by_compute(async_run):
+    busy = _compute("busy", cpus=1)
+    idle = _compute("idle", cpus=4)
+    busy_nodes = [FakeNode("busy{}".format(i), busy, node_type="docker") for i in range(4)]
+    idle_nodes = [FakeNode("idle{}".format(i), idle, node_type="docker") for i in range(4)]
+    history = _run(async_run, busy_nodes + idle_nodes)
+    assert len(history) == 16
+    assert _max_parallel(history, {n.name for n in busy_nodes}) == 1
+    assert _max_parallel(history, {n.name for n in idle_nodes}) == 4
+
+
+def test_node_more_expensive_than_capacity(async_run):
+    compute = _compute("local", cpus=1)
+    nodes = [FakeNode("qemu{}".format(i), compute, node_type="qemu") for i in range(2)]
+    history = _run(async_run, nodes)
+    assert len(history) == 4
+    assert _max_parallel(history, {n.name for n in nodes}) == 1
+
+
+def test_error(async_run):
+    compute = _compute("local", cpus=4)
+    nodes = [
+        FakeNode("fail", compute, start_priority=1, error=aiohttp.web.HTTPConflict(text="Error")),
+        FakeNode("ok", compute)
+    ]
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        history = _run(async_run, nodes)
+    # The other nodes are processed even if a node failed
+    assert ("end", "ok") in nodes[1].history
+
+
+def test_wait_ready(async_run):
+    compute = _compute("local", cpus=8)
+    nodes = [
+        FakeNode("router", compute, start_priority=1),
+        FakeNode("pc", compute)
+    ]
+    history = []
+    for node in nodes:
+        node.history = history
+    async_run(NodeScheduler("start", wait_ready=True).run(nodes))
+    assert history == [("begin", "router"), ("end", "router"), ("ready", "router"), ("begin", "pc"), ("end", "pc"), ("ready", "pc")]
@@ -40,7 +40,7 @@ def test_snapshot_name(project):
     assert snapshot.name == "test1"
     assert snapshot._created_at > 0
     assert snapshot.path.startswith(os.path.join(project.path, "snapshots", "test1_"))
-    assert snapshot.path.endswith(".gns3project")
+    assert snapshot.path.endswith(".gns3snapshot")
 
     # Check if UTC conversion doesn't corrupt the path
     snap2 = Snapshot(project, filename=os.path.basename(snapshot.path))
@@ -101,3 +101,27 @@ def test_restore(project, controller, async_run):
     project = controller.get_project(project.id)
     assert not os.path.exists(test_file)
     assert len(project.nodes) == 1
+
+
+def test_restore_pictures(project, controller, async_run):
+    """
+    The pictures of the snapshot unused by the current drawings are restored
+    """
+
+    drawing = async_run(project.add_drawing())
+    drawing._svg = "test.png"
+    with open(os.path.join(project.pictures_directory, "test.png"), "wb") as f:
+        f.write(b"PICTURE")
+    project.dump()
+    snapshot = async_run(project.snapshot(name="test"))
+
+    # The drawing is deleted after the snapshot
+    async_run(project.delete_drawing(drawing.id))
+    assert project.snapshot_store.can_restore(snapshot.path, controller)
+
+    controller._notification = MagicMock()
+    async_run(snapshot.restore())
+
+    assert len(project.drawings) == 1
+    with open(os.path.join(project.pictures_directory, "test.png"), "rb") as f:
+        assert f.read() == b"PICTURE"
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import json
+import asyncio
+import zipfile
+import pytest
+import aiohttp
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+
+from gns3server.controller.project import Project
+from gns3server.controller.export_project import write_zip
+from gns3server.controller import snapshot_store
+
+
+@pytest.fixture
+def project(controller):
+    project = Project(controller=controller, name="Test")
+    controller._projects[project.id] = project
+    return project
+
+
+@pytest.fixture(autouse=True)
+def chunk_size(monkeypatch):
+    monkeypatch.setattr(snapshot_store, "CHUNK_SIZE", 1024)
+
+
+def _chunks(project):
+    chunks = set()
+    for root, dirs, files in os.walk(os.path.join(project.path, "snapshots", "chunks")):
+        chunks.update(files)
+    return chunks
+
+
+def _write_disk(project, data):
+    path = os.path.join(project.path, "project-files", "qemu", "vm1")
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "hda_disk.qcow2"), "wb") as f:
+        f.write(data)
+
+
+def _export(project, snapshot, async_run):
+    f = io.BytesIO()
+    async_run(write_zip(snapshot.export(), f))
+    return zipfile.ZipFile(f)
+
+
+class FakeContent:
+
+    def __init__(self, data):
+        self.data = data
+
+    @asyncio.coroutine
+    def read(self, size):
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+def test_snapshot_share_chunks(project, async_run):
+    disk = os.urandom(10 * 1024)
+    _write_disk(project, disk)
+    first = async_run(project.snapshot("first"))
+    chunks = _chunks(project)
+    assert len(chunks) >= 10
+
+    # One chunk of the disk changed
+    disk = b"A" + disk[1:]
+    _write_disk(project, disk)
+    second = async_run(project.snapshot("second"))
+    assert len(_chunks(project) - chunks) == 1
+
+    with _export(project, first, async_run) as myzip:
+        assert myzip.read("project-files/qemu/vm1/hda_disk.qcow2")[1:] == disk[1:]
+        assert json.loads(myzip.read("project.gns3").decode())["project_id"] == project.id
+    with _export(project, second, async_run) as myzip:
+        assert myzip.read("project-files/qemu/vm1/hda_disk.qcow2") == disk
+
+
+def test_delete_snapshot_remove_chunks(project, async_run):
+    _write_disk(project, os.urandom(4 * 1024))
+    first = async_run(project.snapshot("first"))
+    chunks = _chunks(project)
+    _write_disk(project, os.urandom(4 * 1024))
+    second = async_run(project.snapshot("second"))
+
+    async_run(project.delete_snapshot(second.id))
+    assert not os.path.exists(second.path)
+    assert _chunks(project) == chunks
+
+    async_run(project.delete_snapshot(first.id))
+    assert _chunks(project) == set()
+
+
+def test_remote_files_downloaded_when_changed(project, async_run):
+    compute = MagicMock()
+    compute.id = "vm"
+    files = [{"path": "project-files/qemu/vm2/hda_disk.qcow2", "md5sum": "aaa"}]
+
+    @asyncio.coroutine
+    def list_files(project, md5sum=True):
+        return files
+    compute.list_files = list_files
+
+    downloads = []
+
+    @asyncio.coroutine
+    def download_file(project, path):
+        downloads.append(path)
+        response = MagicMock()
+        response.content = FakeContent(b"REMOTE" * 1000)
+        return response
+    compute.download_file = download_file
+
+    project._project_created_on_compute.add(compute)
+    first = async_run(project.snapshot("first"))
+    async_run(project.snapshot("second"))
+    assert len(downloads) == 1
+
+    files[0]["md5sum"] = "bbb"
+    async_run(project.snapshot("third"))
+    assert len(downloads) == 2
+
+    with _export(project, first, async_run) as myzip:
+        assert myzip.read("project-files/qemu/vm2/hda_disk.qcow2") == b"REMOTE" * 1000
+
+
+def test_legacy_snapshot(project, async_run):
+    os.makedirs(os.path.join(project.path, "snapshots"))
+    path = os.path.join(project.path, "snapshots", "test_260716_100439.gns3project")
+    with zipfile.ZipFile(path, "w") as myzip:
+        myzip.writestr("project.gns3", "{}")
+        myzip.writestr("project-files/test", "TEST")
+    project.reset()
+
+    snapshot = list(project.snapshots.values())[0]
+    assert not snapshot.in_store
+    with _export(project, snapshot, async_run) as myzip:
+        assert myzip.read("project-files/test") == b"TEST"
+
+    async_run(project.delete_snapshot(snapshot.id))
+    assert not os.path.exists(path)
+
+
+def test_snapshots_not_in_export(project, async_run):
+    _write_disk(project, b"DISK")
+    first = async_run(project.snapshot("first"))
+    second = async_run(project.snapshot("second"))
+    with _export(project, second, async_run) as myzip:
+        assert not [name for name in myzip.namelist() if name.startswith("snapshots")]
+
+
+def test_restore_changed_chunks(project, async_run):
+    disk = os.urandom(10 * 1024)
+    _write_disk(project, disk)
+    snapshot = async_run(project.snapshot("test"))
+    store = project.snapshot_store
+    disk_path = os.path.join(project.path, "project-files", "qemu", "vm1", "hda_disk.qcow2")
+
+    # Nothing changed except the format of the .gns3
+    async_run(store.restore(project, snapshot.path))
+    assert async_run(store.restore(project, snapshot.path)) == 0
+
+    with open(disk_path, "r+b") as f:
+        f.seek(3 * 1024 + 10)
+        f.write(b"CHANGED")
+        f.seek(0, os.SEEK_END)
+        f.write(b"APPENDED")
+    with open(os.path.join(project.path, "project-files", "new.txt"), "w") as f:
+        f.write("NEW")
+
+    # Only the chunk changed is written
+    assert async_run(store.restore(project, snapshot.path)) == 1024
+    with open(disk_path, "rb") as f:
+        assert f.read() == disk
+    assert not os.path.exists(os.path.join(project.path, "project-files", "new.txt"))
+
+
+def test_restore_remote_files(project, controller, async_run):
+    compute = MagicMock()
+    compute.id = "vm"
+    controller._computes["vm"] = compute
+    files = [{"path": "project-files/qemu/vm2/hda_disk.qcow2", "md5sum": "aaa"},
+             {"path": "project-files/qemu/vm2/config.txt", "md5sum": "bbb"}]
+
+    @asyncio.coroutine
+    def list_files(project, md5sum=True):
+        return files
+    compute.list_files = list_files
+
+    @asyncio.coroutine
+    def download_file(project, path):
+        response = MagicMock()
+        response.content = FakeContent(path.encode())
+        return response
+    compute.download_file = download_file
+
+    class Writer:
+        data = b""
+
+        @asyncio.coroutine
+        def write(self, chunk):
+            self.data += chunk
+
+    uploads = {}
+
+    @asyncio.coroutine
+    def http_query(method, path, payload, **kwargs):
+        writer = Writer()
+        yield from payload.write(writer)
+        uploads[path] = writer.data
+    compute.http_query = http_query
+    compute.delete = AsyncioMagicMock()
+
+    project._project_created_on_compute.add(compute)
+    snapshot = async_run(project.snapshot("test"))
+
+    # The config changed and a node was added
+    files[1]["md5sum"] = "ccc"
+    files.append({"path": "project-files/qemu/vm3/hda_disk.qcow2", "md5sum": "ddd"})
+    assert project.snapshot_store.can_restore(snapshot.path, controller)
+    async_run(project.snapshot_store.restore(project, snapshot.path))
+
+    assert uploads == {"/projects/{}/files/project-files/qemu/vm2/config.txt".format(project.id): b"project-files/qemu/vm2/config.txt"}
+    compute.delete.assert_called_with("/projects/{}/files/project-files/qemu/vm3/hda_disk.qcow2".format(project.id))
+
+    del controller._computes["vm"]
+    assert not project.snapshot_store.can_restore(snapshot.path, controller)
+
+
+def test_delete_snapshot_corrupted_manifest(project, async_run):
+    _write_disk(project, os.urandom(4 * 1024))
+    first = async_run(project.snapshot("first"))
+    chunks = _chunks(project)
+    _write_disk(project, os.urandom(4 * 1024))
+    second = async_run(project.snapshot("second"))
+    with open(os.path.join(project.path, "snapshots", "corrupted" + snapshot_store.MANIFEST_EXTENSION), "w") as f:
+        f.write("{")
+
+    async_run(project.delete_snapshot(second.id))
+    assert _chunks(project) == chunks
+
+
+def test_create_failed_remove_chunks(project, async_run):
+    _write_disk(project, os.urandom(4 * 1024))
+    first = async_run(project.snapshot("first"))
+    chunks = _chunks(project)
+
+    compute = MagicMock()
+    compute.id = "vm"
+
+    @asyncio.coroutine
+    def list_files(project, md5sum=True):
+        return [{"path": "project-files/qemu/vm2/hda_disk.qcow2", "md5sum": "aaa"}]
+    compute.list_files = list_files
+
+    @asyncio.coroutine
+    def download_file(project, path):
+        raise aiohttp.web.HTTPConflict(text="Compute error")
+    compute.download_file = download_file
+    project._project_created_on_compute.add(compute)
+
+    _write_disk(project, os.urandom(4 * 1024))
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        async_run(project.snapshot("second"))
+    assert _chunks(project) == chunks
+    assert len(project.snapshot_store.manifests()) == 1
+
+
+def test_restore_keep_filtered_files(project, async_run):
+    _write_disk(project, b"DISK")
+    snapshot = async_run(project.snapshot("test"))
+
+    log_file = os.path.join(project.path, "project-files", "qemu", "vm1", "qemu.log")
+    capture = os.path.join(project.path, "project-files", "captures", "test.pcap")
+    os.makedirs(os.path.dirname(capture))
+    for path in (log_file, capture):
+        with open(path, "w") as f:
+            f.write("TEST")
+
+    async_run(project.snapshot_store.restore(project, snapshot.path))
+    assert os.path.exists(log_file)
+    assert os.path.exists(capture)
@@ -27,6 +27,13 @@ from gns3server.controller.ports.ethernet_port import EthernetPort
 from gns3server.controller.node import Node
 
 
+class MockableUDPLink(UDPLink):
+    """
+    The links have slots, a subclass without slots
+    allows the tests to replace the methods of a link
+    """
+
+
 @pytest.fixture
 def project(controller):
     return Project(controller=controller, name="Test")
@@ -50,7 +57,7 @@ def test_create(async_run, project):
 
     compute1.get_ip_on_same_subnet.side_effect = subnet_callback
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     async_run(link.add_node(node1, 0, 4))
     async_run(link.update_filters({"latency": [10]}))
 
@@ -114,7 +121,7 @@ def test_create_one_side_failure(async_run, project):
 
     compute1.get_ip_on_same_subnet.side_effect = subnet_callback
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     async_run(link.add_node(node1, 0, 4))
 
     @asyncio.coroutine
@@ -173,7 +180,7 @@ def test_delete(async_run, project):
     node2 = Node(project, compute2, "node2", node_type="vpcs")
     node2._ports = [EthernetPort("E0", 0, 3, 1)]
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node1, 0, 4))
     async_run(link.add_node(node2, 3, 1))
@@ -200,7 +207,7 @@ def test_choose_capture_side(async_run, project):
     node_iou._status = "started"
     node_iou._ports = [EthernetPort("E0", 0, 3, 1)]
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node_vpcs, 0, 4))
     async_run(link.add_node(node_iou, 3, 1))
@@ -215,7 +222,7 @@ def test_choose_capture_side(async_run, project):
     node_switch._status = "started"
     node_switch._ports = [EthernetPort("E0", 0, 3, 1)]
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node_iou, 0, 4))
     async_run(link.add_node(node_switch, 3, 1))
@@ -228,7 +235,7 @@ def test_choose_capture_side(async_run, project):
     node_iou = Node(project, compute2, "node2", node_type="iou")
     node_iou._ports = [EthernetPort("E0", 0, 3, 1)]
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node_vpcs, 0, 4))
     async_run(link.add_node(node_iou, 3, 1))
@@ -249,7 +256,7 @@ def test_capture(async_run, project):
     node_iou = Node(project, compute1, "I1", node_type="iou")
     node_iou._ports = [EthernetPort("E0", 0, 3, 1)]
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node_vpcs, 0, 4))
     async_run(link.add_node(node_iou, 3, 1))
@@ -277,7 +284,7 @@ def test_read_pcap_from_source(project, async_run):
     node_iou = Node(project, compute1, "I1", node_type="iou")
     node_iou._ports = [EthernetPort("E0", 0, 3, 1)]
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     link.create = AsyncioMagicMock()
     async_run(link.add_node(node_vpcs, 0, 4))
     async_run(link.add_node(node_iou, 3, 1))
@@ -297,7 +304,7 @@ def test_node_updated(project, async_run):
     node_vpcs = Node(project, compute1, "V1", node_type="vpcs")
     node_vpcs._status = "started"
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     link._capture_node = {"node": node_vpcs}
     link.stop_capture = AsyncioMagicMock()
 
@@ -327,7 +334,7 @@ def test_update(async_run, project):
 
     compute1.get_ip_on_same_subnet.side_effect = subnet_callback
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     async_run(link.add_node(node1, 0, 4))
     async_run(link.update_filters({"latency": [10]}))
 
@@ -404,7 +411,7 @@ def test_update_suspend(async_run, project):
 
     compute1.get_ip_on_same_subnet.side_effect = subnet_callback
 
-    link = UDPLink(project)
+    link = MockableUDPLink(project)
     async_run(link.add_node(node1, 0, 4))
     async_run(link.update_filters({"latency": [10]}))
     async_run(link.update_suspend(True))
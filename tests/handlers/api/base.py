@@ -93,7 +93,7 @@ class Query:
             body = json.dumps(body)
 
         connector = aiohttp.TCPConnector()
-        response = yield from aiohttp.request(method, self.get_url(path), data=body, loop=self._loop, connector=connector)
+        response = yield from aiohttp.request(method, self.get_url(path), data=body, headers=kwargs.get("headers"), loop=self._loop, connector=connector)
         response.body = yield from response.read()
         x_route = response.headers.get('X-Route', None)
         if x_route is not None:
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import asyncio
 
 from gns3server.compute.notification_manager import NotificationManager
 
@@ -33,3 +34,29 @@ def test_notification_ws(http_compute, async_run):
     assert answer["action"] == "test"
 
     async_run(http_compute.close())
+
+
+def test_notification_ws_filter(http_compute, async_run):
+    ws = http_compute.websocket("/notifications/ws?actions=log.*")
+    answer = async_run(ws.receive())
+    answer = json.loads(answer.data)
+    assert answer["action"] == "ping"
+
+    NotificationManager.instance().emit("test", {})
+    NotificationManager.instance().emit("log.info", {})
+
+    answer = async_run(ws.receive())
+    answer = json.loads(answer.data)
+    assert answer["action"] == "log.info"
+
+    # Replace the filter
+    ws.send_str(json.dumps({"actions": ["test"]}))
+    async_run(asyncio.sleep(0.1))
+    NotificationManager.instance().emit("log.info", {})
+    NotificationManager.instance().emit("test", {})
+
+    answer = async_run(ws.receive())
+    answer = json.loads(answer.data)
+    assert answer["action"] == "test"
+
+    async_run(http_compute.close())
@@ -131,6 +131,7 @@ def test_get_file(http_compute, tmpdir):
     response = http_compute.get("/projects/{project_id}/files/hello".format(project_id=project.id), raw=True)
     assert response.status == 200
     assert response.body == b"world"
+    assert response.headers["CONTENT-LENGTH"] == "5"
 
     response = http_compute.get("/projects/{project_id}/files/false".format(project_id=project.id), raw=True)
     assert response.status == 404
@@ -139,6 +140,34 @@ def test_get_file(http_compute, tmpdir):
     assert response.status == 404
 
 
+def test_get_file_range(http_compute, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0b")
+
+    data = os.urandom(4 * 1024 * 1024)
+    with open(os.path.join(project.path, "disk.qcow2"), "wb") as f:
+        f.write(data)
+
+    url = "/projects/{project_id}/files/disk.qcow2".format(project_id=project.id)
+    response = http_compute.get(url, raw=True)
+    assert response.status == 200
+    assert response.body == data
+    assert response.headers["ACCEPT-RANGES"] == "bytes"
+
+    response = http_compute.get(url, raw=True, headers={"Range": "bytes=1024-2047"})
+    assert response.status == 206
+    assert response.body == data[1024:2048]
+    assert response.headers["CONTENT-RANGE"] == "bytes 1024-2047/{}".format(len(data))
+
+    response = http_compute.get(url, raw=True, headers={"Range": "bytes=-10"})
+    assert response.status == 206
+    assert response.body == data[-10:]
+
+    response = http_compute.get(url, raw=True, headers={"Range": "bytes={}-".format(len(data))})
+    assert response.status == 416
+
+
 def test_write_file(http_compute, tmpdir):
 
     with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
@@ -154,6 +183,76 @@ def test_write_file(http_compute, tmpdir):
     assert response.status == 404
 
 
+def test_delete_file(http_compute, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0b")
+
+    with open(os.path.join(project.path, "hello"), "w+") as f:
+        f.write("world")
+
+    response = http_compute.delete("/projects/{project_id}/files/hello".format(project_id=project.id), example=True)
+    assert response.status == 204
+    assert not os.path.exists(os.path.join(project.path, "hello"))
+
+    response = http_compute.delete("/projects/{project_id}/files/hello".format(project_id=project.id))
+    assert response.status == 404
+
+
+def test_delete_file_outside_project(http_compute, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0b")
+
+    victim = str(tmpdir / "victim.txt")
+    with open(victim, "w+") as f:
+        f.write("world")
+
+    response = http_compute.delete("/projects/{project_id}/files/{path}".format(project_id=project.id, path=victim))
+    assert response.status == 403
+    response = http_compute.delete("/projects/{project_id}/files/..%2Fvictim.txt".format(project_id=project.id))
+    assert response.status == 403
+    assert os.path.exists(victim)
+
+
+def test_duplicate(http_compute, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0b")
+
+    node_dir = os.path.join(project.path, "project-files", "qemu", "01010203-0405-0607-0809-0a0b0c0d0e01")
+    os.makedirs(node_dir)
+    with open(os.path.join(node_dir, "hda_disk.qcow2"), "w+") as f:
+        f.write("DISK")
+    os.makedirs(project.tmp_working_directory())
+
+    response = http_compute.post("/projects/{project_id}/duplicate".format(project_id=project.id), {
+        "project_id": "01010203-0405-0607-0809-0a0b0c0d0e0c",
+        "name": "copy",
+        "node_ids": {"01010203-0405-0607-0809-0a0b0c0d0e01": "01010203-0405-0607-0809-0a0b0c0d0e02"}
+    }, example=True)
+    assert response.status == 201
+    assert response.json["project_id"] == "01010203-0405-0607-0809-0a0b0c0d0e0c"
+
+    new_project = ProjectManager.instance().get_project("01010203-0405-0607-0809-0a0b0c0d0e0c")
+    with open(os.path.join(new_project.path, "project-files", "qemu", "01010203-0405-0607-0809-0a0b0c0d0e02", "hda_disk.qcow2")) as f:
+        assert f.read() == "DISK"
+    assert not os.path.exists(new_project.tmp_working_directory())
+
+
+
+def test_duplicate_invalid_node_ids(http_compute, tmpdir):
+
+    with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
+        project = ProjectManager.instance().create_project(project_id="01010203-0405-0607-0809-0a0b0c0d0e0b")
+
+    for node_ids in ({"../../..": "01010203-0405-0607-0809-0a0b0c0d0e02"}, {"01010203-0405-0607-0809-0a0b0c0d0e01": "../../.."}):
+        response = http_compute.post("/projects/{project_id}/duplicate".format(project_id=project.id), {
+            "project_id": "01010203-0405-0607-0809-0a0b0c0d0e0c",
+            "node_ids": node_ids
+        })
+        assert response.status == 400
+
 def test_stream_file(http_compute, tmpdir):
 
     with patch("gns3server.config.Config.get_section_config", return_value={"projects_path": str(tmpdir)}):
@@ -37,3 +37,31 @@ def test_version_output(http_compute):
 def test_debug_output(http_compute):
     response = http_compute.get('/debug')
     assert response.status == 200
+
+
+def test_metrics_output(http_compute):
+    http_compute.get('/version')
+    response = http_compute.get('/metrics')
+    assert response.status == 200
+    assert 'gns3_http_requests_total{method="GET",route="/v2/compute/version",status="200"}' in response.body.decode()
+
+
+def test_profile(http_compute):
+    response = http_compute.post('/debug/profile/start', {"duration": 10})
+    assert response.status == 201
+    response = http_compute.post('/debug/profile/stop')
+    assert response.status == 200
+    assert "collapsed" in response.json
+
+
+def test_traces(http_compute):
+    response = http_compute.get('/version')
+    trace_id = response.headers["X-GNS3-Trace-Id"]
+    response = http_compute.get('/traces/{}'.format(trace_id))
+    assert response.status == 200
+    assert response.json["spans"][0]["name"] == "GET /v2/compute/version"
+    assert response.json["spans"][0]["tags"]["status"] == 200
+
+    response = http_compute.get('/traces?limit=1000')
+    assert response.status == 200
+    assert trace_id in [t["trace_id"] for t in response.json]
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import pytest
+import aiohttp
 import uuid
 import sys
 import os
@@ -110,6 +111,23 @@ def test_vpcs_start(http_compute, vm):
         assert response.json["name"] == "PC TEST 1"
 
 
+def test_vpcs_start_many(http_compute, vm, project):
+    response = http_compute.post("/projects/{project_id}/vpcs/nodes".format(project_id=project.id), {"name": "PC TEST 2"})
+    vm2 = response.json
+
+    with asyncio_patch("gns3server.compute.vpcs.vpcs_vm.VPCSVM.start", return_value=True) as mock:
+        response = http_compute.post("/projects/{project_id}/vpcs/nodes/start".format(project_id=vm["project_id"]), {"node_ids": [vm["node_id"], vm2["node_id"]]}, example=True)
+        assert mock.call_count == 2
+        assert response.status == 200
+        assert [r["node_id"] for r in response.json] == [vm["node_id"], vm2["node_id"]]
+        assert response.json[0]["error"] is None
+
+    with asyncio_patch("gns3server.compute.vpcs.vpcs_vm.VPCSVM.stop", side_effect=aiohttp.web.HTTPConflict(text="Error")):
+        response = http_compute.post("/projects/{project_id}/vpcs/nodes/stop".format(project_id=vm["project_id"]), {"node_ids": [vm["node_id"]]}, example=True)
+        assert response.status == 200
+        assert response.json == [{"node_id": vm["node_id"], "status": "stopped", "error": "Error"}]
+
+
 def test_vpcs_stop(http_compute, vm):
     with asyncio_patch("gns3server.compute.vpcs.vpcs_vm.VPCSVM.stop", return_value=True) as mock:
         response = http_compute.post("/projects/{project_id}/vpcs/nodes/{node_id}/stop".format(project_id=vm["project_id"], node_id=vm["node_id"]), example=True)
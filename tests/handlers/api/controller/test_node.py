@@ -21,6 +21,7 @@ This test suite check /project endpoint
 
 import uuid
 import os
+import json
 import asyncio
 import aiohttp
 import pytest
@@ -135,6 +136,43 @@ def test_start_all_nodes(http_controller, tmpdir, project, compute):
     assert response.status == 204
 
 
+def test_bulk(http_controller, tmpdir, project, compute, node):
+    compute.post = AsyncioMagicMock()
+    router = Node(project, compute, "R1", node_type="dynamips")
+    project._nodes[router.id] = router
+
+    response = http_controller.post("/projects/{}/nodes/bulk".format(project.id), {"action": "reload", "node_type": "dynamips"})
+    assert response.status == 200
+    lines = [json.loads(line) for line in response.body.decode().splitlines()]
+    assert lines == [
+        {"node_id": router.id, "name": "R1", "action": "reload", "error": None},
+        {"action": "reload", "nodes": 1, "errors": 0}
+    ]
+    compute.post.assert_called_with("/projects/{}/dynamips/nodes/{}/reload".format(project.id, router.id), timeout=240)
+
+
+
+def test_bulk_error(http_controller, tmpdir, project, compute, node):
+    """
+    The response is already started when the action fails,
+    the error is sent in the summary
+    """
+
+    router = Node(project, compute, "R1", node_type="dynamips")
+    project._nodes[router.id] = router
+
+    @asyncio.coroutine
+    def bulk_action(action, nodes, callback=None):
+        callback(router, None)
+        raise KeyError("node_id")
+
+    project.bulk_action = bulk_action
+    response = http_controller.post("/projects/{}/nodes/bulk".format(project.id), {"action": "reload"})
+    assert response.status == 200
+    lines = [json.loads(line) for line in response.body.decode().splitlines()]
+    assert lines[0] == {"node_id": router.id, "name": "R1", "action": "reload", "error": None}
+    assert lines[1] == {"action": "reload", "nodes": 2, "errors": 1, "error": "'node_id'"}
+
 def test_stop_all_nodes(http_controller, tmpdir, project, compute):
     response = MagicMock()
     compute.post = AsyncioMagicMock()
@@ -212,6 +212,42 @@ def test_export_with_images(http_controller, tmpdir, loop, project):
         myzip.getinfo("images/IOS/test.image")
 
 
+def test_export_compute_error(http_controller, tmpdir, loop, project):
+    """
+    The download of a file from a compute fails during the export, the
+    headers are already sent so the connection is aborted
+    """
+
+    project.dump = MagicMock()
+
+    class FailingContent:
+
+        def __init__(self):
+            self.reads = 0
+
+        @asyncio.coroutine
+        def read(self, size):
+            self.reads += 1
+            if self.reads > 2:
+                raise aiohttp.ClientPayloadError("Connection lost")
+            return os.urandom(64 * 1024)
+
+    @asyncio.coroutine
+    def download_file(project, path):
+        response = MagicMock()
+        response.content = FailingContent()
+        return response
+
+    compute = MagicMock()
+    compute.id = "remote"
+    compute.list_files = asyncio.coroutine(lambda project, md5sum=True: [{"path": "project-files/qemu/vm1/hda_disk.qcow2"}])
+    compute.download_file = download_file
+    project._project_created_on_compute.add(compute)
+
+    with pytest.raises(aiohttp.ClientError):
+        http_controller.get("/projects/{project_id}/export".format(project_id=project.id), raw=True)
+
+
 def test_export_without_images(http_controller, tmpdir, loop, project):
     project.dump = MagicMock()
 
@@ -70,3 +70,43 @@ def test_debug_non_local(http_controller, config, tmpdir):
     config.set("Server", "local", False)
     response = http_controller.post('/debug')
     assert response.status == 403
+
+
+def test_metrics(http_controller):
+    http_controller.get('/version')
+    response = http_controller.get('/metrics')
+    assert response.status == 200
+    assert response.headers["CONTENT-TYPE"].startswith("text/plain")
+    assert 'gns3_http_requests_total{method="GET",route="/v2/version",status="200"}' in response.body.decode()
+
+
+def test_profile(http_controller):
+    response = http_controller.post('/debug/profile/stop')
+    assert response.status in (200, 409)
+
+    response = http_controller.post('/debug/profile/start', {"duration": 10, "interval": 0.001})
+    assert response.status == 201
+    assert response.json["running"]
+
+    response = http_controller.post('/debug/profile/start')
+    assert response.status == 409
+
+    response = http_controller.post('/debug/profile/stop')
+    assert response.status == 200
+    assert response.json["running"] is False
+    assert isinstance(response.json["top"], list)
+
+
+def test_traces(http_controller):
+    response = http_controller.get('/version')
+    trace_id = response.headers["X-GNS3-Trace-Id"]
+    response = http_controller.get('/traces/{}'.format(trace_id))
+    assert response.status == 200
+    assert [s["name"] for s in response.json["spans"]] == ["GET /v2/version"]
+
+    response = http_controller.get('/traces?limit=1000&min_duration=0')
+    assert response.status == 200
+    assert trace_id in [t["trace_id"] for t in response.json]
+
+    response = http_controller.get('/traces?limit=a')
+    assert response.status == 400
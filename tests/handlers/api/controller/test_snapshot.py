@@ -15,9 +15,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
 import os
 import uuid
 import pytest
+import zipfile
 
 
 @pytest.fixture
@@ -57,4 +59,11 @@ def test_restore_snapshot(http_controller, project, snapshot):
 def test_create_snapshot(http_controller, project):
     response = http_controller.post("/projects/{}/snapshots".format(project.id), {"name": "snap1"}, example=True)
     assert response.status == 201
-    assert len(os.listdir(os.path.join(project.path, "snapshots"))) == 1
+    assert len(project.snapshot_store.manifests()) == 1
+
+
+def test_export_snapshot(http_controller, project, snapshot):
+    response = http_controller.get("/projects/{}/snapshots/{}/export".format(project.id, snapshot.id), raw=True)
+    assert response.status == 200
+    with zipfile.ZipFile(io.BytesIO(response.body)) as myzip:
+        assert "project.gns3" in myzip.namelist()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from benchmarks import archive, console, memory
+from benchmarks.topology import run
+
+
+def test_topology_benchmark(loop):
+    """
+    Quick run of the benchmark to check it still works with the controller
+    """
+
+    results = loop.run_until_complete(run([4], file_size=10, in_process=True))
+    phases = results["sizes"]["4"]
+    assert set(phases.keys()) == {"add_nodes", "create_links", "dump", "close", "open", "notifications", "export", "import"}
+    assert phases["add_nodes"]["requests"] >= 5  # One project and 4 nodes
+    assert phases["create_links"]["requests"] == 8  # Two UDP ports and two NIOs by link
+    assert phases["dump"]["requests"] == 0
+    assert phases["export"]["requests"] == 5  # List and download the file of each node
+    for phase in phases.values():
+        assert phase["wall_time"] >= 0
+        assert phase["peak_rss"] > 0
+
+
+def test_memory_benchmark(loop):
+    results = loop.run_until_complete(memory.run([10], in_process=True))
+    assert results["sizes"]["10"]["traced_bytes"] > 0
+    assert results["sizes"]["10"]["traced_bytes_per_1k_nodes"] == results["sizes"]["10"]["traced_bytes"] * 100
+
+
+def test_archive_benchmark(loop):
+    results = loop.run_until_complete(archive.run(2, 1024 * 1024))
+    exports = results["exports"]
+    # The disks are stored instead of being deflated
+    assert exports["zip"]["size"] >= exports["deflate_all"]["size"]
+    assert exports["zip_level_1"]["size"] >= exports["zip"]["size"]
+
+
+def test_console_benchmark(loop):
+    results = loop.run_until_complete(console.run(console.SCENARIOS, [1, 3], 20000, slow_clients=1))
+    scenarios = results["scenarios"]
+    assert set(scenarios.keys()) == {"telnet_output", "telnet_output_slow", "telnet_input", "telnet_input_iac",
+                                     "raw_command", "docker_console", "docker_console_slow"}
+    assert scenarios["telnet_output"]["3"]["bytes"] == 60000
+    assert scenarios["telnet_output"]["3"]["latency"]["max"] > 0
+    # Telnet commands split between two reads
+    assert scenarios["telnet_input_iac"]["3"]["bytes"] > 60000
+    assert scenarios["raw_command"]["3"]["bytes"] == 60000
+    assert scenarios["docker_console"]["1"]["bytes"] == 20000
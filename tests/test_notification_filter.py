@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from unittest.mock import MagicMock
+
+from gns3server.notification_filter import NotificationFilter
+
+
+def test_match_everything():
+    f = NotificationFilter()
+    assert f.match("node.updated", {"node_id": "a", "project_id": "b"})
+    assert f.match("ping", {})
+
+
+def test_match_actions():
+    f = NotificationFilter(actions=["node.updated", "log.*"])
+    assert f.match("node.updated", {})
+    assert f.match("log.error", {})
+    assert f.match("log.warning", {})
+    assert not f.match("node.created", {})
+    assert not f.match("link.updated", {})
+
+
+def test_match_node_ids():
+    f = NotificationFilter(node_ids=["a"])
+    assert f.match("node.updated", {"node_id": "a"})
+    assert not f.match("node.updated", {"node_id": "b"})
+    # Links are related to the nodes on each side
+    assert f.match("link.created", {"nodes": [{"node_id": "b"}, {"node_id": "a"}]})
+    assert not f.match("link.created", {"nodes": [{"node_id": "b"}, {"node_id": "c"}]})
+    # Events without node are not filtered
+    assert f.match("log.info", {"message": "test"})
+
+
+def test_match_node_object():
+    """
+    The compute send node objects serialized only when sent
+    """
+    node = MagicMock()
+    node.id = "a"
+    f = NotificationFilter(node_ids=["b"])
+    assert not f.match("node.updated", node)
+    f = NotificationFilter(node_ids=["a"])
+    assert f.match("node.updated", node)
+
+
+def test_match_project_ids():
+    f = NotificationFilter(project_ids=["a"])
+    assert f.match("node.updated", {"project_id": "a"})
+    assert not f.match("node.updated", {"project_id": "b"})
+    assert f.match("node.updated", {}, project_id="a")
+    assert not f.match("node.updated", {}, project_id="b")
+    assert f.match("compute.updated", {"compute_id": "local"})
+
+    f = NotificationFilter(project_ids=[])
+    assert not f.match("node.updated", {}, project_id="a")
+
+
+def test_from_query():
+    f = NotificationFilter.from_query({"actions": "node.updated,log.*", "node_ids": "a,b"})
+    assert f.__json__() == {
+        "actions": ["node.updated", "log.*"],
+        "node_ids": ["a", "b"],
+        "project_ids": None
+    }
+
+
+def test_update_from_json():
+    f = NotificationFilter(actions=["node.updated"])
+    f.update_from_json('{"project_ids": ["a"]}')
+    assert f.__json__() == {
+        "actions": None,
+        "node_ids": None,
+        "project_ids": ["a"]
+    }
+
+    with pytest.raises(ValueError):
+        f.update_from_json('[]')
+    with pytest.raises(ValueError):
+        f.update_from_json('{"node_ids": "a"}')
+    with pytest.raises(ValueError):
+        f.update_from_json('{"node_ids"')
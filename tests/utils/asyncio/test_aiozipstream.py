@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import asyncio
+import zipfile
+import pytest
+import aiohttp
+
+from gns3server.utils.asyncio import aiozipstream
+
+
+class FakeContent:
+
+    def __init__(self, chunks, delay=0):
+        self.chunks = list(chunks)
+        self.delay = delay
+        self.reads = 0
+
+    @asyncio.coroutine
+    def read(self, size):
+        yield from asyncio.sleep(self.delay)
+        self.reads += 1
+        if self.chunks:
+            return self.chunks.pop(0)
+        return b""
+
+
+class FakeResponse:
+
+    def __init__(self, content):
+        self.content = content
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _open(response):
+    @asyncio.coroutine
+    def open_stream():
+        return response
+    return open_stream
+
+
+def _read_all(async_run, z):
+    @asyncio.coroutine
+    def read():
+        data = b""
+        while True:
+            chunk = yield from z.readchunk()
+            if not chunk:
+                return data
+            data += chunk
+    return async_run(read())
+
+
+def test_write_stream(async_run, tmpdir):
+    path = str(tmpdir / "test.txt")
+    with open(path, "wb") as f:
+        f.write(b"LOCAL")
+
+    data = os.urandom(1024)
+    response = FakeResponse(FakeContent([data] * 10, delay=0.001))
+    z = aiozipstream.ZipFile(allowZip64=True)
+    z.write(path, "local.txt")
+    z.write_stream("remote/file.bin", _open(response), compress_type=zipfile.ZIP_DEFLATED)
+    z.writestr("project.gns3", b"{}")
+    archive = _read_all(async_run, z)
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as myzip:
+        assert myzip.read("local.txt") == b"LOCAL"
+        assert myzip.read("remote/file.bin") == data * 10
+        assert myzip.read("project.gns3") == b"{}"
+        assert myzip.testzip() is None
+    assert response.closed
+
+
+def test_read_ahead(async_run):
+    first = FakeResponse(FakeContent([b"A" * 100] * 100))
+    second = FakeResponse(FakeContent([b"B"]))
+    z = aiozipstream.ZipFile(read_ahead=2, prefetch=1)
+    z.write_stream("first", _open(first))
+    z.write_stream("second", _open(second))
+
+    async_run(z.readchunk())  # Header of the first file
+    async_run(z.readchunk())
+    async_run(asyncio.sleep(0.01))
+    # Only a few chunks are read before the archive is consumed
+    assert first.content.reads <= 4
+    # The prefetch is full
+    assert second.content.reads == 0
+
+    _read_all(async_run, z)
+    assert second.content.reads == 2
+
+
+def test_prefetch(async_run):
+    responses = {}
+    opened = []
+
+    def open_stream(name):
+        @asyncio.coroutine
+        def open():
+            opened.append(name)
+            return responses[name]
+        return open
+
+    z = aiozipstream.ZipFile(prefetch=3, key_prefetch=2)
+    for compute in ("a", "b"):
+        for i in range(3):
+            name = "{}{}".format(compute, i)
+            responses[name] = FakeResponse(FakeContent([name.encode()] * 10, delay=0.01))
+            z.write_stream(name, open_stream(name), key=compute)
+
+    async_run(z.readchunk())
+    async_run(asyncio.sleep(0))
+    # The files of the second compute are downloaded before their turn
+    assert opened == ["a0", "a1", "b0"]
+
+    archive = _read_all(async_run, z)
+    with zipfile.ZipFile(io.BytesIO(archive)) as myzip:
+        assert myzip.namelist() == ["a0", "a1", "a2", "b0", "b1", "b2"]
+        assert myzip.read("b2") == b"b2" * 10
+    assert all(r.closed for r in responses.values())
+
+
+def test_stream_error(async_run):
+    @asyncio.coroutine
+    def open_stream():
+        raise aiohttp.web.HTTPConflict(text="Compute error")
+
+    z = aiozipstream.ZipFile()
+    z.write_stream("ok", _open(FakeResponse(FakeContent([b"A"]))))
+    z.write_stream("error", open_stream)
+    with pytest.raises(aiohttp.web.HTTPConflict):
+        _read_all(async_run, z)
+
+
+def test_cancel(async_run):
+    response = FakeResponse(FakeContent([b"A"] * 100, delay=0.01))
+    z = aiozipstream.ZipFile()
+    z.write_stream("test", _open(response))
+    async_run(z.readchunk())
+    async_run(z.readchunk())
+    z.cancel()
+    async_run(asyncio.sleep(0.05))
+    assert response.closed
+    assert response.content.reads < 100
+
+
+def test_compresslevel(async_run):
+    data = os.urandom(1000) * 100
+    sizes = []
+    for level in (0, 9):
+        z = aiozipstream.ZipFile(compresslevel=level)
+        z.writestr("test", data, compress_type=zipfile.ZIP_DEFLATED)
+        archive = _read_all(async_run, z)
+        with zipfile.ZipFile(io.BytesIO(archive)) as myzip:
+            assert myzip.read("test") == data
+        sizes.append(len(archive))
+    assert sizes[1] < sizes[0] / 10
+
+
+@pytest.mark.skipif(not aiozipstream.ZSTD_AVAILABLE, reason="zstandard is not installed")
+def test_zstd(async_run):
+    response = FakeResponse(FakeContent([b"A" * 1000] * 10))
+    z = aiozipstream.ZstdZipFile()
+    z.writestr("text", b"B" * 1000, compress_type=zipfile.ZIP_DEFLATED)
+    z.write_stream("stream", _open(response))
+    archive = io.BytesIO(_read_all(async_run, z))
+    assert aiozipstream.is_zstd(archive)
+
+    decompressed = io.BytesIO()
+    aiozipstream.decompress_zstd(archive, decompressed)
+    with zipfile.ZipFile(decompressed) as myzip:
+        # The whole archive is compressed
+        assert myzip.getinfo("text").compress_type == zipfile.ZIP_STORED
+        assert myzip.read("stream") == b"A" * 10000
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import asyncio
+
+from gns3server.utils.asyncio.loop_monitor import LoopMonitor
+
+
+def blocking_function():
+    time.sleep(0.3)
+
+
+def test_loop_monitor_slow_callback(loop):
+    monitor = LoopMonitor(interval=0.05, threshold=0.1)
+    monitor.start(loop)
+    try:
+        loop.run_until_complete(asyncio.sleep(0.1))
+        loop.call_soon(blocking_function)
+        loop.run_until_complete(asyncio.sleep(0.2))
+    finally:
+        monitor.stop()
+
+    assert not monitor.running
+    data = monitor.__json__()
+    assert data["slow_callbacks"] == 1
+    assert data["lag"]["max"] >= 0.2
+    offender = data["top_offenders"][0]
+    assert offender["count"] == 1
+    assert "blocking_function" in offender["stack"][-1]
+    assert "blocking_function" in monitor.debug_text()
+
+
+def test_loop_monitor_no_lag(loop):
+    monitor = LoopMonitor(interval=0.01, threshold=0.5)
+    monitor.start(loop)
+    try:
+        loop.run_until_complete(asyncio.sleep(0.1))
+    finally:
+        monitor.stop()
+
+    assert monitor.__json__()["slow_callbacks"] == 0
+    assert monitor.percentiles()["p50"] < 0.5
+
+
+def test_loop_monitor_prometheus(loop):
+    monitor = LoopMonitor()
+    assert monitor.prometheus() == []
+    monitor.start(loop)
+    try:
+        text = "\n".join(monitor.prometheus())
+    finally:
+        monitor.stop()
+    assert 'gns3_event_loop_lag_seconds{quantile="0.99"}' in text
+    assert "gns3_event_loop_slow_callbacks_total 0" in text
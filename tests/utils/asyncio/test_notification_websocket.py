@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import asyncio
+import aiohttp
+from unittest.mock import MagicMock
+
+from gns3server.utils.asyncio.notification_websocket import send_str, process_websocket
+
+
+def test_send_str_wait_drain(async_run):
+    drained = []
+
+    @asyncio.coroutine
+    def drain():
+        yield from asyncio.sleep(0)
+        drained.append(True)
+
+    ws = MagicMock()
+    ws.send_str.return_value = drain()
+    async_run(send_str(ws, "test", asyncio.Lock()))
+    ws.send_str.assert_called_with("test")
+    assert drained == [True]
+
+
+def test_send_str_serialize_drain(async_run):
+    """
+    Only one coroutine at a time can wait for the buffer to be flushed
+    """
+
+    waiting = []
+
+    @asyncio.coroutine
+    def drain():
+        assert waiting == []
+        waiting.append(True)
+        yield from asyncio.sleep(0.01)
+        waiting.pop()
+
+    ws = MagicMock()
+    ws.send_str.side_effect = lambda data: drain()
+    lock = asyncio.Lock()
+    async_run(asyncio.gather(send_str(ws, "a", lock), send_str(ws, "b", lock)))
+    assert ws.send_str.call_count == 2
+
+
+def test_process_websocket_invalid_filter(async_run):
+    messages = [
+        MagicMock(type=aiohttp.WSMsgType.TEXT, data="{"),
+        MagicMock(type=aiohttp.WSMsgType.CLOSE)
+    ]
+
+    @asyncio.coroutine
+    def receive():
+        return messages.pop(0)
+
+    ws = MagicMock()
+    ws.receive = receive
+    ws.send_str.return_value = None
+    queue = MagicMock()
+    queue.filter.update_from_json.side_effect = ValueError("Invalid JSON")
+    async_run(process_websocket(ws, queue, asyncio.Lock()))
+    queue.filter.update_from_json.assert_called_with("{")
+    ws.send_str.assert_called_with(json.dumps({"action": "log.error", "event": {"message": "Invalid notification filter: Invalid JSON"}}))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import pytest
+
+from gns3server.utils.asyncio.pool import Pool
+
+
+class Recorder:
+
+    def __init__(self):
+        self.running = {}
+        self.max_running = {}
+        self.order = []
+
+    @asyncio.coroutine
+    def task(self, name, key=None, delay=0.01, error=None):
+        self.order.append(name)
+        self.running[key] = self.running.get(key, 0) + 1
+        self.max_running[key] = max(self.max_running.get(key, 0), self.running[key])
+        try:
+            yield from asyncio.sleep(delay)
+        finally:
+            self.running[key] -= 1
+        if error:
+            raise error
+        return name
+
+
+def test_join(async_run):
+    recorder = Recorder()
+    pool = Pool(concurrency=2)
+    for i in range(6):
+        pool.append(recorder.task, i)
+    result = async_run(pool.join())
+    assert recorder.order == list(range(6))
+    assert recorder.max_running[None] == 2
+    assert result.results == list(range(6))
+    assert result.exceptions == []
+    assert all(t.duration >= 0.01 for t in result.tasks)
+
+
+def test_key_concurrency(async_run):
+    recorder = Recorder()
+    pool = Pool(concurrency=10, key_concurrency=2)
+    for i in range(4):
+        pool.append(recorder.task, "a{}".format(i), "a", key="a")
+    pool.append(recorder.task, "b0", "b", key="b")
+    async_run(pool.join())
+    assert recorder.max_running["a"] == 2
+    # The task of the key b doesn't wait for all the tasks of the key a
+    assert recorder.order.index("b0") < recorder.order.index("a2")
+
+
+def test_exceptions(async_run):
+    recorder = Recorder()
+    pool = Pool(concurrency=1)
+    pool.append(recorder.task, 1, error=ValueError("first"))
+    pool.append(recorder.task, 2)
+    pool.append(recorder.task, 3, error=KeyError("second"))
+    with pytest.raises(ValueError):
+        async_run(pool.join())
+
+    pool.append(recorder.task, 1, error=ValueError("first"))
+    pool.append(recorder.task, 2)
+    pool.append(recorder.task, 3, error=KeyError("second"))
+    result = async_run(pool.join(raise_exception=False))
+    assert [str(e) for e in result.exceptions] == ["first", "'second'"]
+    assert result.results == [None, 2, None]
+
+
+def test_fail_fast(async_run):
+    recorder = Recorder()
+    pool = Pool(concurrency=2, fail_fast=True)
+    pool.append(recorder.task, 1, error=ValueError())
+    pool.append(recorder.task, 2, delay=1)
+    for i in range(3, 10):
+        pool.append(recorder.task, i)
+    result = async_run(pool.join(raise_exception=False))
+    assert recorder.order == [1, 2]
+    assert len(result.exceptions) == 1
+    assert len(result.cancelled) == 8
+    assert result.tasks[1].cancelled
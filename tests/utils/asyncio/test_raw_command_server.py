@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+
+from gns3server.utils.asyncio.raw_command_server import AsyncioRawCommandServer
+
+
+def _network_writer():
+    writer = MagicMock()
+    writer.transport.get_extra_info.return_value = ("127.0.0.1", 4444)
+    writer.drain = AsyncioMagicMock()
+    return writer
+
+
+def test_process_output_with_eof(async_run):
+    """
+    The last output of the process is received with the end of file
+    """
+
+    server = AsyncioRawCommandServer(["test"], replaces=[(b"{PORT}", b"{{HOST}}:80")])
+    process_reader = asyncio.StreamReader()
+    process_reader.feed_data(b"Server {PORT}")
+    process_reader.feed_eof()
+    network_writer = _network_writer()
+
+    with pytest.raises(ConnectionResetError):
+        async_run(server._process(asyncio.StreamReader(), network_writer, process_reader, MagicMock()))
+    network_writer.write.assert_called_once_with(b"Server 127.0.0.1:80")
+
+
+def test_network_input_with_eof(async_run):
+    """
+    The last input of the client is received with the end of file
+    """
+
+    server = AsyncioRawCommandServer(["test"])
+    network_reader = asyncio.StreamReader()
+    network_reader.feed_data(b"exit\n")
+    network_reader.feed_eof()
+    process_writer = MagicMock()
+    process_writer.drain = AsyncioMagicMock()
+
+    with pytest.raises(ConnectionResetError):
+        async_run(server._process(network_reader, _network_writer(), asyncio.StreamReader(), process_writer))
+    process_writer.write.assert_called_once_with(b"exit\n")
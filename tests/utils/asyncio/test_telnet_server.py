@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+from unittest.mock import MagicMock
+
+from tests.utils import AsyncioMagicMock
+
+from gns3server.utils.asyncio.telnet_server import AsyncioTelnetServer, IAC, SB, SE, NAWS, DO, SGA, WILL
+
+
+def _reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    return reader
+
+
+def test_iac_parser(async_run):
+    server = AsyncioTelnetServer(naws=True)
+    writer = MagicMock()
+    writer.drain = AsyncioMagicMock()
+    connection = MagicMock()
+
+    buf = b"ls" + bytes([IAC, SB, NAWS, 0, 80, 0, 24, IAC, SE]) + b"\r\n" + bytes([IAC, DO, SGA])
+    assert async_run(server._IAC_parser(buf, _reader(b""), writer, connection)) == b"ls\r\n"
+    connection.window_size_changed.assert_called_with(80, 24)
+    writer.write.assert_called_with(bytes([IAC, WILL, SGA]))
+
+
+def test_iac_parser_negotiation_split(async_run):
+    """
+    The end of the window size negotiation is received by the next read
+    """
+
+    server = AsyncioTelnetServer(naws=True)
+    writer = MagicMock()
+    writer.drain = AsyncioMagicMock()
+    connection = MagicMock()
+
+    buf = b"ls" + bytes([IAC, SB, NAWS, 0])
+    reader = _reader(bytes([80, 0, 24, IAC, SE]))
+    assert async_run(server._IAC_parser(buf, reader, writer, connection)) == b"ls"
+    connection.window_size_changed.assert_called_with(80, 24)
+
+
+def test_iac_parser_command_split(async_run):
+    """
+    The option of a 3 bytes command is received by the next read
+    """
+
+    server = AsyncioTelnetServer()
+    writer = MagicMock()
+    writer.drain = AsyncioMagicMock()
+
+    buf = b"ls" + bytes([IAC, DO])
+    assert async_run(server._IAC_parser(buf, _reader(bytes([SGA]) + b"-l"), writer, MagicMock())) == b"ls"
+    writer.write.assert_called_with(bytes([IAC, WILL, SGA]))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from unittest.mock import patch
+
+from gns3server.utils import file_copy
+from gns3server.utils.file_copy import copy_file, copy_tree
+
+
+def test_copy_file(tmpdir):
+    src = str(tmpdir / "src")
+    with open(src, "wb") as f:
+        f.write(b"DATA" * 1000)
+    os.chmod(src, 0o755)
+
+    copy_file(src, str(tmpdir / "dst"))
+    with open(str(tmpdir / "dst"), "rb") as f:
+        assert f.read() == b"DATA" * 1000
+    assert os.stat(str(tmpdir / "dst")).st_mode == os.stat(src).st_mode
+    assert os.path.getmtime(str(tmpdir / "dst")) == os.path.getmtime(src)
+
+
+def test_copy_sparse_file(tmpdir):
+    src = str(tmpdir / "src")
+    with open(src, "wb") as f:
+        f.write(b"HEADER")
+        f.seek(10 * 1024 * 1024)
+        f.write(b"DATA")
+        f.truncate(20 * 1024 * 1024)
+
+    # Without the clone of the filesystem
+    with patch("gns3server.utils.file_copy._clone", return_value=False):
+        assert copy_file(src, str(tmpdir / "dst")) is False
+    dst = str(tmpdir / "dst")
+    assert os.path.getsize(dst) == 20 * 1024 * 1024
+    with open(src, "rb") as f1, open(dst, "rb") as f2:
+        assert f1.read() == f2.read()
+    # The holes are not written
+    assert os.stat(dst).st_blocks <= os.stat(src).st_blocks
+
+
+def test_copy_without_seek_data(tmpdir):
+    src = str(tmpdir / "src")
+    with open(src, "wb") as f:
+        f.write(os.urandom(3 * file_copy.COPY_BUFFER_SIZE + 10))
+
+    with patch("gns3server.utils.file_copy._clone", return_value=False):
+        with patch("gns3server.utils.file_copy._data_ranges", side_effect=lambda f, size: iter([(0, size)])):
+            copy_file(src, str(tmpdir / "dst"))
+    with open(src, "rb") as f1, open(str(tmpdir / "dst"), "rb") as f2:
+        assert f1.read() == f2.read()
+
+
+def test_copy_tree(tmpdir, async_run):
+    src = tmpdir / "src"
+    for i in range(10):
+        (src / "dir{}".format(i % 3)).ensure("file{}".format(i)).write("FILE{}".format(i))
+    (src / "tmp").ensure("ignored").write("IGNORED")
+    (src / "dir0").ensure("test.log").write("LOG")
+
+    def ignore(path):
+        return os.path.basename(path) == "tmp" or path.endswith(".log")
+
+    async_run(copy_tree(str(src), str(tmpdir / "dst"), ignore=ignore))
+    for i in range(10):
+        assert (tmpdir / "dst" / "dir{}".format(i % 3) / "file{}".format(i)).read() == "FILE{}".format(i)
+    assert not os.path.exists(str(tmpdir / "dst" / "tmp"))
+    assert not os.path.exists(str(tmpdir / "dst" / "dir0" / "test.log"))
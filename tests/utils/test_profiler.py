@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import pytest
+
+from gns3server.utils.profiler import Profiler, ProfilerError
+
+
+def busy_function(duration):
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        pass
+
+
+def test_profiler():
+    profiler = Profiler()
+    profiler.start(duration=5, interval=0.001)
+    with pytest.raises(ProfilerError):
+        profiler.start()
+    busy_function(0.2)
+    profiler.stop()
+    assert not profiler.running
+
+    data = profiler.__json__()
+    assert data["samples"] > 0
+    assert "MainThread;" in data["collapsed"]
+    assert "busy_function (test_profiler.py:" in data["collapsed"]
+    functions = [f["function"] for f in data["top"]]
+    assert "busy_function" in functions
+
+
+def test_profiler_duration():
+    profiler = Profiler()
+    profiler.start(duration=0.05, interval=0.001)
+    time.sleep(0.2)
+    assert not profiler.running
+    assert profiler.stop().samples > 0
+
+
+def test_profiler_not_started():
+    with pytest.raises(ProfilerError):
+        Profiler().stop()
+    with pytest.raises(ProfilerError):
+        Profiler().start(duration=0)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+from gns3server.utils.tracing import Span, TraceStore, current_span, set_current_span, install
+
+
+def test_span_invalid_ids():
+    span = Span("GET /v2/version", trace_id="bad id !", parent_id="\n")
+    assert span.trace_id != "bad id !"
+    assert span.parent_id is None
+
+    span = Span("GET /v2/version", trace_id="abc", parent_id="def")
+    assert span.trace_id == "abc"
+    assert span.parent_id == "def"
+
+
+def test_span_child():
+    span = Span("GET /v2/version")
+    child = span.child("GET /version")
+    assert child.trace_id == span.trace_id
+    assert child.parent_id == span.span_id
+    assert child.kind == "client"
+    assert child.headers() == {"X-GNS3-Trace-Id": span.trace_id, "X-GNS3-Parent-Span-Id": child.span_id}
+
+
+def test_trace_store():
+    store = TraceStore(max_traces=2, max_spans=2)
+    spans = []
+    for i in range(3):
+        span = Span("test", trace_id="trace{}".format(i))
+        span.duration = i
+        spans.append(span)
+        store.add(span)
+    assert store.get("trace0") == []
+    assert store.get("trace2") == [spans[2]]
+
+    for i in range(3):
+        child = spans[1].child("child")
+        child.duration = 0
+        store.add(child)
+    assert len(store.get("trace1")) == 2
+
+    assert [t["trace_id"] for t in store.slow_traces()] == ["trace2", "trace1"]
+    assert [t["trace_id"] for t in store.slow_traces(min_duration=1.5)] == ["trace2"]
+    assert [t["trace_id"] for t in store.slow_traces(limit=1)] == ["trace2"]
+
+
+def test_span_finish():
+    span = Span("test")
+    span.finish(status=200)
+    assert span.duration >= 0
+    assert span.tags == {"status": 200}
+    assert TraceStore.instance().get(span.trace_id) == [span]
+
+
+def test_current_span_propagation(loop):
+    install(loop)
+    span = Span("test")
+
+    @asyncio.coroutine
+    def child():
+        return current_span()
+
+    @asyncio.coroutine
+    def parent():
+        set_current_span(span)
+        result = yield from asyncio.gather(child(), child())
+        set_current_span(None)
+        return result + [current_span()]
+
+    try:
+        assert loop.run_until_complete(asyncio.async(parent())) == [span, span, None]
+    finally:
+        loop.set_task_factory(None)
+
+
+def test_current_span_background_task(loop):
+    """
+    A task outliving the request doesn't keep the span of the request
+    """
+
+    install(loop)
+    span = Span("test")
+    started = asyncio.Event(loop=loop)
+    request_finished = asyncio.Event(loop=loop)
+
+    @asyncio.coroutine
+    def background():
+        during = current_span()
+        started.set()
+        yield from request_finished.wait()
+        return during, current_span()
+
+    @asyncio.coroutine
+    def request():
+        set_current_span(span)
+        task = asyncio.async(background())
+        yield from started.wait()
+        set_current_span(None)
+        span.finish()
+        request_finished.set()
+        return task
+
+    try:
+        task = loop.run_until_complete(asyncio.async(request()))
+        assert loop.run_until_complete(task) == (span, None)
+    finally:
+        loop.set_task_factory(None)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from gns3server.web.metrics import Histogram, Metrics
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(0.5)
+    histogram.observe(2)
+    assert histogram.count == 4
+    assert histogram.sum == 2.65
+    assert histogram.cumulative_buckets() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+
+
+def test_prometheus():
+    metrics = Metrics()
+    route = metrics.add_route("GET", "/v2/projects/{project_id}")
+    metrics.add_route("POST", "/v2/unused")
+    route.record(200, 0.02)
+    route.record(404, 0.002)
+    route.lock_wait.observe(0.5)
+    route.in_flight = 1
+
+    text = metrics.prometheus()
+    assert 'gns3_http_requests_total{method="GET",route="/v2/projects/{project_id}",status="200"} 1' in text
+    assert 'gns3_http_requests_total{method="GET",route="/v2/projects/{project_id}",status="404"} 1' in text
+    assert 'gns3_http_requests_in_flight{method="GET",route="/v2/projects/{project_id}"} 1' in text
+    assert 'gns3_http_request_duration_seconds_bucket{method="GET",route="/v2/projects/{project_id}",le="0.005"} 1' in text
+    assert 'gns3_http_request_duration_seconds_bucket{method="GET",route="/v2/projects/{project_id}",le="+Inf"} 2' in text
+    assert 'gns3_http_request_duration_seconds_count{method="GET",route="/v2/projects/{project_id}"} 2' in text
+    assert 'gns3_http_node_lock_wait_seconds_count{method="GET",route="/v2/projects/{project_id}"} 1' in text
+    assert "process_resident_memory_bytes" in text
+    assert "/v2/unused" not in text